@@ -0,0 +1,281 @@
+"""
+Benchmarki funkcji z stock_analysis i stock_rate oraz całej komendy /review (z atrapą bota Telegrama) na syntetycznych
+danych OHLCV. Dla każdej funkcji i rozmiaru danych mierzony jest czas (mediana z kilku powtórzeń) oraz szczytowe
+zużycie pamięci (tracemalloc, osobne wywołanie). Osobno mierzony jest czas startu bota (python bot.py --startup-time).
+
+Użycie (z katalogu głównego repozytorium):
+    python benchmarks/bench.py                          - pomiar i tabela wyników
+    python benchmarks/bench.py --save                   - zapis wyników jako punktu odniesienia
+    python benchmarks/bench.py --compare                - porównanie z punktem odniesienia (kod wyjścia 1 przy regresji)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from collections.abc import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# bot czyta pliki yml ze ścieżek względnych, a cache zapisuje w katalogu tymczasowym
+os.chdir(SRC)
+sys.path.insert(0, SRC)
+os.environ.setdefault('OHLCV_CACHE_DIR', tempfile.mkdtemp(prefix='bench-cache-'))
+
+import matplotlib
+matplotlib.use('Agg')
+
+# mplfinance ostrzega przy dużej liczbie świec - w benchmarkach to zamierzone
+warnings.filterwarnings('ignore', module='mplfinance')
+
+import pandas as pd
+import yaml
+
+import bot
+import data_provider
+import fetch_window
+import ohlcv_cache
+import resample
+import stock_analysis
+import stock_rate
+from chart_cache import ChartCache
+from chart_engine import ChartEngine
+from indicators import IndicatorFrame
+from settings_store import SettingsStore
+from synthetic import synthetic_ohlcv
+
+# rozmiar -> (interwał, liczba świec, okres komendy /review)
+SIZES = {
+    '2m_60d': ('2m', 60 * 195, '1d'),
+    '60m_2y': ('60m', 504 * 7, '1mo'),
+    '1d_max': ('1d', 40 * 252, '2y'),
+    '1m_7d': ('1m', 7 * 390, '1d'),
+}
+
+# symbol, pod którym źródło replay udostępnia dane syntetyczne
+BENCH_SYMBOL = 'BENCH'
+
+CHARTS = ['price_atr_ad', 'moving_averages', 'rsi_so_price', 'year_cycle_graph', 'adx', 'macd']
+RATINGS = ['impulse_signal', 'value_zone', 'rsi_level', 'so_level', 'adx_level', 'rating']
+
+# dopuszczalny wzrost czasu/pamięci względem punktu odniesienia
+TOLERANCE = 0.25
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    """
+    Funkcja mierzy czas (mediana) i szczytowe zużycie pamięci wywołania.
+    :param func: funkcja bez argumentów
+    :param repeat: int - liczba powtórzeń pomiaru czasu
+    :return: dict z kluczami time_s i peak_mb
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time_s': statistics.median(times), 'peak_mb': peak / 2 ** 20}
+
+
+def function_jobs(data: pd.DataFrame, config: dict, mode: dict) -> dict[str, Callable[[], object]]:
+    """
+    Funkcja przygotowuje wywołania mierzonych funkcji - każde liczy wskaźniki od nowa.
+    :param data: DataFrame - dane syntetyczne
+    :param config: dict - ustawienia wskaźników
+    :param mode: dict - motyw wykresów
+    :return: dict nazwa -> funkcja bez argumentów
+    """
+    # jak w /review - wykres zaczyna się po rozgrzewce wskaźników
+    start = data.index[min(fetch_window.warmup_bars(config), len(data) - 1)]
+    daily = data.index.tz is None
+    weekly = resample.resample_ohlcv(data, '1wk') if daily else data
+
+    # wykres cykli rocznych jest rysowany tylko dla danych dziennych i dłuższych
+    jobs = {f'stock_analysis.{name}': (lambda f=getattr(stock_analysis, name): f(IndicatorFrame(data, config), mode,
+                                                                                  start))
+            for name in CHARTS if daily or name != 'year_cycle_graph'}
+    jobs.update({f'stock_rate.{name}': (lambda f=getattr(stock_rate, name): f(IndicatorFrame(data, config)))
+                 for name in RATINGS if name != 'rating'})
+    jobs['stock_rate.rating'] = lambda: stock_rate.rating(IndicatorFrame(data, config), IndicatorFrame(weekly, config))
+    return jobs
+
+
+class StubMessage:
+    def __init__(self, index: int):
+        self.photo = [type('PhotoSize', (), {'file_id': f'file-{index}'})()]
+
+
+class StubBot:
+    """
+    Atrapa bota - zamiast wysyłać wiadomości, liczy je.
+    """
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent += 1
+        return StubMessage(self.sent)
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        self.sent += len(media)
+        return [StubMessage(self.sent + i) for i in range(len(media))]
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+
+
+class StubContext:
+    def __init__(self):
+        self.bot = StubBot()
+        self.chat_data = {}
+
+
+def review_jobs(frames: dict[str, pd.DataFrame], config: dict, workers: int) -> dict[str, tuple]:
+    """
+    Funkcja przygotowuje bota do pomiaru /review - dane z Yahoo są zastąpione danymi syntetycznymi odtwarzanymi przez
+    źródło danych replay.
+    :param frames: dict rozmiar -> DataFrame
+    :param config: dict - ustawienia wskaźników
+    :param workers: int - liczba procesów rysujących
+    :return: dict rozmiar -> (interwał, okres)
+    """
+    directory = tempfile.mkdtemp(prefix='bench-replay-')
+    for size, data in frames.items():
+        ohlcv_cache.save(BENCH_SYMBOL, SIZES[size][0], data, directory=directory)
+
+    data_provider.provider = data_provider.ReplayProvider(directory, latency=0, synthetic=False)
+    bot.settings_store = SettingsStore(config, os.path.join(tempfile.mkdtemp(), 'settings.db'))
+    bot.chart_engine = ChartEngine(workers)
+    bot.chart_cache = ChartCache()
+    return {size: SIZES[size][::2] for size in frames}
+
+
+def run(repeat: int, sizes: list[str], workers: int) -> dict:
+    """
+    Funkcja wykonuje wszystkie pomiary.
+    :param repeat: int - liczba powtórzeń pomiaru czasu
+    :param sizes: list - rozmiary danych
+    :param workers: int - liczba procesów rysujących w /review
+    :return: dict rozmiar -> nazwa -> wynik
+    """
+    with open('config.yml', 'r') as file:
+        config = yaml.safe_load(file)
+    with open('modes.yml', 'r') as file:
+        mode = yaml.safe_load(file)[config['mode']]
+
+    frames = {size: synthetic_ohlcv(SIZES[size][0], SIZES[size][1], seed=i) for i, size in enumerate(sizes)}
+    results = {}
+    for size, data in frames.items():
+        results[size] = {name: measure(job, repeat) for name, job in function_jobs(data, config, mode).items()}
+        print(f'{size}: {len(data)} świec', file=sys.stderr)
+
+    reviews = review_jobs(frames, config, workers)
+    loop = asyncio.new_event_loop()
+    try:
+        # pierwsze wywołanie uruchamia procesy robocze - nie jest mierzone
+        data = next(iter(frames.values()))
+        loop.run_until_complete(bot.chart_engine.render([('macd', dict(
+            ind=IndicatorFrame(data, config), mode=mode, start=data.index[-100]))]))
+        for size, (interval, period) in reviews.items():
+            def review(cached: bool, interval=interval, period=period):
+                if not cached:
+                    bot.chart_cache = ChartCache()
+                loop.run_until_complete(bot.review(StubContext(), 1, BENCH_SYMBOL, interval, period))
+
+            results[size]['review'] = measure(lambda: review(False), repeat)
+            results[size]['review_cached'] = measure(lambda: review(True), repeat)
+    finally:
+        bot.chart_engine.shutdown()
+        loop.close()
+    return results
+
+
+def startup(repeat: int) -> dict:
+    """
+    Funkcja mierzy czas startu bota w osobnych procesach - importy, gotowość do odbierania wiadomości i wstępne
+    ładowanie bibliotek oraz procesów rysujących.
+    :param repeat: int - liczba powtórzeń pomiaru
+    :return: dict etap -> wynik (pamięć nie jest mierzona)
+    """
+    env = {**os.environ, 'SETTINGS_DB': os.path.join(tempfile.mkdtemp(), 'settings.db')}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, 'bot.py', '--startup-time'], capture_output=True, text=True,
+                                check=True, env=env).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {stage.removesuffix('_s'): {'time_s': statistics.median(run[stage] for run in runs), 'peak_mb': 0.0}
+            for stage in runs[0]}
+
+
+def report(results: dict, baseline: dict | None = None) -> list[str]:
+    """
+    Funkcja wypisuje tabelę wyników i zwraca listę regresji względem punktu odniesienia.
+    :param results: dict - wyniki pomiarów
+    :param baseline: dict - wyniki odniesienia
+    :return: list - opisy regresji
+    """
+    regressions = []
+    for size, functions in results.items():
+        print(f'\n{size}')
+        print(f'  {"funkcja":<34} {"czas [ms]":>10} {"pamięć [MB]":>12} {"zmiana czasu":>13}')
+        for name, result in functions.items():
+            reference = (baseline or {}).get(size, {}).get(name)
+            change = ''
+            if reference is not None:
+                ratio = result['time_s'] / reference['time_s'] - 1
+                change = f'{ratio:+.0%}'
+                if ratio > TOLERANCE:
+                    regressions.append(f'{size} {name}: czas {ratio:+.0%}')
+                memory = result['peak_mb'] / max(reference['peak_mb'], 1e-3) - 1
+                if memory > TOLERANCE and result['peak_mb'] - reference['peak_mb'] > 1:
+                    regressions.append(f'{size} {name}: pamięć {memory:+.0%}')
+            print(f'  {name:<34} {result["time_s"] * 1000:>10.1f} {result["peak_mb"]:>12.1f} {change:>13}')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarki StockAnalyzerBot')
+    parser.add_argument('--repeat', type=int, default=3, help='liczba powtórzeń pomiaru czasu')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES), help='rozmiary danych')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='procesy rysujące w /review')
+    parser.add_argument('--save', action='store_true', help='zapisz wyniki jako punkt odniesienia')
+    parser.add_argument('--compare', action='store_true', help='porównaj z punktem odniesienia')
+    parser.add_argument('--baseline', default=BASELINE, help='plik z punktem odniesienia')
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.sizes, args.workers)
+    results['startup'] = startup(args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+    regressions = report(results, baseline)
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'\nZapisano punkt odniesienia: {args.baseline}')
+
+    if regressions:
+        print('\nRegresje:\n  ' + '\n  '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
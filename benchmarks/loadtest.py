@@ -0,0 +1,292 @@
+"""
+Test obciążeniowy bota bez dostępu do sieci. Aktualizacje Telegrama (/review, /rate i przyciski ustawień) są
+przekazywane do aplikacji bota z zadaną częstotliwością (proces Poissona), dane OHLCV pochodzą z dostawcy replay
+(pliki lub dane syntetyczne), a zapytania do API Telegrama obsługuje atrapa (StubRequest) z zadanym czasem odpowiedzi.
+Bot działa tak jak w produkcji - ze schedulerem, limitem wysyłki wiadomości i procesami rysującymi.
+
+Wynik: przepustowość oraz czasy obsługi (p50/p95/p99) każdego rodzaju aktualizacji i liczba odrzuconych zapytań.
+
+Użycie (z katalogu głównego repozytorium):
+    python benchmarks/loadtest.py --rate 2 --duration 60
+    python benchmarks/loadtest.py --rate 5 --chats 50 --mix review=5,rate=3,button=2 --json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+# bot czyta pliki yml ze ścieżek względnych, a cache zapisuje w katalogu tymczasowym
+os.chdir(SRC)
+sys.path.insert(0, SRC)
+os.environ.setdefault('OHLCV_CACHE_DIR', tempfile.mkdtemp(prefix='loadtest-cache-'))
+
+import numpy as np
+import yaml
+from telegram import Update
+from telegram.request import BaseRequest, RequestData
+
+import alerts
+import bot
+import data_provider
+import screener
+from chart_cache import ChartCache
+import chart_engine
+from chart_engine import ChartEngine
+from scheduler import Scheduler
+from settings_store import SettingsStore
+
+# (okres, interwał) zapytań /review
+REVIEWS = [('1y', '1d'), ('2y', '1d'), ('5y', '1wk'), ('6mo', '1d'), ('1mo', '30m'), ('5d', '5m'), ('1d', '1m')]
+BUTTONS = ['settings', 'cb_mode', 'cb_image', 'light', 'dark', 'darkblue', 'album', 'atr', 'macd']
+PERCENTILES = (50, 95, 99)
+
+# wynik obsługiwanej aktualizacji - ustawiany w zadaniu aktualizacji, widoczny w wywołaniach API z niego
+_outcome: ContextVar[dict] = ContextVar('outcome')
+
+
+class StubRequest(BaseRequest):
+    """
+    Atrapa API Telegrama - odpowiada na zapytania bota po zadanym czasie, zamiast łączyć się z serwerem.
+    """
+
+    def __init__(self, latency: float):
+        """
+        :param latency: float - czas odpowiedzi (s)
+        """
+        self.latency = latency
+        self.uploaded = 0
+        self.calls: dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _message(self, chat_id: int, **fields) -> dict:
+        message_id = next(self._ids)
+        return {'message_id': message_id, 'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'},
+                **fields}
+
+    def _photo(self, chat_id: int) -> dict:
+        message = self._message(chat_id)
+        message['photo'] = [{'file_id': f'photo-{message["message_id"]}', 'file_unique_id': str(message['message_id']),
+                             'width': 1000, 'height': 800}]
+        return message
+
+    async def do_request(self, url: str, method: str, request_data: RequestData | None = None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None) -> tuple[int, bytes]:
+        await asyncio.sleep(self.latency)
+        api = url.rsplit('/', 1)[-1]
+        self.calls[api] = self.calls.get(api, 0) + 1
+        params = request_data.parameters if request_data is not None else {}
+        if request_data is not None and request_data.multipart_data:
+            self.uploaded += sum(len(part[1]) for part in request_data.multipart_data.values())
+        chat_id = params.get('chat_id', 0)
+
+        match api:
+            case 'getMe':
+                result = {'id': 1, 'is_bot': True, 'first_name': 'loadtest', 'username': 'loadtest_bot'}
+            case 'sendPhoto':
+                result = self._photo(chat_id)
+            case 'sendMediaGroup':
+                result = [self._photo(chat_id) for _ in params.get('media', [])]
+            case 'sendMessage' | 'editMessageText':
+                result = self._message(chat_id, text=params.get('text', ''))
+            case _:
+                result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+def command_update(update_id: int, chat: int, text: str) -> dict:
+    user = {'id': chat, 'is_bot': False, 'first_name': 'loadtest'}
+    command = text.split(' ')[0]
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': int(time.time()), 'chat': {'id': chat, 'type': 'private'}, 'from': user,
+        'text': text, 'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]}}
+
+
+def button_update(update_id: int, chat: int, data: str) -> dict:
+    user = {'id': chat, 'is_bot': False, 'first_name': 'loadtest'}
+    message = {'message_id': update_id, 'date': int(time.time()), 'chat': {'id': chat, 'type': 'private'},
+               'text': 'Ustawienia'}
+    return {'update_id': update_id, 'callback_query': {'id': str(update_id), 'from': user, 'chat_instance': str(chat),
+                                                       'data': data, 'message': message}}
+
+
+def random_update(rng: random.Random, update_id: int, kind: str, chats: int, symbols: int) -> dict:
+    """
+    Funkcja tworzy losową aktualizację danego rodzaju.
+    :param rng: Random - generator liczb losowych
+    :param update_id: int - numer aktualizacji
+    :param kind: str - review, rate lub button
+    :param chats: int - liczba chatów
+    :param symbols: int - liczba symboli
+    :return: dict - aktualizacja w formacie API Telegrama
+    """
+    chat = rng.randrange(chats) + 1
+    symbol = f'SYM{rng.randrange(symbols)}'
+    match kind:
+        case 'review':
+            period, interval = rng.choice(REVIEWS)
+            return command_update(update_id, chat, f'/review {symbol} {period} {interval}')
+        case 'rate':
+            return command_update(update_id, chat, f'/rate {symbol}')
+        case _:
+            return button_update(update_id, chat, rng.choice(BUTTONS))
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """
+    Funkcja zamienia opis proporcji rodzajów aktualizacji (np. review=5,rate=3,button=2) na wagi.
+    :param mix: str
+    :return: dict rodzaj -> waga
+    """
+    weights = {}
+    for part in mix.split(','):
+        kind, weight = part.split('=')
+        if kind not in ('review', 'rate', 'button'):
+            raise ValueError(f'Nieznany rodzaj aktualizacji: {kind}')
+        weights[kind] = float(weight)
+    return weights
+
+
+def setup(args: argparse.Namespace, request: StubRequest):
+    """
+    Funkcja przygotowuje bota - tak jak bot.py, ale z danymi z dostawcy replay i atrapą API Telegrama.
+    :param args: argumenty wiersza poleceń
+    :param request: StubRequest
+    :return: Application
+    """
+    data_provider.provider = data_provider.ReplayProvider(args.data or tempfile.mkdtemp(), args.data_latency)
+    database = os.path.join(tempfile.mkdtemp(prefix='loadtest-'), 'settings.db')
+    with open('config.yml', 'r') as file:
+        bot.settings_store = SettingsStore(yaml.safe_load(file), database)
+    bot.alert_store = alerts.AlertStore(database)
+    bot.watchlists = screener.load_watchlists()
+    bot.chart_engine = ChartEngine(args.workers)
+    bot.chart_cache = ChartCache()
+    bot.scheduler = Scheduler()
+
+    # odrzucenie zapytania (pełna kolejka) jest zapisywane w wyniku aktualizacji
+    busy = bot.busy
+
+    async def counted_busy(context, chat):
+        _outcome.get()['busy'] = True
+        await busy(context, chat)
+
+    bot.busy = counted_busy
+    return bot.build_application('0:loadtest', request)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """
+    Funkcja wykonuje test obciążeniowy.
+    :param args: argumenty wiersza poleceń
+    :return: dict z wynikami
+    """
+    request = StubRequest(args.api_latency)
+    application = setup(args, request)
+    weights = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    results: list[tuple[str, float, bool]] = []
+
+    async def handle(kind: str, update: Update, arrival: float) -> None:
+        _outcome.set({'busy': False})
+        await application.process_update(update)
+        results.append((kind, time.perf_counter() - arrival, _outcome.get()['busy']))
+
+    async with application:
+        # procesy rysujące i biblioteki są ładowane przed pomiarem
+        await bot.preload()
+
+        started = time.perf_counter()
+        tasks = []
+        arrival = started
+        for update_id in itertools.count(1):
+            arrival += rng.expovariate(args.rate)
+            if arrival - started > args.duration:
+                break
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+
+            kind = rng.choices(list(weights), list(weights.values()))[0]
+            update = Update.de_json(random_update(rng, update_id, kind, args.chats, args.symbols), application.bot)
+            tasks.append(asyncio.create_task(handle(kind, update, arrival)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    bot.chart_engine.shutdown()
+    return summarize(results, elapsed, request)
+
+
+def summarize(results: list[tuple[str, float, bool]], elapsed: float, request: StubRequest) -> dict:
+    """
+    Funkcja wyznacza przepustowość i percentyle czasów obsługi.
+    :param results: lista (rodzaj, czas obsługi, odrzucone)
+    :param elapsed: float - czas testu (s)
+    :param request: StubRequest
+    :return: dict
+    """
+    summary = {'elapsed_s': round(elapsed, 2), 'updates': len(results),
+               'throughput_per_s': round(len(results) / elapsed, 3) if elapsed else 0.0,
+               'rejected': sum(busy for _, _, busy in results), 'api_calls': request.calls,
+               'uploaded_mb': round(request.uploaded / 2 ** 20, 2), 'kinds': {}}
+
+    for kind in sorted({kind for kind, _, _ in results}):
+        times = np.array([seconds for k, seconds, busy in results if k == kind and not busy])
+        row = {'count': sum(k == kind for k, _, _ in results),
+               'rejected': sum(busy for k, _, busy in results if k == kind)}
+        if len(times):
+            row.update({f'p{p}_s': round(float(np.percentile(times, p)), 3) for p in PERCENTILES})
+        summary['kinds'][kind] = row
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    print(f'{summary["updates"]} aktualizacji w {summary["elapsed_s"]} s - {summary["throughput_per_s"]}/s, '
+          f'odrzucone: {summary["rejected"]}, wysłane obrazy: {summary["uploaded_mb"]} MB')
+    print(f'{"rodzaj":<8} {"liczba":>7} {"odrzuc.":>7} ' + ' '.join(f'{"p" + str(p) + " [s]":>9}' for p in PERCENTILES))
+    for kind, row in summary['kinds'].items():
+        times = ' '.join(f'{row.get(f"p{p}_s", float("nan")):>9.3f}' for p in PERCENTILES)
+        print(f'{kind:<8} {row["count"]:>7} {row["rejected"]:>7} {times}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Test obciążeniowy bota (bez sieci).')
+    parser.add_argument('--rate', type=float, default=1.0, help='średnia liczba aktualizacji na sekundę')
+    parser.add_argument('--duration', type=float, default=30.0, help='czas wysyłania aktualizacji (s)')
+    parser.add_argument('--chats', type=int, default=20, help='liczba chatów')
+    parser.add_argument('--symbols', type=int, default=30, help='liczba symboli')
+    parser.add_argument('--mix', default='review=5,rate=3,button=2', help='proporcje rodzajów aktualizacji')
+    parser.add_argument('--data', help='katalog z danymi (jak REPLAY_DIR), domyślnie dane syntetyczne')
+    parser.add_argument('--data-latency', type=float, default=0.3, help='czas pobrania danych (s)')
+    parser.add_argument('--api-latency', type=float, default=0.05, help='czas odpowiedzi API Telegrama (s)')
+    parser.add_argument('--workers', type=int, default=chart_engine.CHART_WORKERS, help='liczba procesów rysujących')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='wynik w formacie JSON')
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == '__main__':
+    main()
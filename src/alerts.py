@@ -0,0 +1,432 @@
+"""
+Alerty - powiadomienia o spełnieniu warunku wskaźnika (/alert). Wszystkie subskrypcje są sprawdzane cyklicznie
+w jednym przebiegu: są grupowane według symbolu i interwału danych, a dane są pobierane paczkami symboli (jak
+w skanerze). Wskaźniki symbolu są przechowywane jako stan strumieniowy (indicator_stream.IndicatorState) - jeden dla
+każdego zestawu ustawień, niezależnie od liczby chatów, które go obserwują - zapisywany w bazie razem z alertami.
+Przebieg dodaje do stanu tylko nowe świece, zamiast liczyć wskaźniki na całej historii. Alert jest wysyłany tylko
+przy zmianie stanu warunku (a nie w każdym przebiegu, w którym jest spełniony).
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Hashable
+from typing import NamedTuple
+
+import pandas as pd
+
+import fetch_window
+import indicator_stream
+import resample
+import screener
+from indicator_stream import IndicatorState
+from settings_store import SETTINGS_DB
+
+# odstęp (s) między przebiegami
+ALERT_INTERVAL = int(os.environ.get('ALERT_INTERVAL', 900))
+ALERTS_PER_CHAT = int(os.environ.get('ALERTS_PER_CHAT', 20))
+
+# interwał alertu -> okres analizy
+ALERT_INTERVALS = {'60m': '1mo', '1d': '1y', '1wk': '2y'}
+# domyślny próg oceny spółki
+RATING_THRESHOLD = 7
+
+logger = logging.getLogger(__name__)
+
+
+class Alert(NamedTuple):
+    id: int
+    chat: int
+    symbol: str
+    interval: str
+    condition: str
+    threshold: float | None = None
+    # ostatni stan warunku, None - jeszcze nie sprawdzony
+    state: Hashable = None
+
+
+# klucz stanu wskaźników: (symbol, interwał świec, ustawienia wskaźników z indicator_stream.config_key)
+StateKey = tuple[str, str, str]
+
+
+class Condition(NamedTuple):
+    # funkcja zwracająca stan warunku dla stanu wskaźników w interwale alertu i stanu tygodniowego; None - za mało
+    # danych
+    check: Callable[[IndicatorState, IndicatorState | None, float | None], Hashable]
+    # True - alert, gdy warunek zaczyna być spełniony; False - alert przy każdej zmianie stanu
+    edge: bool
+    description: str
+    # czy warunek wymaga stanu wskaźników świec tygodniowych
+    weekly: bool = False
+
+
+def rsi_low(state: IndicatorState, weekly: IndicatorState | None = None, threshold: float | None = None) \
+        -> bool | None:
+    """
+    Funkcja sprawdza, czy RSI jest poniżej dolnej linii (średnia - odchylenie z ostatnich 182 dni, jak w ocenie).
+    :param state: IndicatorState - stan wskaźników
+    :param weekly: nieużywany
+    :param threshold: nieużywany
+    :return: bool
+    """
+    level = state.rsi_level()
+    return None if level is None else level == 2
+
+
+def adx_cross(state: IndicatorState, weekly: IndicatorState | None = None, threshold: float | None = None) \
+        -> bool | None:
+    """
+    Funkcja sprawdza, czy ADX przeciął linię +DI lub -DI na ostatniej świecy.
+    :param state: IndicatorState - stan wskaźników
+    :param weekly: nieużywany
+    :param threshold: nieużywany
+    :return: bool
+    """
+    return state.adx_cross()
+
+
+def impulse_state(state: IndicatorState, weekly: IndicatorState | None = None, threshold: float | None = None) \
+        -> int | None:
+    """
+    Funkcja zwraca punkty sygnału impulse - ich zmiana oznacza zmianę sygnału.
+    :param state: IndicatorState - stan wskaźników
+    :param weekly: nieużywany
+    :param threshold: nieużywany
+    :return: ilość punktów
+    """
+    return state.impulse_signal()
+
+
+def rating_above(state: IndicatorState, weekly: IndicatorState | None = None, threshold: float | None = None) \
+        -> bool:
+    """
+    Funkcja sprawdza, czy ocena spółki (jak w /rate) osiąga próg.
+    :param state: IndicatorState - stan wskaźników danych dziennych
+    :param weekly: IndicatorState - stan wskaźników świec tygodniowych
+    :param threshold: float - próg oceny
+    :return: bool
+    """
+    points = indicator_stream.rating(state, weekly)
+    return sum(p or 0 for p in points.values()) >= (RATING_THRESHOLD if threshold is None else threshold)
+
+
+CONDITIONS = {
+    'rsi': Condition(rsi_low, True, 'RSI poniżej dolnej linii'),
+    'adx': Condition(adx_cross, True, 'ADX przeciął linię kierunkową'),
+    'impulse': Condition(impulse_state, False, 'zmiana sygnału impulse'),
+    'rating': Condition(rating_above, True, 'ocena spółki co najmniej {threshold:g}', weekly=True),
+}
+
+
+def data_interval(alert: Alert) -> str:
+    """
+    Funkcja zwraca interwał pobieranych danych - świece tygodniowe są wyznaczane z dziennych.
+    :param alert: Alert
+    :return: str
+    """
+    return '1d' if alert.interval in resample.RULES else alert.interval
+
+
+def data_start(alert: Alert, config: dict) -> pd.Timestamp:
+    """
+    Funkcja wyznacza początek danych potrzebnych do sprawdzenia alertu (okres analizy wraz z rozgrzewką). Warunki
+    korzystające ze świec tygodniowych mają rozgrzewkę liczoną w tygodniach, jak w /rate.
+    :param alert: Alert
+    :param config: dict - ustawienia wskaźników
+    :return: Timestamp
+    """
+    interval = '1wk' if CONDITIONS[alert.condition].weekly else alert.interval
+    start = fetch_window.fetch_start(interval, ALERT_INTERVALS[alert.interval], config)
+    return resample.period_start(interval, start) if interval in resample.RULES else start
+
+
+def describe(alert: Alert) -> str:
+    """
+    Funkcja zwraca opis alertu.
+    :param alert: Alert
+    :return: str
+    """
+    description = CONDITIONS[alert.condition].description.format(threshold=alert.threshold or 0)
+    return f'*{alert.symbol}* ({alert.interval}): {description}'
+
+
+def fired(alert: Alert, state: Hashable) -> bool:
+    """
+    Funkcja sprawdza, czy nowy stan warunku oznacza wysłanie alertu.
+    :param alert: Alert - z poprzednim stanem
+    :param state: nowy stan
+    :return: bool
+    """
+    if CONDITIONS[alert.condition].edge:
+        return state is True and alert.state is not True
+    return alert.state is not None and state is not None and state != alert.state
+
+
+class PassResult(NamedTuple):
+    # id alertu -> nowy stan
+    states: dict[int, Hashable]
+    # alerty do wysłania (z poprzednim stanem) wraz z nowym stanem
+    fired: list[tuple[Alert, Hashable]]
+    # symbole bez danych
+    missing: list[str]
+    # stany wskaźników użyte w przebiegu
+    indicator_states: dict[StateKey, IndicatorState] = {}
+    # klucze stanów wskaźników zmienionych w przebiegu
+    changed: set[StateKey] = set()
+
+
+def bars(data: pd.DataFrame, interval: str, since: str | None = None) -> pd.DataFrame:
+    """
+    Funkcja zwraca świece w interwale stanu wskaźników - tygodniowe są wyznaczane z pobranych danych.
+    :param data: DataFrame - pobrane dane
+    :param interval: str - interwał świec
+    :param since: str - data ostatniej świecy stanu (ISO), None - wszystkie dane
+    :return: DataFrame
+    """
+    if since is not None:
+        data = data.loc[pd.Timestamp(since):]
+    return resample.resample_ohlcv(data, interval) if interval in resample.RULES else data
+
+
+def indicator_state(state: IndicatorState | None, data: pd.DataFrame, interval: str, config: dict) \
+        -> IndicatorState:
+    """
+    Funkcja dodaje do stanu wskaźników nowe świece - stan jest budowany od nowa, jeżeli go brak lub dane nie
+    zawierają jego ostatniej świecy.
+    :param state: IndicatorState - stan z poprzedniego przebiegu lub None
+    :param data: DataFrame - pobrane dane
+    :param interval: str - interwał świec stanu
+    :param config: dict - ustawienia wskaźników
+    :return: IndicatorState
+    """
+    if state is not None and state.advance(bars(data, interval, state.timestamp)):
+        return state
+    return IndicatorState.seed(bars(data, interval), config)
+
+
+def evaluate(alerts: list[Alert], settings: Callable[[int], dict],
+             indicator_states: dict[StateKey, IndicatorState] | None = None,
+             batch_size: int = screener.SCAN_BATCH_SIZE) -> PassResult:
+    """
+    Funkcja sprawdza wszystkie alerty w jednym przebiegu.
+    :param alerts: list - alerty
+    :param settings: funkcja zwracająca ustawienia chatu
+    :param indicator_states: dict - stany wskaźników z poprzedniego przebiegu (są aktualizowane w miejscu)
+    :param batch_size: int - liczba symboli w jednym zapytaniu do Yahoo
+    :return: PassResult
+    """
+    previous = indicator_states if indicator_states is not None else {}
+    # interwał danych -> symbol -> alerty
+    groups: dict[str, dict[str, list[Alert]]] = defaultdict(lambda: defaultdict(list))
+    for alert in alerts:
+        groups[data_interval(alert)][alert.symbol].append(alert)
+
+    states, fired_alerts, missing = {}, [], []
+    used: dict[StateKey, IndicatorState] = {}
+    changed: set[StateKey] = set()
+    for interval, by_symbol in groups.items():
+        # zakres danych wystarczający dla wszystkich ustawień chatów
+        start = min(data_start(alert, settings(alert.chat)) for group in by_symbol.values()
+                    for alert in group)
+        symbols = list(by_symbol)
+
+        for i in range(0, len(symbols), batch_size):
+            batch = symbols[i:i + batch_size]
+            data = screener.load_batch(batch, interval, start)
+
+            for symbol in batch:
+                if symbol not in data:
+                    missing.append(symbol)
+                    continue
+
+                def state_for(bar_interval: str, config: dict) -> IndicatorState:
+                    # stan wskaźników symbolu - raz dla każdego interwału świec i zestawu ustawień
+                    key = (symbol, bar_interval, indicator_stream.config_key(config))
+                    if key not in used:
+                        state = previous.get(key)
+                        last_bar = None if state is None else (state.timestamp, state.close)
+                        used[key] = indicator_state(state, data[symbol], bar_interval, config)
+                        if (used[key].timestamp, used[key].close) != last_bar:
+                            changed.add(key)
+                    return used[key]
+
+                for alert in by_symbol[symbol]:
+                    config = settings(alert.chat)
+                    condition = CONDITIONS[alert.condition]
+                    try:
+                        current = state_for(alert.interval, config)
+                        weekly = state_for('1wk', config) if condition.weekly else None
+                    except (ValueError, IndexError, KeyError):
+                        continue
+
+                    state = condition.check(current, weekly, alert.threshold)
+                    if state is None:
+                        continue
+                    if state != alert.state:
+                        states[alert.id] = state
+                    if fired(alert, state):
+                        fired_alerts.append((alert, state))
+
+    # stany niepotrzebne już żadnemu alertowi są usuwane (symbole bez danych zachowują stan do kolejnego przebiegu)
+    used.update({key: state for key, state in previous.items() if key[0] in missing and key not in used})
+    previous.clear()
+    previous.update(used)
+    return PassResult(states, fired_alerts, missing, used, changed)
+
+
+class AlertStore:
+    """
+    Klasa przechowuje alerty wszystkich chatów w pamięci i w bazie SQLite (tej samej co ustawienia).
+    """
+
+    def __init__(self, path: str = SETTINGS_DB):
+        """
+        :param path: str - ścieżka do bazy SQLite
+        """
+        self.path = path
+        self._alerts: dict[int, Alert] = {}
+        # stany wskaźników obserwowanych symboli - przekazywane do kolejnych przebiegów
+        self.indicator_states: dict[StateKey, IndicatorState] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute('CREATE TABLE IF NOT EXISTS alerts (id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL, '
+                           'symbol TEXT NOT NULL, interval TEXT NOT NULL, condition TEXT NOT NULL, threshold REAL, '
+                           'state TEXT)')
+        connection.execute('CREATE TABLE IF NOT EXISTS alert_states (symbol TEXT NOT NULL, interval TEXT NOT NULL, '
+                           'config TEXT NOT NULL, state TEXT NOT NULL, PRIMARY KEY (symbol, interval, config))')
+        return connection
+
+    def _load(self) -> None:
+        with contextlib.closing(self._connect()) as connection, connection:
+            rows = connection.execute('SELECT id, chat_id, symbol, interval, condition, threshold, state '
+                                      'FROM alerts').fetchall()
+            state_rows = connection.execute('SELECT symbol, interval, config, state FROM alert_states').fetchall()
+
+        for *fields, state in rows:
+            if fields[4] in CONDITIONS:
+                self._alerts[fields[0]] = Alert(*fields, json.loads(state) if state is not None else None)
+        for *key, state in state_rows:
+            self.indicator_states[tuple(key)] = IndicatorState.from_dict(json.loads(state))
+
+    def add(self, chat: int, symbol: str, interval: str, condition: str, threshold: float | None = None) -> Alert:
+        """
+        Metoda dodaje alert.
+        :param chat: int - ID chatu
+        :param symbol: str - symbol giełdowy
+        :param interval: str - jednostka czasu
+        :param condition: str - nazwa warunku z CONDITIONS
+        :param threshold: float - próg warunku
+        :return: Alert
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            with contextlib.closing(self._connect()) as connection, connection:
+                cursor = connection.execute('INSERT INTO alerts (chat_id, symbol, interval, condition, threshold) '
+                                            'VALUES (?, ?, ?, ?, ?)', (chat, symbol, interval, condition, threshold))
+            alert = self._alerts[cursor.lastrowid] = Alert(cursor.lastrowid, chat, symbol, interval, condition,
+                                                           threshold)
+        return alert
+
+    def remove(self, chat: int, alert_id: int) -> bool:
+        """
+        Metoda usuwa alert chatu.
+        :param chat: int - ID chatu
+        :param alert_id: int - ID alertu
+        :return: bool - czy alert istniał
+        """
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None or alert.chat != chat:
+                return False
+
+            with contextlib.closing(self._connect()) as connection, connection:
+                connection.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
+            del self._alerts[alert_id]
+        return True
+
+    def for_chat(self, chat: int) -> list[Alert]:
+        """
+        Metoda zwraca alerty chatu.
+        :param chat: int - ID chatu
+        :return: list
+        """
+        with self._lock:
+            return [alert for alert in self._alerts.values() if alert.chat == chat]
+
+    def all(self) -> list[Alert]:
+        """
+        Metoda zwraca wszystkie alerty.
+        :return: list
+        """
+        with self._lock:
+            return list(self._alerts.values())
+
+    def update_states(self, states: dict[int, Hashable]) -> None:
+        """
+        Metoda zapisuje nowe stany warunków (jedną transakcją) - po ponownym uruchomieniu bota alerty, które były
+        już spełnione, nie są wysyłane ponownie.
+        :param states: dict - id alertu -> stan
+        :return: None
+        """
+        with self._lock:
+            rows = []
+            for alert_id, state in states.items():
+                # alert mógł zostać usunięty w trakcie przebiegu
+                if alert_id in self._alerts:
+                    self._alerts[alert_id] = self._alerts[alert_id]._replace(state=state)
+                    rows.append((json.dumps(state), alert_id))
+            if not rows:
+                return
+
+            try:
+                with contextlib.closing(self._connect()) as connection, connection:
+                    connection.executemany('UPDATE alerts SET state = ? WHERE id = ?', rows)
+            except sqlite3.Error:
+                logger.exception('Nie udało się zapisać stanu alertów')
+
+    def save_indicator_states(self, changed: set[StateKey]) -> None:
+        """
+        Metoda zapisuje zmienione stany wskaźników (jedną transakcją) i usuwa stany, których nie używa już żaden
+        alert - po ponownym uruchomieniu bota przebieg nie musi liczyć wskaźników od nowa.
+        :param changed: set - klucze stanów zmienionych w przebiegu
+        :return: None
+        """
+        with self._lock:
+            rows = [(*key, json.dumps(self.indicator_states[key].to_dict())) for key in changed
+                    if key in self.indicator_states]
+            keys = list(self.indicator_states)
+
+        try:
+            with contextlib.closing(self._connect()) as connection, connection:
+                stored = connection.execute('SELECT symbol, interval, config FROM alert_states').fetchall()
+                unused = set(stored) - set(keys)
+                connection.executemany('DELETE FROM alert_states WHERE symbol = ? AND interval = ? AND config = ?',
+                                       unused)
+                connection.executemany('INSERT OR REPLACE INTO alert_states (symbol, interval, config, state) '
+                                       'VALUES (?, ?, ?, ?)', rows)
+        except sqlite3.Error:
+            logger.exception('Nie udało się zapisać stanu wskaźników alertów')
+
+
+def run_pass(store: AlertStore, settings: Callable[[int], dict]) -> PassResult:
+    """
+    Funkcja sprawdza wszystkie alerty i zapisuje nowe stany.
+    :param store: AlertStore
+    :param settings: funkcja zwracająca ustawienia chatu
+    :return: PassResult
+    """
+    started = time.perf_counter()
+    alerts = store.all()
+    result = evaluate(alerts, settings, store.indicator_states)
+    store.update_states(result.states)
+    store.save_indicator_states(result.changed)
+    logger.info('Alerty: %d sprawdzonych, %d do wysłania, %.2f s', len(alerts), len(result.fired),
+                time.perf_counter() - started)
+    return result
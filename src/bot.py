@@ -1,17 +1,61 @@
+import time
+
+# początek startu - czasy importów i gotowości bota są liczone od tej chwili
+STARTED = time.perf_counter()
+
+import asyncio
+import json
 import logging
 import os
-from datetime import datetime
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-import yfinance as yf
+import pandas as pd
 from dotenv import load_dotenv
-from telegram import Update
+from telegram import InputMediaPhoto, Update
 from telegram.constants import ParseMode
-from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters, CallbackQueryHandler
-
+from telegram.ext import (AIORateLimiter, Application, ApplicationBuilder, ContextTypes, CommandHandler,
+                          MessageHandler, filters, CallbackQueryHandler)
+from telegram.request import BaseRequest
+
+import alerts
+import data_provider
+import fetch_window
+import indicator_stream
+import market_hours
+import metrics
+import ohlcv_cache
+import ohlcv_frame
+import prewarm
+import resample
+import screener
 from markups import *
-from stock_analysis import year_cycle_graph, rsi_so_price, adx, macd, price_atr_ad, moving_averages
+from chart_cache import ChartCache, chart_key
+from chart_engine import ChartEngine
+from scheduler import Busy, Scheduler
+from indicators import IndicatorFrame
+from settings_store import SettingsStore
+from single_flight import SingleFlight
 from stock_rate import *
 
+IMPORTED = time.perf_counter()
+
+fetch_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('FETCH_WORKERS', 4)), thread_name_prefix='fetch')
+fetch_flights = SingleFlight()
+# skany korzystają z jednego wątku naraz - kolejne czekają, zamiast mnożyć równoległe paczki zapytań do Yahoo
+scan_lock = asyncio.Lock()
+# liczniki zapytań - najczęstsze są odświeżane w tle (prewarm_job)
+popularity = prewarm.Popularity()
+# ostatnie oceny spółek (rate_conditions)
+RATINGS_SIZE = 256
+ratings: OrderedDict[tuple, dict[str, int]] = OrderedDict()
+# okresy wskaźników - przycisk ustawienia oczekuje na liczbę w kolejnej wiadomości (settings_manager); pozostałe
+# ustawienia (motyw, format obrazów, album) mają osobne przyciski
+PERIOD_SETTINGS = ('atr_ema_window', 'atr_window', 'ema_short', 'ema_long', 'rsi_window', 'so_window',
+                   'so_smooth_window', 'adx_window', 'macd_fast', 'macd_slow', 'macd_sign')
+
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -27,26 +71,107 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await context.bot.send_message(chat_id=update.effective_chat.id, text=text, parse_mode=ParseMode.MARKDOWN)
 
 
-def download_data(symbol: str, interval: str) -> pd.DataFrame | None:
+def load_data(symbol: str, interval: str, start: pd.Timestamp | None, retention: pd.Timedelta | None) \
+        -> pd.DataFrame | None:
+    """
+    Funkcja zwraca dane z cache na dysku - ze źródła danych (Yahoo) pobierane są tylko świece nowsze od ostatniej
+    zapisanej. Pobrane dane są zapisywane w zwartej postaci (ohlcv_frame.compact).
+    :param symbol: Symbol poddawany analizie.
+    :param interval: Jednostka czasu (interwał pobierany z Yahoo).
+    :param start: Początek wymaganego zakresu, None - pełna historia.
+    :param retention: Zakres przechowywany dla interwałów śróddziennych.
+    :return: DataFrame lub None
+    """
+    cached = ohlcv_cache.load(symbol, interval)
+    if cached is not None and ohlcv_cache.covers(cached, start):
+        if ohlcv_cache.is_fresh(cached.fetched_at, interval, symbol):
+            return ohlcv_cache.since(cached.data, start)
+
+        if len(cached.data) > 1:
+            update = data_provider.provider.download(symbol, start=cached.data.index[-2], interval=interval)
+            # nieudane pobranie (pusta ramka) oznacza pobranie pełnego zakresu poniżej
+            data = None if update.empty else ohlcv_cache.merge(cached.data, ohlcv_frame.compact(update))
+            if data is not None:
+                cached_start = cached.start
+                if retention is not None and data.index[0] < data.index[-1] - retention:
+                    # usunięte świece nie są już w cache - zakres zaczyna się od pierwszej zachowanej
+                    data = data.loc[data.index[-1] - retention:]
+                    cached_start = ohlcv_cache.data_start(data)
+                ohlcv_cache.save(symbol, interval, data, cached_start)
+                return ohlcv_cache.since(data, start)
+
+    if start is None:
+        data = data_provider.provider.download(symbol, period='max', interval=interval)
+    else:
+        data = data_provider.provider.download(symbol, start=start, interval=interval)
+
+    if data.empty:
+        return None
+
+    data = ohlcv_frame.compact(data)
+    ohlcv_cache.save(symbol, interval, data, start)
+    return data
+
+
+def download_data(symbol: str, interval: str, period: str | None = None, config: dict | None = None,
+                  warmup_interval: str | None = None) -> pd.DataFrame | None:
     """
-    Funkcja pobiera dane z Yahoo Finance.
+    Funkcja pobiera dane ze źródła danych (domyślnie Yahoo Finance, data_provider). Jeżeli podano okres i ustawienia
+    wskaźników, pobierany jest tylko okres analizy wydłużony o rozgrzewkę wskaźników (zamiast pełnej historii). Świece
+    tygodniowe i miesięczne są wyznaczane z dziennych, więc wszystkie te interwały korzystają z jednego pobierania.
     :param symbol: Symbol poddawany analizie.
     :param interval: Jednostka czasu.
-    :return: None
+    :param period: Okres analizy, None - pełna historia.
+    :param config: Ustawienia wskaźników (wymagane razem z okresem).
+    :param warmup_interval: Jednostka czasu, dla której liczona jest rozgrzewka (domyślnie interval) - np. '1wk' dla
+                            danych dziennych, z których wyznaczane będą również świece tygodniowe.
+    :return: DataFrame lub None
     """
     match interval:
-        case '1m' | '1d' | '1wk' | '1mo':
-            data = yf.download(symbol, period='max', interval=interval)
-        case '2m' | '5m' | '15m' | '30m':
-            data = yf.download(symbol, start=datetime.now() - pd.Timedelta('59d'), interval=interval)
-        case '60m':
-            data = yf.download(symbol, period='2y', interval=interval)
+        case '1m' | '2m' | '5m' | '15m' | '30m' | '60m':
+            retention = pd.Timedelta(fetch_window.interval_limits[interval])
+            # czas UTC bez strefy - jak początek zakresu w cache i w fetch_window
+            start = pd.Timestamp(datetime.now(timezone.utc)).tz_localize(None) - retention
+        case '1d' | '1wk' | '1mo':
+            retention = start = None
         case _:
             return None
 
-    return None if data.empty else data
+    if period is not None:
+        warmup_interval = warmup_interval or interval
+        start = fetch_window.fetch_start(warmup_interval, period, config)
+        if warmup_interval in resample.RULES:
+            start = resample.period_start(warmup_interval, start)
+
+    if interval not in resample.RULES:
+        return load_data(symbol, interval, start, retention)
 
+    data = load_data(symbol, '1d', start, retention)
+    return None if data is None else resample.resample_ohlcv(data, interval)
 
+
+async def fetch_data(symbol: str, interval: str, period: str | None = None, config: dict | None = None,
+                     warmup_interval: str | None = None) -> pd.DataFrame | None:
+    """
+    Funkcja pobiera dane w puli wątków, nie blokując pętli zdarzeń. Równoczesne zapytania o ten sam symbol, interwał
+    i zakres korzystają z jednego pobierania.
+    :param symbol: Symbol poddawany analizie.
+    :param interval: Jednostka czasu.
+    :param period: Okres analizy, None - pełna historia.
+    :param config: Ustawienia wskaźników (wymagane razem z okresem).
+    :param warmup_interval: Jednostka czasu, dla której liczona jest rozgrzewka (domyślnie interval).
+    :return: DataFrame lub None
+    """
+    warmup = fetch_window.warmup_bars(config) if period is not None else None
+    key = (symbol.upper(), interval, period, warmup, warmup_interval)
+    loop = asyncio.get_running_loop()
+
+    with metrics.span('download', interval=interval):
+        return await fetch_flights.run(key, lambda: loop.run_in_executor(fetch_executor, download_data, symbol,
+                                                                         interval, period, config, warmup_interval))
+
+
+@metrics.timed('review')
 async def params_check(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Funkcja obsługuje sprawdzenie podanych przez użytkownika parametrów.
@@ -103,7 +228,66 @@ async def params_check(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
-    await review(context, chat, symbol, interval, period)
+    try:
+        async with scheduler.slot(chat):
+            await review(context, chat, symbol, interval, period)
+    except Busy:
+        await busy(context, chat)
+
+
+async def busy(context: ContextTypes.DEFAULT_TYPE, chat: int) -> None:
+    """
+    Funkcja informuje, że kolejka zapytań jest pełna.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :param chat: ID chatu.
+    :return: None
+    """
+    err_msg = 'Bot jest teraz zajęty - spróbuj ponownie za chwilę.'
+    await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+
+
+def review_charts(period: str) -> list[tuple[str, dict]]:
+    """
+    Funkcja zwraca wykresy komendy /review wraz z argumentami wysyłki.
+    :param period: Okres danych.
+    :return: lista par (nazwa funkcji rysującej z stock_analysis, argumenty send_photo)
+    """
+    charts = [
+        # wykres slupkowy oraz kanały ATR
+        ('price_atr_ad', dict(caption='Wykres słupkowy cen + kanały ATR + wskaźnik akumulacji/dystrybucji')),
+        # srednie kroczace
+        ('moving_averages', dict(caption='Wykres średnich kroczących')),
+        # RSI/SO/Cena
+        ('rsi_so_price', dict(caption='RSI + Osc. stochastyczny', parse_mode=ParseMode.MARKDOWN)),
+    ]
+
+    # cykle roczne
+    if period in fetch_window.year_cycle_periods:
+        charts.append(('year_cycle_graph', dict(caption='Wykres możliwych cykli rocznych')))
+
+    charts += [
+        # ADX
+        ('adx', dict(caption='ADX - wskaźnik trendu')),
+        # MACD
+        ('macd', dict(caption='Wskaźnik MACD', reply_markup=main_markup)),
+    ]
+
+    return charts
+
+
+def chart_jobs(charts: list[tuple[str, dict]], ind: IndicatorFrame, config: dict, period: str) \
+        -> list[tuple[str, dict]]:
+    """
+    Funkcja tworzy zadania rysowania wykresów.
+    :param charts: Wykresy z review_charts.
+    :param ind: Wskaźniki danych.
+    :param config: Ustawienia chatu.
+    :param period: Okres danych.
+    :return: lista par (nazwa funkcji rysującej z stock_analysis, argumenty)
+    """
+    start_date = ind.data.index[-1] - pd.Timedelta(fetch_window.periods_timedeltas.get(period))
+    mode = modes[config['mode']]
+    return [(chart, dict(ind=ind, mode=mode, start=start_date)) for chart, _ in charts]
 
 
 async def review(context: ContextTypes.DEFAULT_TYPE, chat: int,  symbol: str, interval: str, period: str) -> None:
@@ -116,59 +300,62 @@ async def review(context: ContextTypes.DEFAULT_TYPE, chat: int,  symbol: str, in
     :param period: Okres danych do pobrania.
     :return: None
     """
-    periods_timedeltas = {k: f'{v}d' for k, v in [('1d', 1), ('5d', 5), ('1mo', 30), ('6mo', 182), ('1y', 365),
-                                                  ('2y', 730), ('5y', 1826), ('10y', 3652)]}
-
-    data = download_data(symbol, interval)
+    config = settings_store.get(chat)
+    data = await fetch_data(symbol, interval, period, config)
 
     if data is None:
         err_msg = f"Błąd - Brak danych o *{symbol}*. Upewnij się, że podajesz istniejący symbol giełdowy."
         await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
-    start_date = data.index[-1] - pd.Timedelta(periods_timedeltas.get(period))
-
-    # wykres slupkowy oraz kanały ATR
-    try:
-        chart = price_atr_ad(data=data, mode=mode, start=start_date, atr_window=config['atr_window'],
-                             atr_ema_window=config['atr_ema_window'])
+    popularity.record(prewarm.REVIEW, symbol, interval, period)
+    charts = review_charts(period)
 
-        await context.bot.send_photo(chat_id=chat, photo=chart,
-                                     caption='Wykres słupkowy cen + kanały ATR + wskaźnik akumulacji/dystrybucji')
+    key = chart_key(symbol, interval, period, config, (data.index[-1], *data.iloc[-1]))
+    cached = chart_cache.get(key)
 
-        # srednie kroczace
-        chart = moving_averages(data=data, mode=mode, start=start_date, short_window=config['ema_short'],
-                                long_window=config['ema_long'])
-        await context.bot.send_photo(chat_id=chat, photo=chart,
-                                     caption='Wykres średnich kroczących')
+    pending = None
+    if cached is None:
+        # wykresy są rysowane równolegle, a każdy jest wysyłany, gdy tylko jest gotowy (w kolejności z listy)
+        with metrics.context(interval=interval):
+            pending = chart_engine.submit(chart_jobs(charts, IndicatorFrame(data, config), config, period),
+                                          config['image_format'])
 
-        # RSI/SO/Cena
-        chart = rsi_so_price(data=data, mode=mode, start=start_date, rsi_window=config['rsi_window'],
-                             so_window=config['so_window'], so_smooth_window=config['so_smooth_window'])
-        await context.bot.send_photo(chat_id=chat, photo=chart, caption='RSI + Osc. stochastyczny',
-                                     parse_mode=ParseMode.MARKDOWN)
+    async def photo(i: int) -> bytes | str:
+        if pending is None:
+            return cached[i].photo
+        return (await pending[i]).getvalue()
 
-        # cykle roczne
-        if period in ['5y', '10y']:
-            chart = year_cycle_graph(data=data, mode=mode, start=start_date)
-            await context.bot.send_photo(chat_id=chat, photo=chart,
-                                         caption='Wykres możliwych cykli rocznych')
-
-        # ADX
-        chart = adx(data=data, mode=mode, start=start_date, adx_window=config['adx_window'])
-        await context.bot.send_photo(chat_id=chat, photo=chart, caption='ADX - wskaźnik trendu')
-
-        # MACD
-        chart = macd(data=data, mode=mode, start=start_date, macd_slow=config['macd_slow'],
-                     macd_fast=config['macd_fast'], macd_sign=config['macd_sign'])
-        await context.bot.send_photo(chat_id=chat, photo=chart, caption='Wskaźnik MACD',
-                                     reply_markup=main_markup)
+    try:
+        if config['album']:
+            photos = [await photo(i) for i in range(len(charts))]
+            media = [InputMediaPhoto(p, caption=send_kwargs['caption'], parse_mode=send_kwargs.get('parse_mode'))
+                     for p, (_, send_kwargs) in zip(photos, charts)]
+            with metrics.span('upload', interval=interval, chart='album'):
+                messages = await context.bot.send_media_group(chat_id=chat, media=media)
+            # album nie może mieć przycisków
+            await context.bot.send_message(chat_id=chat, text='*Ustawienia wykresów*', parse_mode=ParseMode.MARKDOWN,
+                                           reply_markup=main_markup)
+        else:
+            photos, messages = [], []
+            for i, (chart, send_kwargs) in enumerate(charts):
+                photos.append(await photo(i))
+                with metrics.span('upload', interval=interval, chart=chart):
+                    messages.append(await context.bot.send_photo(chat_id=chat, photo=photos[-1], **send_kwargs))
     except (ValueError, IndexError):
+        for future in pending or []:
+            future.cancel()
         err_msg = f"Błąd - brak wystarczających danych o *{symbol}*"
         await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
+    if pending is not None:
+        chart_cache.put(key, photos)
+    for i, message in enumerate(messages):
+        chart_cache.set_file_id(key, i, message.photo[-1].file_id)
+
 
+@metrics.timed('rate')
 async def rate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat = update.effective_chat.id
 
@@ -179,26 +366,57 @@ async def rate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
-    data_d = download_data(symbol, interval='1d')
-    data_w = download_data(symbol, interval='1wk')
+    try:
+        async with scheduler.slot(chat):
+            await rate_symbol(context, chat, symbol)
+    except Busy:
+        await busy(context, chat)
+
+
+def rate_conditions(symbol: str, data_d: pd.DataFrame, config: dict) -> dict[str, int]:
+    """
+    Funkcja wyznacza warunki oceny spółki. Wyniki dla ostatnich danych są przechowywane (ratings), więc /rate po
+    odświeżeniu danych w tle (prewarm_job) nie liczy wskaźników ponownie.
+    :param symbol: Symbol poddawany analizie.
+    :param data_d: Dane dzienne z fetch_data.
+    :param config: Ustawienia wskaźników.
+    :return: dict warunek -> ilość punktów
+    """
+    key = (symbol.upper(), indicator_stream.config_key(config), str((data_d.index[-1], *data_d.iloc[-1])))
+    if key not in ratings:
+        with metrics.span('indicators', interval='1d'):
+            ind_d = IndicatorFrame(data_d, config)
+            ind_w = IndicatorFrame(resample.resample_ohlcv(data_d, '1wk'), config)
+            ratings[key] = rating(ind_d, ind_w)
+        while len(ratings) > RATINGS_SIZE:
+            ratings.popitem(last=False)
+    ratings.move_to_end(key)
+    return ratings[key]
+
+
+async def rate_symbol(context: ContextTypes.DEFAULT_TYPE, chat: int, symbol: str) -> None:
+    """
+    Funkcja obsługuje wyświetlenie oceny spółki.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :param chat: ID chatu.
+    :param symbol: Symbol poddawany analizie.
+    :return: None
+    """
+    config = settings_store.get(chat)
+
+    # ocena wymaga ostatnich 182 dni (RSI) oraz kilku ostatnich świec pozostałych wskaźników; świece tygodniowe są
+    # wyznaczane z dziennych, więc dane dzienne obejmują rozgrzewkę wskaźników tygodniowych
+    data_d = await fetch_data(symbol, interval='1d', period='1y', config=config, warmup_interval='1wk')
 
-    if data_d is None or data_w is None:
+    if data_d is None:
         err_msg = f"Błąd - Brak danych o *{symbol}*. Upewnij się, że podajesz istniejący symbol giełdowy."
         await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
+    popularity.record(prewarm.RATE, symbol, '1d', '1y')
     try:
-        rate_cond_1 = impulse_signal(data=data_w, ema_short=config['ema_short'], macd_slow=config['macd_slow'],
-                                     macd_fast=config['macd_fast'], macd_sign=config['macd_sign'])
-
-        rate_cond_2 = impulse_signal(data=data_d, ema_short=config['ema_short'], macd_slow=config['macd_slow'],
-                                     macd_fast=config['macd_fast'], macd_sign=config['macd_sign'])
-
-        rate_cond_3 = value_zone(data=data_d, ema_short=config['ema_short'], ema_long=config['ema_long'])
-
-        rate_cond_4 = rsi_level(data=data_d, rsi_window=config['rsi_window'])
-
-        rate_cond_5 = adx_level(data=data_d, adx_window=config['adx_window'])
+        conditions = rate_conditions(symbol, data_d, config)
+        rate_cond_1, rate_cond_2, rate_cond_3, rate_cond_4, rate_cond_5 = conditions.values()
 
         rate_sum = rate_cond_1 + rate_cond_2 + rate_cond_3 + rate_cond_4 + rate_cond_5
     except (ValueError, IndexError):
@@ -213,6 +431,150 @@ async def rate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await context.bot.send_message(chat_id=chat, text=msg, parse_mode=ParseMode.MARKDOWN)
 
 
+@metrics.timed('scan')
+async def scan(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Funkcja obsługuje ranking wielu spółek.
+    :param update: Obiekt klasy Update, który reprezentuje bieżące zdarzenie w Telegramie.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :return: None
+    """
+    chat = update.effective_chat.id
+
+    args = update.message.text.split()[1:]
+    if not args:
+        names = ', '.join(watchlists)
+        err_msg = f"Błąd - podaj symbole lub nazwę listy ({names}). Aby uzyskać więcej pomocy wpisz /help."
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    symbols = screener.resolve_symbols(args, watchlists)
+    if len(symbols) > screener.SCAN_MAX_SYMBOLS:
+        err_msg = f"Błąd - jednorazowo można ocenić maksymalnie {screener.SCAN_MAX_SYMBOLS} spółek."
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    # skan zajmuje miejsce w kolejce zapytań jak /review i /rate - jeden chat nie może zająć bota paczkami symboli
+    try:
+        async with scheduler.slot(chat):
+            await context.bot.send_message(chat_id=chat, text=f"Trwa ocena {len(symbols)} spółek...")
+            async with scan_lock:
+                result = await asyncio.to_thread(screener.scan, symbols, settings_store.get(chat))
+    except Busy:
+        await busy(context, chat)
+        return
+
+    await context.bot.send_message(chat_id=chat, text=screener.format_result(result), parse_mode=ParseMode.MARKDOWN)
+
+
+async def alert_func(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Funkcja obsługuje dodawanie alertów (/alert [symbol] [warunek] [interwał/próg]) i wyświetlanie alertów chatu.
+    :param update: Obiekt klasy Update, który reprezentuje bieżące zdarzenie w Telegramie.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :return: None
+    """
+    chat = update.effective_chat.id
+    args = update.message.text.split()[1:]
+
+    if not args:
+        chat_alerts = alert_store.for_chat(chat)
+        msg = '\n'.join(f'{alert.id}. {alerts.describe(alert)}' for alert in chat_alerts) or 'Brak alertów.'
+        await context.bot.send_message(chat_id=chat, text=f'*Alerty*\n{msg}', parse_mode=ParseMode.MARKDOWN)
+        return
+
+    conditions = ', '.join(alerts.CONDITIONS)
+    if len(args) < 2 or args[1] not in alerts.CONDITIONS:
+        err_msg = f"Błąd - podaj symbol i warunek ({conditions}). Aby uzyskać więcej pomocy wpisz /help."
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    symbol, condition = args[0].upper(), args[1]
+    interval, threshold = '1d', None
+    if condition == 'rating':
+        try:
+            threshold = float(args[2]) if len(args) > 2 else alerts.RATING_THRESHOLD
+        except ValueError:
+            err_msg = 'Błąd - podaj prawidłowy próg oceny.'
+            await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+            return
+    elif len(args) > 2:
+        interval = args[2]
+
+    if interval not in alerts.ALERT_INTERVALS:
+        interval_keys = ', '.join(alerts.ALERT_INTERVALS)
+        err_msg = f"Błąd - dostępne interwały alertów: {interval_keys}"
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    if len(alert_store.for_chat(chat)) >= alerts.ALERTS_PER_CHAT:
+        err_msg = f"Błąd - chat może mieć maksymalnie {alerts.ALERTS_PER_CHAT} alertów."
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    # sprawdzenie symbolu pobiera dane - przez kolejkę zapytań, jak /review i /rate
+    try:
+        async with scheduler.slot(chat):
+            data = await fetch_data(symbol, interval, alerts.ALERT_INTERVALS[interval], settings_store.get(chat))
+    except Busy:
+        await busy(context, chat)
+        return
+
+    if data is None:
+        err_msg = f"Błąd - Brak danych o *{symbol}*. Upewnij się, że podajesz istniejący symbol giełdowy."
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    alert = await asyncio.to_thread(alert_store.add, chat, symbol, interval, condition, threshold)
+    msg = f'Dodano alert {alert.id}. {alerts.describe(alert)}\nUsunięcie: /unalert {alert.id}'
+    await context.bot.send_message(chat_id=chat, text=msg, parse_mode=ParseMode.MARKDOWN)
+
+
+async def unalert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Funkcja obsługuje usuwanie alertu (/unalert [numer]).
+    :param update: Obiekt klasy Update, który reprezentuje bieżące zdarzenie w Telegramie.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :return: None
+    """
+    chat = update.effective_chat.id
+
+    try:
+        alert_id = int(update.message.text.split(" ")[1])
+    except (IndexError, ValueError):
+        err_msg = 'Błąd - podaj numer alertu. Listę alertów wyświetla /alert.'
+        await context.bot.send_message(chat_id=chat, text=err_msg, parse_mode=ParseMode.MARKDOWN)
+        return
+
+    if await asyncio.to_thread(alert_store.remove, chat, alert_id):
+        msg = f'Usunięto alert {alert_id}.'
+    else:
+        msg = f'Błąd - brak alertu o numerze {alert_id}.'
+    await context.bot.send_message(chat_id=chat, text=msg, parse_mode=ParseMode.MARKDOWN)
+
+
+async def alert_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Funkcja (zadanie JobQueue) sprawdza wszystkie alerty i wysyła te, których warunek zmienił stan.
+    :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
+    :return: None
+    """
+    if not alert_store.all():
+        return
+
+    # przebieg pobiera dane paczkami, tak jak skaner - nie działają równocześnie; nie należy do żadnego chatu, więc nie
+    # korzysta z kolejki zapytań (scheduler), a jego częstotliwość ogranicza ALERT_INTERVAL
+    with metrics.context(command='alert'), metrics.span('command'):
+        async with scan_lock:
+            result = await asyncio.to_thread(alerts.run_pass, alert_store, settings_store.get)
+
+    for alert, state in result.fired:
+        msg = f'Alert {alerts.describe(alert)}'
+        if not alerts.CONDITIONS[alert.condition].edge:
+            msg += f' ({alert.state} → {state})'
+        await context.bot.send_message(chat_id=alert.chat, text=msg, parse_mode=ParseMode.MARKDOWN)
+
+
 async def help_func(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Funckja obsługuje pomoc.
@@ -226,7 +588,15 @@ async def help_func(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                  'danych\n\n  *Przykładowe użycie:*\n   /r aapl 5y 1wk - wyświetlenie danych o\n   AAPL z ostatnich 5 '
                  'lat z jednostką osi\n   czasu 1 tydzień.\n\n\n */rate [symbol]*\n\n  *Opis:*\n   Komenda służy do '
                  'wyświetlania oceny\n   spółki o podanym symbolu.\n\n  *Parametry:*\n   _symbol_: Symbol giełdowy\n\n'
-                 '  *Przykładowe użycie:*\n   /rate aapl - wyświetlenie oceny AAPL.\n\n\n */ihelp (/ih) [atr/średnie/'
+                 '  *Przykładowe użycie:*\n   /rate aapl - wyświetlenie oceny AAPL.\n\n\n */scan [lista/symbole]*\n\n'
+                 '  *Opis:*\n   Komenda służy do wyświetlenia\n   rankingu ocen wielu spółek.\n\n  *Parametry:*\n   '
+                 '_lista_: Nazwa listy (wig20, dji)\n   _symbole_: Symbole giełdowe\n\n  *Przykładowe użycie:*\n   '
+                 '/scan wig20 - ranking spółek z WIG20.\n\n\n */alert [symbol] [warunek] [interwał/próg]*\n\n'
+                 '  *Opis:*\n   Komenda służy do dodania alertu,\n   wysyłanego, gdy warunek zacznie\n   być '
+                 'spełniony. Bez parametrów\n   wyświetla alerty chatu.\n\n  *Parametry:*\n   _warunek_: rsi, adx, '
+                 'impulse,\n   rating\n   _interwał_: 60m, 1d, 1wk\n   _próg_: minimalna ocena (rating)\n\n  '
+                 '*Przykładowe użycie:*\n   /alert aapl rsi 1d - alert, gdy RSI\n   AAPL spadnie poniżej dolnej '
+                 'linii.\n   /unalert 3 - usunięcie alertu 3.\n\n\n */ihelp (/ih) [atr/średnie/'
                  'rsi/os/\n                        /adx/macd]*\n\n  *Opis:*\n   Komenda służy do wyświetlenia\n   '
                  'pomocy dotyczącej interpretacji\n   wysyłanych przez bota wykresów i\n   danych.\n\n\n */help (/h)*'
                  '\n\n  *Opis:*\n   Komenda służy do wyświetlenia\n   dostępnych komend.\n\n\n */mode (/m) [light/dark/'
@@ -325,8 +695,6 @@ async def mode_func(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     chat = update.effective_chat.id
 
-    global mode
-
     try:
         desired_mode = update.message.text.split(" ")[1]
     except IndexError:
@@ -335,10 +703,7 @@ async def mode_func(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     if desired_mode in list(modes.keys()):
-        mode = modes[desired_mode]
-        config['mode'] = desired_mode
-        with open('config.yml', 'w') as cfg_file_update:
-            yaml.dump(config, cfg_file_update, default_flow_style=False)
+        settings_store.set(chat, 'mode', desired_mode)
         msg = f'Pomyślnie zmieniono motyw na *{desired_mode}*'
         await context.bot.send_message(chat_id=chat, text=msg, parse_mode=ParseMode.MARKDOWN)
     else:
@@ -355,7 +720,7 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     chat = update.effective_chat.id
     query = update.callback_query
-    global mode, settings_value
+    config = settings_store.get(chat)
 
     match query.data:
         case 'settings':
@@ -367,11 +732,22 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         case 'cb_mode':
             await query.edit_message_text(text='*Wybierz motyw*', parse_mode=ParseMode.MARKDOWN,
                                           reply_markup=modes_markup)
+        case 'cb_image':
+            name = image_format_names[config['image_format']]
+            await query.edit_message_text(text=f'*Wybierz format obrazów*\nObecnie: {name}',
+                                          parse_mode=ParseMode.MARKDOWN, reply_markup=image_markup)
+        case f if f.startswith('image_') and f.removeprefix('image_') in image_format_names:
+            image_format = f.removeprefix('image_')
+            settings_store.set(chat, 'image_format', image_format)
+            msg = f'Pomyślnie zmieniono format obrazów na *{image_format_names[image_format]}*'
+            await query.edit_message_text(text=msg, parse_mode=ParseMode.MARKDOWN)
+        case 'album':
+            album = not config['album']
+            settings_store.set(chat, 'album', album)
+            msg = 'Wykresy będą wysyłane jako album' if album else 'Wykresy będą wysyłane pojedynczo'
+            await query.edit_message_text(text=msg, parse_mode=ParseMode.MARKDOWN)
         case m if m in modes:
-            mode = modes[m]
-            config['mode'] = m
-            with open('config.yml', 'w') as cfg_file_update:
-                yaml.dump(config, cfg_file_update, default_flow_style=False)
+            settings_store.set(chat, 'mode', m)
             msg = f'Pomyślnie zmieniono motyw na *{m}*'
             await query.edit_message_text(text=msg, parse_mode=ParseMode.MARKDOWN)
         case 'atr':
@@ -396,20 +772,23 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             settings_macd = (f'*Ustawienia MACD*\nKrótki okres MACD: {config["macd_fast"]}\nDługi okres MACD: '
                              f'{config["macd_slow"]}\nOkres sygnału MACD: {config["macd_sign"]}')
             await query.edit_message_text(text=settings_macd, parse_mode=ParseMode.MARKDOWN, reply_markup=macd_markup)
-        case sv if sv in config:
-            manage_handlers(remove=True)
-            settings_value = sv
+        case sv if sv in PERIOD_SETTINGS:
+            # kolejna wiadomość tekstowa w tym chacie jest nową wartością ustawienia
+            context.chat_data['settings_value'] = sv
             await query.edit_message_text(text='Podaj okres')
 
 
 async def settings_manager(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Funkcja obsługuje zmianę ustawień w configu.
+    Funkcja obsługuje zmianę ustawień chatu - wiadomość jest brana pod uwagę tylko, jeżeli chat czeka na podanie
+    wartości ustawienia.
     :param update: Obiekt klasy Update, który reprezentuje bieżące zdarzenie w Telegramie.
     :param context: Obiekt klasy Context, który zawiera informacje kontekstowe dotyczące bieżącego stanu bota.
     :return: None
     """
-    global config
+    settings_value = context.chat_data.get('settings_value')
+    if settings_value is None:
+        return
 
     try:
         arg = int(update.message.text)
@@ -423,14 +802,11 @@ async def settings_manager(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         await context.bot.send_message(chat_id=update.effective_chat.id, text=err_msg, parse_mode=ParseMode.MARKDOWN)
         return
 
-    config[settings_value] = arg
-
-    with open('config.yml', 'w') as cfg_file_update:
-        yaml.dump(config, cfg_file_update, default_flow_style=False)
+    settings_store.set(update.effective_chat.id, settings_value, arg)
+    del context.chat_data['settings_value']
     msg = f'Pomyślnie zmieniono okres na *{arg}*'
 
     await context.bot.send_message(chat_id=update.effective_chat.id, text=msg, parse_mode=ParseMode.MARKDOWN)
-    manage_handlers()
 
 
 async def unknown(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -444,53 +820,137 @@ async def unknown(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await context.bot.send_message(chat_id=update.effective_chat.id, text=err_msg, parse_mode=ParseMode.MARKDOWN)
 
 
-def manage_handlers(remove: bool = False) -> None:
+async def prewarm_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Funkcja służy do włączania i wyłączania handlerów.
-    :param remove: True - wyłączenie / False - włączenie
+    Funkcja (zadanie JobQueue) odświeża dane najczęściej sprawdzanych symboli, rysuje ich wykresy (prerender) i liczy
+    ich ocenę (rate_conditions) dla ustawień domyślnych. Zapytania są odświeżane po kolei, więc zadanie nie zajmuje
+    więcej niż jednego wątku pobierającego i jednego zestawu procesów rysujących. W dni bez sesji (giełdy amerykańskie)
+    zadanie jest pomijane.
+    :param context: Obiekt klasy Context - context.job.data: interwał śróddzienny, None - wszystkie zapytania.
     :return: None
     """
-    if remove:
-        application.remove_handler(start_handler)
-        application.remove_handler(review_handler)
-        application.remove_handler(help_handler)
-        application.remove_handler(ihelp_handler)
-        application.remove_handler(mode_handler)
-        application.remove_handler(unknown_handler)
-        application.remove_handler(rate_handler)
-        application.add_handler(settings_handler)
-
+    if not market_hours.is_trading_day():
         return
 
-    application.remove_handler(settings_handler)
-    application.add_handler(start_handler)
-    application.add_handler(review_handler)
-    application.add_handler(help_handler)
-    application.add_handler(ihelp_handler)
-    application.add_handler(mode_handler)
-    application.add_handler(rate_handler)
-    application.add_handler(unknown_handler)
+    defaults = settings_store.defaults
+    intervals = None if context.job.data is None else (context.job.data,)
+    requests = popularity.top(intervals=intervals)
 
+    with metrics.context(command='prewarm'):
+        for command, symbol, interval, period in requests:
+            try:
+                if command == prewarm.RATE:
+                    data = await fetch_data(symbol, interval, period, defaults, warmup_interval='1wk')
+                    if data is not None:
+                        rate_conditions(symbol, data, defaults)
+                    continue
 
-if __name__ == '__main__':
-    load_dotenv()
-    token = os.environ["BOT_TOKEN"]
+                data = await fetch_data(symbol, interval, period, defaults)
+                if data is not None:
+                    await prerender(symbol, interval, period, data)
+            except Exception:
+                logging.exception('Nie udało się odświeżyć %s %s %s', symbol, interval, period)
 
-    logging.basicConfig(
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        level=logging.INFO
-    )
+    if context.job.data is None:
+        popularity.age()
+    logging.info('Odświeżono dane %d zapytań', len(requests))
 
-    with open('modes.yml', 'r') as file:
-        modes = yaml.safe_load(file)
 
-    with open('config.yml', 'r') as cfg_file:
-        config = yaml.safe_load(cfg_file)
+async def prerender(symbol: str, interval: str, period: str, data: pd.DataFrame) -> None:
+    """
+    Funkcja rysuje wykresy /review dla ustawień domyślnych w motywach z PREWARM_MODES (domyślnie w motywie z ustawień
+    domyślnych) i zapisuje je w cache. Wskaźniki są liczone raz dla wszystkich motywów.
+    :param symbol: Symbol poddawany analizie.
+    :param interval: Jednostka czasu.
+    :param period: Okres danych.
+    :param data: Dane z fetch_data.
+    :return: None
+    """
+    charts = review_charts(period)
+    ind = IndicatorFrame(data, settings_store.defaults)
 
-    mode = modes[config['mode']]
-    settings_value = None
+    prewarm_modes = prewarm.PREWARM_MODES if prewarm.PREWARM_MODES is not None else [settings_store.defaults['mode']]
+    for mode in prewarm_modes:
+        config = {**settings_store.defaults, 'mode': mode}
+        key = chart_key(symbol, interval, period, config, (data.index[-1], *data.iloc[-1]))
+        if mode not in modes or chart_cache.get(key) is not None:
+            continue
+
+        with metrics.context(interval=interval):
+            images = await chart_engine.render(chart_jobs(charts, ind, config, period), config['image_format'])
+        chart_cache.put(key, [image.getvalue() for image in images])
 
-    application = ApplicationBuilder().token(token).read_timeout(120).build()
+
+async def preload() -> float:
+    """
+    Funkcja importuje w tle biblioteki, których import jest odłożony (yfinance), i uruchamia procesy rysujące wykresy
+    (matplotlib, mplfinance) - pierwsze zapytania nie czekają na ich ładowanie.
+    :return: float - czas od początku startu (s)
+    """
+    await asyncio.gather(asyncio.to_thread(data_provider.provider.preload), chart_engine.warm_up())
+    preloaded = time.perf_counter() - STARTED
+    logging.info('Start: biblioteki i procesy rysujące załadowane po %.2f s', preloaded)
+    return preloaded
+
+
+async def post_init(app: Application) -> None:
+    """
+    Funkcja uruchamia zapis ustawień w tle, endpoint metryk, wstępne ładowanie bibliotek, sprawdzanie alertów
+    i odświeżanie danych popularnych symboli po starcie bota.
+    :param app: Obiekt klasy Application.
+    :return: None
+    """
+    logging.info('Start: importy %.2f s, gotowość do odbierania wiadomości po %.2f s', IMPORTED - STARTED,
+                 time.perf_counter() - STARTED)
+    app.bot_data['settings_flush'] = asyncio.create_task(settings_store.run())
+    app.bot_data['preload'] = asyncio.create_task(preload())
+    if metrics.METRICS_PORT:
+        metrics.serve()
+
+    if alerts.ALERT_INTERVAL:
+        app.job_queue.run_repeating(alert_job, alerts.ALERT_INTERVAL, name='alerts')
+
+    app.job_queue.run_daily(prewarm_job, prewarm.PREWARM_TIME, name='prewarm')
+    for interval, seconds in prewarm.intraday_schedule().items():
+        app.job_queue.run_repeating(prewarm_job, seconds, data=interval, name=f'prewarm_{interval}')
+
+
+async def startup_time() -> dict:
+    """
+    Funkcja mierzy czas startu bez łączenia z Telegramem (python bot.py --startup-time).
+    :return: dict - czasy importów, gotowości do odbierania wiadomości i wstępnego ładowania (s)
+    """
+    ready = time.perf_counter() - STARTED
+    preloaded = await preload()
+    return {'imports_s': IMPORTED - STARTED, 'ready_s': ready, 'preload_s': preloaded}
+
+
+async def post_shutdown(app: Application) -> None:
+    """
+    Funkcja zatrzymuje zapis w tle i zapisuje pozostałe zmiany ustawień.
+    :param app: Obiekt klasy Application.
+    :return: None
+    """
+    app.bot_data['settings_flush'].cancel()
+    await asyncio.to_thread(settings_store.flush)
+
+
+def build_application(token: str, request: BaseRequest | None = None) -> Application:
+    """
+    Funkcja tworzy aplikację bota wraz z obsługą komend.
+    :param token: Token bota.
+    :param request: Obiekt wysyłający zapytania do API Telegrama, domyślnie HTTPX (np. atrapa w testach obciążeniowych).
+    :return: Application
+    """
+    # zapytania są obsługiwane równolegle (ich liczbę ogranicza scheduler), a wysyłka wiadomości jest spowalniana
+    # do limitów Telegrama (z ponowieniem po RetryAfter)
+    builder = (ApplicationBuilder().token(token).concurrent_updates(True).rate_limiter(AIORateLimiter(max_retries=2))
+               .post_init(post_init).post_shutdown(post_shutdown))
+    if request is None:
+        builder = builder.read_timeout(120)
+    else:
+        builder = builder.request(request).get_updates_request(request)
+    application = builder.build()
 
     start_handler = CommandHandler('start', start)
     review_handler = CommandHandler(['review', 'r'], params_check)
@@ -498,12 +958,45 @@ if __name__ == '__main__':
     ihelp_handler = CommandHandler(['ihelp', 'ih'], ihelp_func)
     mode_handler = CommandHandler(['mode', 'm'], mode_func)
     rate_handler = CommandHandler('rate', rate)
+    scan_handler = CommandHandler('scan', scan)
+    alert_handler = CommandHandler('alert', alert_func)
+    unalert_handler = CommandHandler('unalert', unalert)
     callback_handler = CallbackQueryHandler(button)
-    settings_handler = MessageHandler(filters.TEXT, settings_manager)
+    settings_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, settings_manager)
     unknown_handler = MessageHandler(filters.COMMAND, unknown)
 
-    application.add_handler(callback_handler)
+    application.add_handlers([start_handler, review_handler, help_handler, ihelp_handler, mode_handler, rate_handler,
+                              scan_handler, alert_handler, unalert_handler, callback_handler, settings_handler,
+                              unknown_handler])
+    return application
 
-    manage_handlers()
 
-    application.run_polling()
+if __name__ == '__main__':
+    load_dotenv()
+    startup_check = '--startup-time' in sys.argv
+    # pomiar startu nie łączy się z Telegramem, więc nie wymaga tokenu
+    token = os.environ.get("BOT_TOKEN", "0:startup-time") if startup_check else os.environ["BOT_TOKEN"]
+
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+
+    # config.yml zawiera ustawienia domyślne - zmiany użytkowników trafiają do settings_store
+    with open('config.yml', 'r') as cfg_file:
+        settings_store = SettingsStore(yaml.safe_load(cfg_file))
+    alert_store = alerts.AlertStore()
+
+    watchlists = screener.load_watchlists()
+
+    chart_engine = ChartEngine()
+    chart_cache = ChartCache()
+    scheduler = Scheduler()
+
+    application = build_application(token)
+
+    if startup_check:
+        print(json.dumps(asyncio.run(startup_time())))
+    else:
+        application.run_polling()
+    chart_engine.shutdown()
@@ -0,0 +1,103 @@
+import os
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+CHART_CACHE_BYTES = int(os.environ.get('CHART_CACHE_BYTES', 64 * 1024 * 1024))
+
+# przybliżony koszt wpisu bez obrazów (klucz, file_id) - ogranicza liczbę wpisów, gdy wszystkie mają już file_id
+ENTRY_OVERHEAD = 1024
+
+
+@dataclass
+class CachedChart:
+    data: bytes | None
+    file_id: str | None = None
+
+    @property
+    def photo(self) -> bytes | str:
+        return self.file_id if self.file_id is not None else self.data
+
+
+def chart_key(symbol: str, interval: str, period: str, config: dict, last_bar) -> tuple:
+    """
+    Funkcja tworzy klucz zestawu wykresów.
+    :param symbol: str - symbol giełdowy
+    :param interval: str - jednostka czasu
+    :param period: str - okres analizy
+    :param config: dict - ustawienia wskaźników wraz z motywem
+    :param last_bar: data i wartości ostatniej świecy - zmieniają się również, gdy trwająca świeca jest aktualizowana
+    :return: tuple
+    """
+    # sposób wysyłki (album) nie wpływa na obrazy
+    settings = tuple(sorted((k, v) for k, v in config.items() if k != 'album'))
+    return symbol.upper(), interval, period, settings, str(last_bar)
+
+
+class ChartCache:
+    """
+    Klasa przechowuje ostatnio wygenerowane wykresy (LRU z limitem bajtów). Po wysłaniu wykresu zapamiętywany jest
+    jego file_id z Telegrama - kolejne wysyłki nie wymagają ani rysowania, ani ponownego przesyłania pliku.
+    """
+
+    def __init__(self, max_bytes: int = CHART_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Hashable, list[CachedChart]] = OrderedDict()
+
+    def get(self, key: Hashable) -> list[CachedChart] | None:
+        """
+        Metoda zwraca zestaw wykresów.
+        :param key: klucz z chart_key
+        :return: lista CachedChart lub None
+        """
+        charts = self._entries.get(key)
+        if charts is not None:
+            self._entries.move_to_end(key)
+        return charts
+
+    def put(self, key: Hashable, images: list[bytes]) -> list[CachedChart]:
+        """
+        Metoda zapisuje zestaw wykresów.
+        :param key: klucz z chart_key
+        :param images: obrazy wykresów
+        :return: lista CachedChart
+        """
+        if key in self._entries:
+            self.size -= self._entry_size(self._entries.pop(key))
+
+        charts = [CachedChart(data) for data in images]
+        self._entries[key] = charts
+        self.size += self._entry_size(charts)
+        self._evict()
+        return charts
+
+    def set_file_id(self, key: Hashable, index: int, file_id: str) -> None:
+        """
+        Metoda zapamiętuje file_id wysłanego wykresu i zwalnia jego obraz.
+        :param key: klucz z chart_key
+        :param index: numer wykresu w zestawie
+        :param file_id: file_id z Telegrama
+        :return: None
+        """
+        charts = self._entries.get(key)
+        if charts is None:
+            return
+
+        chart = charts[index]
+        if chart.data is not None:
+            self.size -= len(chart.data)
+        chart.data = None
+        chart.file_id = file_id
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._entries:
+            _, charts = self._entries.popitem(last=False)
+            self.size -= self._entry_size(charts)
+
+    @staticmethod
+    def _entry_size(charts: list[CachedChart]) -> int:
+        return ENTRY_OVERHEAD + sum(len(c.data) for c in charts if c.data is not None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import NamedTuple
+
+import image_encoding
+import metrics
+from indicators import IndicatorFrame
+from ohlcv_frame import OhlcvFrame, SharedOhlcv, compact, release
+
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', os.cpu_count() or 1))
+# liczba danych, których wskaźniki proces roboczy przechowuje dla kolejnych wykresów
+WORKER_FRAMES = 4
+
+logger = logging.getLogger(__name__)
+
+# wskaźniki dołączonych danych w procesie roboczym (ścieżka danych -> IndicatorFrame)
+_frames: OrderedDict[str, IndicatorFrame] = OrderedDict()
+
+
+class SharedIndicators(NamedTuple):
+    """
+    Wskaźniki przekazywane do procesu roboczego jako uchwyt opublikowanych danych i ustawienia.
+    """
+    data: SharedOhlcv
+    config: dict
+    backend: str
+
+
+def init_worker() -> None:
+    """
+    Funkcja przygotowuje proces roboczy - wykresy są rysowane bez okna, przez backend Agg. Moduł z wykresami
+    (matplotlib, mplfinance) jest importowany tylko w procesach roboczych, od razu przy ich starcie.
+    :return: None
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import stock_analysis
+
+
+def attach(shared: SharedIndicators) -> IndicatorFrame:
+    """
+    Funkcja dołącza w procesie roboczym do opublikowanych danych. Wykresy tych samych danych rysowane w jednym procesie
+    korzystają ze wspólnych wskaźników.
+    :param shared: SharedIndicators - uchwyt danych i ustawienia
+    :return: IndicatorFrame
+    """
+    path = shared.data.path
+    if path not in _frames:
+        _frames[path] = IndicatorFrame(OhlcvFrame.attach(shared.data).to_frame(), shared.config, shared.backend)
+        while len(_frames) > WORKER_FRAMES:
+            _frames.popitem(last=False)
+    _frames.move_to_end(path)
+    return _frames[path]
+
+
+def run_job(chart: str, kwargs: dict, image_format: str | None = None) -> tuple[BytesIO, list]:
+    """
+    Funkcja rysuje wykres w procesie roboczym i zbiera pomiary czasu jego etapów.
+    :param chart: str - nazwa funkcji rysującej z stock_analysis
+    :param kwargs: argumenty funkcji
+    :param image_format: str - format obrazu (image_encoding.FORMATS), domyślnie format wdrożenia
+    :return: (bufor z obrazem, pomiary)
+    """
+    import stock_analysis
+    with metrics.collect() as spans, metrics.context(chart=chart), image_encoding.use(image_format):
+        with metrics.span('attach'):
+            kwargs = {name: attach(value) if isinstance(value, SharedIndicators) else value
+                      for name, value in kwargs.items()}
+        with metrics.span('chart'):
+            buffer = getattr(stock_analysis, chart)(**kwargs)
+    return buffer, spans
+
+
+class ChartEngine:
+    """
+    Klasa rysuje wykresy w puli procesów, dzięki czemu jedno zapytanie wykorzystuje kilka rdzeni, a zapytania różnych
+    użytkowników nie czekają na siebie nawzajem.
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS):
+        self.workers = workers
+        # 'spawn' - proces bota ma działające wątki (pobieranie danych, telegram), których nie wolno forkować
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=init_worker)
+
+    async def warm_up(self) -> None:
+        """
+        Metoda uruchamia wszystkie procesy robocze (pula tworzy je dopiero przy zleceniach), żeby pierwsze wykresy nie
+        czekały na start procesów i import bibliotek.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)))
+
+    def submit(self, jobs: list[tuple[str, dict]], image_format: str | None = None) -> list[asyncio.Future]:
+        """
+        Metoda zleca rysowanie wykresów i nie czeka na wynik - pozwala wysyłać gotowe wykresy, zanim narysowane
+        zostaną kolejne. Dane wskaźników (IndicatorFrame) są publikowane raz na zlecenie w pamięci współdzielonej
+        i usuwane, gdy wszystkie wykresy są gotowe.
+        :param jobs: lista par (nazwa funkcji rysującej z stock_analysis, argumenty)
+        :param image_format: str - format obrazów (image_encoding.FORMATS), domyślnie format wdrożenia
+        :return: lista Future z buforami obrazów w kolejności zadań
+        """
+        shared = {}
+        jobs = [(chart, {name: self._share(value, shared) for name, value in kwargs.items()}) for chart, kwargs in jobs]
+        futures = [asyncio.ensure_future(self._run(chart, kwargs, image_format)) for chart, kwargs in jobs]
+        if shared:
+            def release_shared(_) -> None:
+                for value in shared.values():
+                    release(value.data)
+
+            asyncio.gather(*futures, return_exceptions=True).add_done_callback(release_shared)
+        return futures
+
+    @staticmethod
+    def _share(value, shared: dict[int, SharedIndicators]):
+        if not isinstance(value, IndicatorFrame):
+            return value
+        if id(value) not in shared:
+            data = OhlcvFrame.from_frame(compact(value.data))
+            shared[id(value)] = SharedIndicators(data.publish(), value.config, value.backend)
+        return shared[id(value)]
+
+    async def _run(self, chart: str, kwargs: dict, image_format: str | None) -> BytesIO:
+        loop = asyncio.get_running_loop()
+        buffer, spans = await loop.run_in_executor(self._pool, run_job, chart, kwargs, image_format)
+        metrics.record(spans)
+        encode = sum(seconds for stage, seconds, _ in spans if stage == 'encode')
+        logger.info('Wykres %s: %s, %d B, kodowanie %.3f s', chart, image_encoding.resolve(image_format),
+                    buffer.getbuffer().nbytes, encode)
+        return buffer
+
+    async def render(self, jobs: list[tuple[str, dict]], image_format: str | None = None) -> list[BytesIO]:
+        """
+        Metoda rysuje wykresy równolegle.
+        :param jobs: lista par (nazwa funkcji rysującej z stock_analysis, argumenty)
+        :param image_format: str - format obrazów (image_encoding.FORMATS), domyślnie format wdrożenia
+        :return: bufory obrazów w kolejności zadań
+        """
+        return list(await asyncio.gather(*self.submit(jobs, image_format)))
+
+    def shutdown(self) -> None:
+        """
+        Metoda zamyka pulę procesów.
+        :return: None
+        """
+        self._pool.shutdown(cancel_futures=True)
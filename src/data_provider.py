@@ -0,0 +1,179 @@
+"""
+Źródła danych OHLCV. Domyślnie dane pobierane są z Yahoo Finance. Dostawca replay działa bez dostępu do sieci:
+odtwarza dane zapisane w plikach (w formacie cache OHLCV - wystarczy skopiować katalog cache - lub CSV), a dla
+symboli bez pliku generuje dane syntetyczne. Służy do testów obciążeniowych i planowania wydajności.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+import zlib
+
+import pandas as pd
+
+import fetch_window
+import ohlcv_cache
+import yahoo
+from synthetic import SESSION_MINUTES, synthetic_ohlcv
+
+# yahoo lub replay
+DATA_PROVIDER = os.environ.get('DATA_PROVIDER', 'yahoo')
+# katalog z plikami SYMBOL_interwał.npz (jak w cache OHLCV) lub SYMBOL_interwał.csv
+REPLAY_DIR = os.environ.get('REPLAY_DIR', 'replay')
+# czas (s) każdego pobrania w trybie replay - symuluje czas odpowiedzi Yahoo
+REPLAY_LATENCY = float(os.environ.get('REPLAY_LATENCY', 0))
+# dane syntetyczne dla symboli bez pliku, 0 - brak danych
+REPLAY_SYNTHETIC = os.environ.get('REPLAY_SYNTHETIC', '1') == '1'
+
+# liczba świec dziennych danych syntetycznych (20 lat)
+SYNTHETIC_DAILY_BARS = 20 * 252
+
+
+class DataProvider(ABC):
+    """
+    Klasa bazowa źródła danych - interfejs zgodny z modułem yahoo.
+    """
+
+    @abstractmethod
+    def download(self, symbol: str, **kwargs) -> pd.DataFrame:
+        """
+        Metoda pobiera dane symbolu.
+        :param symbol: str - symbol giełdowy
+        :param kwargs: start, period ('max') i interval - jak w yf.download
+        :return: DataFrame, pusty przy braku danych
+        """
+
+    @abstractmethod
+    def download_many(self, symbols: list[str], **kwargs) -> dict[str, pd.DataFrame]:
+        """
+        Metoda pobiera dane wielu symboli.
+        :param symbols: list - symbole giełdowe
+        :param kwargs: start i interval - jak w yf.download
+        :return: dict symbol -> DataFrame; symbole bez danych są pomijane
+        """
+
+    def preload(self) -> None:
+        """
+        Metoda ładuje z wyprzedzeniem zasoby źródła danych.
+        :return: None
+        """
+
+
+class YahooProvider(DataProvider):
+    def download(self, symbol: str, **kwargs) -> pd.DataFrame:
+        return yahoo.download(symbol, **kwargs)
+
+    def download_many(self, symbols: list[str], **kwargs) -> dict[str, pd.DataFrame]:
+        return yahoo.download_many(symbols, **kwargs)
+
+    def preload(self) -> None:
+        yahoo.preload()
+
+
+class ReplayProvider(DataProvider):
+    """
+    Klasa odtwarza dane z plików lub generuje dane syntetyczne (dla każdego symbolu zawsze te same).
+    """
+
+    def __init__(self, directory: str = REPLAY_DIR, latency: float = REPLAY_LATENCY,
+                 synthetic: bool = REPLAY_SYNTHETIC):
+        """
+        :param directory: str - katalog z plikami danych
+        :param latency: float - czas (s) każdego pobrania
+        :param synthetic: bool - dane syntetyczne dla symboli bez pliku
+        """
+        self.directory = directory
+        self.latency = latency
+        self.synthetic = synthetic
+        self._data: dict[tuple[str, str], pd.DataFrame | None] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, symbol: str, interval: str) -> pd.DataFrame | None:
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = self._read(*key)
+            return self._data[key]
+
+    def _read(self, symbol: str, interval: str) -> pd.DataFrame | None:
+        entry = ohlcv_cache.load(symbol, interval, self.directory)
+        if entry is not None:
+            return entry.data
+
+        csv_path = os.path.join(self.directory, f'{symbol}_{interval}.csv')
+        if os.path.exists(csv_path):
+            return yahoo.normalize(pd.read_csv(csv_path, index_col=0, parse_dates=True), interval)
+
+        if not self.synthetic:
+            return None
+        return synthetic_ohlcv(interval, synthetic_bars(interval), seed=zlib.crc32(symbol.encode()))
+
+    def download(self, symbol: str, start=None, period: str | None = None, interval: str = '1d',
+                 **kwargs) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+
+        data = self._load(symbol, interval)
+        if data is None:
+            return pd.DataFrame()
+        return _slice(data, start).copy()
+
+    def download_many(self, symbols: list[str], start=None, interval: str = '1d', **kwargs) \
+            -> dict[str, pd.DataFrame]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        result = {}
+        for symbol in symbols:
+            data = self._load(symbol, interval)
+            if data is not None and not (data := _slice(data, start)).empty:
+                result[symbol] = data.copy()
+        return result
+
+
+def synthetic_bars(interval: str) -> int:
+    """
+    Funkcja zwraca liczbę świec danych syntetycznych - 20 lat dla danych dziennych, a dla śróddziennych zakres
+    udostępniany przez Yahoo.
+    :param interval: str - jednostka czasu
+    :return: int
+    """
+    if interval not in fetch_window.interval_limits:
+        return SYNTHETIC_DAILY_BARS
+
+    days = pd.Timedelta(fetch_window.interval_limits[interval]).days
+    return days * 5 // 7 * (SESSION_MINUTES // int(interval[:-1]))
+
+
+def _slice(data: pd.DataFrame, start) -> pd.DataFrame:
+    """
+    Funkcja zwraca dane od podanej daty - naiwna data jest w strefie czasowej danych, jak w yf.download.
+    :param data: DataFrame
+    :param start: data początkowa lub None - wszystkie dane
+    :return: DataFrame
+    """
+    if start is None:
+        return data
+    start = pd.Timestamp(start)
+    if data.index.tz is not None and start.tz is None:
+        start = start.tz_localize(data.index.tz)
+    return data.loc[start:]
+
+
+def create(name: str = DATA_PROVIDER) -> DataProvider:
+    """
+    Funkcja tworzy źródło danych.
+    :param name: str - yahoo lub replay
+    :return: DataProvider
+    """
+    match name:
+        case 'yahoo':
+            return YahooProvider()
+        case 'replay':
+            return ReplayProvider()
+        case _:
+            raise ValueError(f'Nieznane źródło danych: {name}')
+
+
+# źródło danych używane przez bota
+provider = create()
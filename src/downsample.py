@@ -0,0 +1,106 @@
+"""
+Zmniejszanie liczby punktów przekazywanych do matplotlib/mplfinance, gdy szereg ma więcej punktów niż wykres pikseli.
+Wskaźniki są liczone na pełnych danych - tu zmniejszana jest tylko ich reprezentacja na wykresie, z zachowaniem
+kształtu: linie metodą LTTB (Largest-Triangle-Three-Buckets), świece przez agregację OHLC w przedziałach, a słupki
+histogramów przez wybór wartości o największym module w przedziale.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# liczba punktów linii na piksel szerokości wykresu
+POINTS_PER_PIXEL = 2
+
+
+def max_points(fig: Figure, per_pixel: float = POINTS_PER_PIXEL) -> int:
+    """
+    Funkcja zwraca liczbę punktów, powyżej której szereg jest zmniejszany - zależną od szerokości wykresu w pikselach.
+    :param fig: matplotlib Figure
+    :param per_pixel: float - liczba punktów na piksel
+    :return: int
+    """
+    return int(fig.get_figwidth() * fig.dpi * per_pixel)
+
+
+def _buckets(n: int, buckets: int) -> np.ndarray:
+    """
+    Funkcja dzieli n kolejnych punktów na przedziały o (prawie) równej liczności.
+    :param n: int - liczba punktów
+    :param buckets: int - liczba przedziałów
+    :return: ndarray - numer przedziału każdego punktu
+    """
+    return np.arange(n) * buckets // n
+
+
+def lttb(series: pd.Series, points: int) -> pd.Series:
+    """
+    Funkcja wybiera z szeregu punkty, które najlepiej zachowują kształt linii (LTTB) - w każdym przedziale punkt
+    tworzący największy trójkąt z punktem wybranym wcześniej i średnią następnego przedziału.
+    :param series: Series - szereg z indeksem dat
+    :param points: int - docelowa liczba punktów
+    :return: Series - podzbiór punktów szeregu
+    """
+    series = series.dropna()
+    n = len(series)
+    if points < 3 or n <= points:
+        return series
+
+    x = series.index.asi8.astype(float) if isinstance(series.index, pd.DatetimeIndex) else np.arange(n, dtype=float)
+    y = series.to_numpy(dtype=float)
+
+    # przedziały punktów środkowych (pierwszy i ostatni punkt są zawsze wybierane)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    # dla ostatniego przedziału "następnym" jest ostatni punkt
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return series.iloc[selected]
+
+
+def extremes(series: pd.Series, points: int) -> pd.Series:
+    """
+    Funkcja wybiera w każdym przedziale wartość o największym module - dla słupków histogramów.
+    :param series: Series - szereg z indeksem dat
+    :param points: int - docelowa liczba słupków
+    :return: Series - podzbiór punktów szeregu
+    """
+    series = series.dropna()
+    if len(series) <= points:
+        return series
+
+    positions = pd.Series(np.abs(series.to_numpy())).groupby(_buckets(len(series), points)).idxmax()
+    return series.iloc[positions.to_numpy()]
+
+
+def ohlc(data: pd.DataFrame, bars: int, *lines: pd.Series) -> tuple[pd.DataFrame, list[pd.Series]]:
+    """
+    Funkcja łączy kolejne świece w przedziały (Open pierwszego, najwyższy High, najniższy Low, Close ostatniego).
+    Wolumen przedziału to największy wolumen świecy - tak wyglądają nakładające się słupki bez łączenia. Linie rysowane
+    na tym samym wykresie są przycinane do tych samych przedziałów (ostatnia wartość), żeby miały tyle punktów co
+    świece.
+    :param data: DataFrame - świece
+    :param bars: int - docelowa liczba świec
+    :param lines: Series - linie o tym samym indeksie co świece
+    :return: (świece, linie)
+    """
+    if len(data) <= bars:
+        return data, list(lines)
+
+    groups = _buckets(len(data), bars)
+    aggregations = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'max'}
+    candles = data.groupby(groups).agg({k: v for k, v in aggregations.items() if k in data.columns})
+    # świeca przedziału ma datę jego pierwszej świecy
+    index = data.index[np.flatnonzero(np.diff(groups, prepend=-1))]
+    candles.index = index
+    return candles, [pd.Series(line.groupby(groups).last().to_numpy(), index=index, name=line.name) for line in lines]
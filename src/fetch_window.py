@@ -0,0 +1,102 @@
+import math
+
+import pandas as pd
+
+periods_timedeltas = {k: f'{v}d' for k, v in [('1d', 1), ('5d', 5), ('1mo', 30), ('6mo', 182), ('1y', 365),
+                                              ('2y', 730), ('5y', 1826), ('10y', 3652)]}
+
+# okresy, dla których rysowany jest wykres cykli rocznych (dane od 1 stycznia)
+year_cycle_periods = ['5y', '10y']
+
+# maksymalny zakres danych udostępniany przez Yahoo dla interwałów śróddziennych
+interval_limits = {'1m': '7d', '2m': '59d', '5m': '59d', '15m': '59d', '30m': '59d', '60m': '730d'}
+
+# dopuszczalny wpływ wartości sprzed okna pobierania na wskaźniki wykładnicze
+WARMUP_TOLERANCE = 1e-6
+
+# zapas na święta i dni bez notowań
+CALENDAR_MARGIN = pd.Timedelta('10d')
+
+
+def ema_warmup(window: int, alpha: float | None = None) -> int:
+    """
+    Funkcja wyznacza liczbę świec potrzebną do "rozgrzania" średniej wykładniczej - po tylu świecach waga wartości
+    sprzed okna pobierania spada poniżej WARMUP_TOLERANCE.
+    :param window: int - okres średniej (span)
+    :param alpha: float - współczynnik wygładzania, domyślnie 2 / (window + 1)
+    :return: int
+    """
+    alpha = 2 / (window + 1) if alpha is None else alpha
+    if alpha >= 1:
+        return window
+    return window + math.ceil(math.log(WARMUP_TOLERANCE) / math.log(1 - alpha))
+
+
+def wilder_warmup(window: int) -> int:
+    """
+    Funkcja wyznacza liczbę świec potrzebną do "rozgrzania" średniej Wildera (RSI, ATR, ADX).
+    :param window: int - okres średniej
+    :return: int
+    """
+    return ema_warmup(window, alpha=1 / window)
+
+
+def warmup_bars(config: dict) -> int:
+    """
+    Funkcja wyznacza liczbę świec przed początkiem wykresu, których wymagają wskaźniki przy podanych ustawieniach.
+    Wskaźnik A/D jest sumą skumulowaną - jego przebieg nie zależy od okna pobierania, a jedynie poziom odniesienia
+    (wykres A/D jest przesunięty o stałą względem liczonego na pełnej historii; zmieniają się tylko opisy jego osi).
+    :param config: dict - ustawienia wskaźników
+    :return: int
+    """
+    return max(
+        ema_warmup(config['ema_short']),
+        ema_warmup(config['ema_long']),
+        ema_warmup(config['atr_ema_window']),
+        wilder_warmup(config['atr_window']),
+        ema_warmup(config['macd_slow']) + ema_warmup(config['macd_sign']),
+        wilder_warmup(config['rsi_window']) + 1,
+        config['so_window'] + config['so_smooth_window'],
+        2 * wilder_warmup(config['adx_window']) + 1,
+    )
+
+
+def bars_to_timedelta(interval: str, bars: int) -> pd.Timedelta:
+    """
+    Funkcja przelicza liczbę świec na zakres kalendarzowy (z zapasem na weekendy i święta). Dla interwałów
+    śróddziennych przyjmowana jest krótka, 4-godzinna sesja, aby zakres wystarczył na każdej giełdzie.
+    :param interval: str - jednostka czasu
+    :param bars: int - liczba świec
+    :return: Timedelta
+    """
+    match interval:
+        case '1d':
+            days = bars * 7 / 5
+        case '1wk':
+            days = bars * 7
+        case '1mo':
+            days = bars * 31
+        case _:
+            minutes = int(interval[:-1])
+            days = bars * minutes / 240 * 7 / 5
+    return pd.Timedelta(days=math.ceil(days)) + CALENDAR_MARGIN
+
+
+def fetch_start(interval: str, period: str, config: dict, now: pd.Timestamp | None = None) -> pd.Timestamp:
+    """
+    Funkcja wyznacza początek zakresu danych do pobrania - okres analizy wydłużony o rozgrzewkę wskaźników.
+    :param interval: str - jednostka czasu
+    :param period: str - okres analizy
+    :param config: dict - ustawienia wskaźników
+    :param now: Timestamp - bieżący czas (UTC)
+    :return: Timestamp
+    """
+    now = pd.Timestamp.utcnow().tz_localize(None) if now is None else now
+    start = now - pd.Timedelta(periods_timedeltas[period])
+    if period in year_cycle_periods:
+        start = pd.Timestamp(year=start.year, month=1, day=1)
+    start = start - bars_to_timedelta(interval, warmup_bars(config))
+
+    if interval in interval_limits:
+        start = max(start, now - pd.Timedelta(interval_limits[interval]))
+    return start.normalize()
@@ -0,0 +1,87 @@
+"""
+Kodowanie wykresów do plików wysyłanych przez Telegram. Format (PNG, PNG z paletą, JPEG, WebP), DPI, stopień kompresji
+PNG i jakość JPEG/WebP ustawia się dla całego wdrożenia zmiennymi środowiskowymi, a format można też wybrać dla chatu.
+"""
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # moduł jest importowany też w procesie bota, który nie ładuje matplotlib
+    from matplotlib.figure import Figure
+
+# formaty obsługiwane przez Telegram jako zdjęcia
+FORMATS = ('png', 'png8', 'jpeg', 'webp')
+# w ustawieniach chatu - format wdrożenia
+DEFAULT = 'default'
+
+CHART_FORMAT = os.environ.get('CHART_FORMAT', 'png')
+# 0 - DPI wykresu (100)
+CHART_DPI = int(os.environ.get('CHART_DPI', 0))
+CHART_PNG_COMPRESS = int(os.environ.get('CHART_PNG_COMPRESS', 6))
+CHART_QUALITY = int(os.environ.get('CHART_QUALITY', 85))
+# liczba kolorów palety w formacie png8
+PALETTE_COLORS = 256
+
+_format: ContextVar[str] = ContextVar('image_format', default=CHART_FORMAT)
+
+
+def resolve(image_format: str | None) -> str:
+    """
+    Funkcja zwraca format obrazów - ustawienie chatu albo, gdy go nie ma, format wdrożenia.
+    :param image_format: str - format z ustawień chatu
+    :return: str
+    """
+    if image_format in FORMATS:
+        return image_format
+    return CHART_FORMAT if CHART_FORMAT in FORMATS else 'png'
+
+
+@contextmanager
+def use(image_format: str | None) -> Iterator[None]:
+    """
+    Funkcja ustawia format obrazów dla wykresów rysowanych w bloku.
+    :param image_format: str - format z ustawień chatu
+    """
+    token = _format.set(resolve(image_format))
+    try:
+        yield
+    finally:
+        _format.reset(token)
+
+
+def current() -> str:
+    """
+    Funkcja zwraca format obrazów bieżącego wykresu.
+    :return: str
+    """
+    return resolve(_format.get())
+
+
+def save(fig: 'Figure', buffer: BytesIO, **kwargs) -> None:
+    """
+    Funkcja koduje wykres do bufora w bieżącym formacie.
+    :param fig: matplotlib Figure
+    :param buffer: BytesIO - bufor docelowy
+    :param kwargs: dodatkowe argumenty savefig
+    :return: None
+    """
+    if CHART_DPI:
+        kwargs['dpi'] = CHART_DPI
+
+    match current():
+        case 'png':
+            fig.savefig(buffer, format='png', pil_kwargs={'compress_level': CHART_PNG_COMPRESS}, **kwargs)
+        case 'png8':
+            # paleta 256 kolorów - wykresy mają niewiele barw, więc plik jest kilka razy mniejszy
+            from PIL import Image
+            raw = BytesIO()
+            fig.savefig(raw, format='png', pil_kwargs={'compress_level': 0}, **kwargs)
+            raw.seek(0)
+            image = Image.open(raw).convert('RGB').quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+            image.save(buffer, format='png', compress_level=CHART_PNG_COMPRESS)
+        case image_format:
+            fig.savefig(buffer, format=image_format, pil_kwargs={'quality': CHART_QUALITY}, **kwargs)
@@ -0,0 +1,290 @@
+"""
+Wskaźniki liczone bezpośrednio na tablicach NumPy. Wyniki odpowiadają implementacjom z biblioteki ta (łącznie z
+położeniem wartości NaN i zer na początku serii), ale bez tworzenia pośrednich obiektów pandas. Dane wejściowe nie
+mogą zawierać wartości NaN.
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# maksymalny wykładnik potęgi (1 - alpha) w jednym bloku - chroni przed przepełnieniem przy liczeniu blokami
+_MAX_EXPONENT = 100 * math.log(10)
+
+
+def ewm_from(x: np.ndarray, alpha: float, y0: float) -> np.ndarray:
+    """
+    Funkcja liczy rekurencję y[i] = (1 - alpha) * y[i - 1] + alpha * x[i] z wartością początkową y0. Rekurencja jest
+    liczona blokami - wewnątrz bloku przez sumy skumulowane, bez pętli po świecach.
+    :param x: ndarray - dane wejściowe
+    :param alpha: float - współczynnik wygładzania
+    :param y0: float - wartość przed pierwszym elementem x
+    :return: ndarray
+    """
+    out = np.empty(len(x))
+    if alpha >= 1:
+        out[:] = x
+        return out
+
+    log_r = math.log1p(-alpha)
+    block = max(1, min(len(x), int(_MAX_EXPONENT / -log_r)))
+    powers = np.exp(log_r * np.arange(block + 1))
+    inv_powers = 1 / powers[:block]
+
+    prev = y0
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        k = len(chunk)
+        acc = np.cumsum(chunk * inv_powers[:k])
+        out[start:start + k] = powers[1:k + 1] * prev + alpha * powers[:k] * acc
+        prev = out[start + k - 1]
+    return out
+
+
+def ewm(x: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """
+    Funkcja odpowiada pandas ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean() - początkowe wartości NaN
+    są pomijane, a średnia startuje od pierwszej dostępnej wartości.
+    :param x: ndarray - dane wejściowe
+    :param alpha: float - współczynnik wygładzania
+    :param min_periods: int - minimalna liczba obserwacji
+    :return: ndarray
+    """
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+
+    first = valid[0]
+    out[first] = x[first]
+    out[first + 1:] = ewm_from(x[first + 1:], alpha, x[first])
+    out[first:first + max(min_periods - 1, 0)] = np.nan
+    return out
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy maksimum kroczące w czasie O(n) (algorytm van Herka/Gil-Wermana).
+    :param x: ndarray - dane wejściowe
+    :param window: int - okres
+    :return: ndarray, NaN dla pierwszych window - 1 elementów
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, -np.inf)
+    padded[:n] = x
+    padded = padded.reshape(blocks, window)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy minimum kroczące w czasie O(n).
+    :param x: ndarray - dane wejściowe
+    :param window: int - okres
+    :return: ndarray, NaN dla pierwszych window - 1 elementów
+    """
+    return -rolling_max(-x, window)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy średnią kroczącą (NaN, jeżeli w oknie brakuje danych).
+    :param x: ndarray - dane wejściowe
+    :param window: int - okres
+    :return: ndarray
+    """
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window).mean(axis=1)
+    return out
+
+
+def shift(x: np.ndarray) -> np.ndarray:
+    """
+    Funkcja przesuwa dane o jedną świecę (pierwsza wartość to NaN).
+    :param x: ndarray - dane wejściowe
+    :return: ndarray
+    """
+    out = np.empty(len(x))
+    out[0] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+
+def ema_indicator(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy średnią wykładniczą (ta.trend.ema_indicator).
+    :param close: ndarray - ceny zamknięcia
+    :param window: int - okres
+    :return: ndarray
+    """
+    return ewm(close, 2 / (window + 1), min_periods=window)
+
+
+def macd(close: np.ndarray, window_slow: int, window_fast: int, window_sign: int) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Funkcja liczy MACD (ta.trend.MACD).
+    :param close: ndarray - ceny zamknięcia
+    :param window_slow: int - długi okres
+    :param window_fast: int - krótki okres
+    :param window_sign: int - okres sygnału
+    :return: (linia MACD, linia sygnału, histogram)
+    """
+    line = ema_indicator(close, window_fast) - ema_indicator(close, window_slow)
+    signal = ema_indicator(line, window_sign)
+    return line, signal, line - signal
+
+
+def rsi(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy RSI (ta.momentum.rsi).
+    :param close: ndarray - ceny zamknięcia
+    :param window: int - okres
+    :return: ndarray
+    """
+    diff = np.empty(len(close))
+    diff[0] = 0.0
+    diff[1:] = np.diff(close)
+
+    up = ewm(np.where(diff > 0, diff, 0.0), 1 / window, min_periods=window)
+    down = ewm(np.where(diff < 0, -diff, 0.0), 1 / window, min_periods=window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(down == 0, 100, 100 - 100 / (1 + up / down))
+
+
+def stoch(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int, smooth_window: int) \
+        -> tuple[np.ndarray, np.ndarray]:
+    """
+    Funkcja liczy oscylator stochastyczny (ta.momentum.StochasticOscillator).
+    :param high: ndarray - ceny maksymalne
+    :param low: ndarray - ceny minimalne
+    :param close: ndarray - ceny zamknięcia
+    :param window: int - okres
+    :param smooth_window: int - okres linii sygnału
+    :return: (linia oscylatora, linia sygnału)
+    """
+    smin = rolling_min(low, window)
+    smax = rolling_max(high, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * (close - smin) / (smax - smin)
+    return k, rolling_mean(k, smooth_window)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Funkcja liczy True Range (dla pierwszej świecy: high - low).
+    :param high: ndarray - ceny maksymalne
+    :param low: ndarray - ceny minimalne
+    :param close: ndarray - ceny zamknięcia
+    :return: ndarray
+    """
+    prev_close = shift(close)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def average_true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy ATR (ta.volatility.average_true_range).
+    :param high: ndarray - ceny maksymalne
+    :param low: ndarray - ceny minimalne
+    :param close: ndarray - ceny zamknięcia
+    :param window: int - okres
+    :return: ndarray
+    """
+    if len(close) < window:
+        # jak ta - za krótka seria to błąd, a nie same zera
+        raise IndexError('Za mało danych do wyznaczenia ATR')
+    tr = true_range(high, low, close)
+    atr = np.zeros(len(close))
+
+    atr[window - 1] = tr[:window].mean()
+    atr[window:] = ewm_from(tr[window:], 1 / window, atr[window - 1])
+    return atr
+
+
+def acc_dist_index(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    Funkcja liczy wskaźnik akumulacji/dystrybucji (ta.volume.acc_dist_index).
+    :param high: ndarray - ceny maksymalne
+    :param low: ndarray - ceny minimalne
+    :param close: ndarray - ceny zamknięcia
+    :param volume: ndarray - wolumen
+    :return: ndarray
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        clv = ((close - low) - (high - close)) / (high - low)
+    clv[np.isnan(clv)] = 0.0
+    return np.cumsum(clv * volume)
+
+
+def wilder_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Funkcja liczy sumę wygładzoną Wildera tak jak ta.trend.ADXIndicator: s[0] = suma x[1:window + 1],
+    s[i] = s[i - 1] - s[i - 1] / window + x[window + i]; ostatni element pozostaje zerem.
+    :param x: ndarray - dane wejściowe (pierwszy element to NaN)
+    :param window: int - okres
+    :return: ndarray o długości len(x) - window + 1
+    """
+    out = np.zeros(len(x) - window + 1)
+    out[0] = x[1:window + 1].sum()
+    if len(out) > 2:
+        # s = window * z, gdzie z[i] = (1 - 1/window) * z[i - 1] + (1/window) * x[window + i]
+        out[1:-1] = window * ewm_from(x[window + 1:], 1 / window, out[0] / window)
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Funkcja liczy ADX, +DI i -DI (ta.trend.ADXIndicator).
+    :param high: ndarray - ceny maksymalne
+    :param low: ndarray - ceny minimalne
+    :param close: ndarray - ceny zamknięcia
+    :param window: int - okres
+    :return: (ADX, +DI, -DI)
+    """
+    n = len(close)
+    if n < window:
+        raise ValueError('Za mało danych do wyznaczenia ADX')
+    prev_close = shift(close)
+    trs = wilder_sum(np.maximum(high, prev_close) - np.minimum(low, prev_close), window)
+
+    diff_up = high - shift(high)
+    diff_down = shift(low) - low
+    with np.errstate(invalid='ignore'):
+        pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+        neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+    pos[0] = neg[0] = np.nan
+    dip = wilder_sum(pos, window)
+    din = wilder_sum(neg, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(trs != 0, 100 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100 * din / trs, 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100 * np.abs((di_pos - di_neg) / di_sum), 0.0)
+
+    length = len(trs)
+    if length <= window:
+        raise IndexError('Za mało danych do wyznaczenia ADX')
+    adx_series = np.zeros(length)
+    adx_series[window] = dx[:window].mean()
+    adx_series[window + 1:] = ewm_from(dx[window:length - 1], 1 / window, adx_series[window])
+
+    pos_out = np.zeros(n)
+    neg_out = np.zeros(n)
+    pos_out[window + 1:] = di_pos[1:length - 1]
+    neg_out[window + 1:] = di_neg[1:length - 1]
+
+    return np.concatenate((np.zeros(window - 1), adx_series)), pos_out, neg_out
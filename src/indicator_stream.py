@@ -0,0 +1,457 @@
+"""
+Strumieniowe wersje wskaźników - stan każdego wskaźnika jest aktualizowany w czasie O(1) na nową świecę. Ostatnie
+wartości odpowiadają wskaźnikom z biblioteki ta liczonym na całej historii. Stan można zapisać do słownika
+(to_dict / from_dict) zgodnego z JSON/YAML. Stany są używane przez alerty (alerts.py) - każdy przebieg dodaje tylko
+nowe świece, zamiast liczyć wskaźniki na całej historii.
+"""
+import json
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels as kernels
+from stock_rate import impulse_points, value_zone_points, adx_points
+
+# ustawienia wskaźników, od których zależy stan
+STATE_KEYS = ('ema_short', 'ema_long', 'macd_slow', 'macd_fast', 'macd_sign', 'rsi_window', 'atr_window', 'adx_window',
+              'so_window', 'so_smooth_window')
+# okres, na którym liczony jest RSI wraz ze średnią i odchyleniem (jak w stock_rate.rsi_level)
+RSI_PERIOD = pd.Timedelta('182d')
+
+
+class StreamState:
+    """
+    Klasa bazowa stanu wskaźnika - zapewnia zapis i odczyt stanu.
+    """
+    registry = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        StreamState.registry[cls.__name__] = cls
+
+    def to_dict(self) -> dict:
+        """
+        Metoda zapisuje stan do słownika.
+        :return: dict
+        """
+        return {'_state': type(self).__name__, **{k: _dump(v) for k, v in vars(self).items()}}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'StreamState':
+        """
+        Metoda odtwarza stan ze słownika.
+        :param state: dict - stan zapisany przez to_dict
+        :return: StreamState
+        """
+        obj = object.__new__(StreamState.registry[state['_state']])
+        for k, v in state.items():
+            if k != '_state':
+                setattr(obj, k, _load(v))
+        return obj
+
+
+def _dump(value):
+    if isinstance(value, StreamState):
+        return value.to_dict()
+    if isinstance(value, deque):
+        return {'_deque': [_dump(v) for v in value], 'maxlen': value.maxlen}
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict) and '_state' in value:
+        return StreamState.from_dict(value)
+    if isinstance(value, dict) and '_deque' in value:
+        return deque([_load(v) for v in value['_deque']], maxlen=value['maxlen'])
+    return value
+
+
+class EMAState(StreamState):
+    """
+    Średnia wykładnicza (adjust=False), dostępna od window-tej świecy.
+    """
+
+    def __init__(self, window: int, alpha: float | None = None):
+        self.window = window
+        self.alpha = 2 / (window + 1) if alpha is None else alpha
+        self.value = None
+        self.count = 0
+
+    def update(self, x: float) -> float | None:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.current
+
+    @property
+    def current(self) -> float | None:
+        return self.value if self.count >= self.window else None
+
+
+class RSIState(StreamState):
+    """
+    RSI ze średnimi Wildera.
+    """
+
+    def __init__(self, window: int):
+        self.prev_close = None
+        self.up = EMAState(window, alpha=1 / window)
+        self.down = EMAState(window, alpha=1 / window)
+
+    def update(self, close: float) -> float | None:
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.up.update(max(diff, 0.0))
+        self.down.update(max(-diff, 0.0))
+        return self.current
+
+    @property
+    def current(self) -> float | None:
+        up, down = self.up.current, self.down.current
+        if down is None:
+            return None
+        return 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+
+class MACDState(StreamState):
+    """
+    MACD - linia, sygnał i histogram.
+    """
+
+    def __init__(self, window_slow: int, window_fast: int, window_sign: int):
+        self.fast = EMAState(window_fast)
+        self.slow = EMAState(window_slow)
+        self.signal = EMAState(window_sign)
+        self.line = None
+
+    def update(self, close: float) -> float | None:
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        self.line = None if fast is None or slow is None else fast - slow
+        if self.line is not None:
+            self.signal.update(self.line)
+        return self.hist
+
+    @property
+    def hist(self) -> float | None:
+        signal = self.signal.current
+        return None if signal is None else self.line - signal
+
+
+class ATRState(StreamState):
+    """
+    ATR - średnia z pierwszych window świec, dalej wygładzanie Wildera.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.prev_close = None
+        self.seed = []
+        self.value = None
+
+    def update(self, high: float, low: float, close: float) -> float | None:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.value is None:
+            self.seed.append(tr)
+            if len(self.seed) == self.window:
+                self.value = sum(self.seed) / self.window
+                self.seed = []
+        else:
+            self.value = (self.value * (self.window - 1) + tr) / self.window
+        return self.value
+
+
+class ADXState(StreamState):
+    """
+    ADX, +DI i -DI - sumy Wildera zainicjowane sumą pierwszych window świec, ADX zainicjowany średnią z pierwszych
+    window wartości DX.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.prev = None
+        self.count = 0
+        self.trs = self.dip = self.din = 0.0
+        self.dx_seed = []
+        self.adx = None
+        self.di_pos = self.di_neg = None
+        # (ADX, +DI, -DI) z poprzedniej świecy
+        self.previous = (None, None, None)
+
+    def update(self, high: float, low: float, close: float) -> float | None:
+        self.previous = (self.adx, self.di_pos, self.di_neg)
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return None
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+        tr = max(high, prev_close) - min(low, prev_close)
+        diff_up, diff_down = high - prev_high, prev_low - low
+        pos = diff_up if diff_up > diff_down and diff_up > 0 else 0.0
+        neg = diff_down if diff_down > diff_up and diff_down > 0 else 0.0
+
+        self.count += 1
+        if self.count <= self.window:
+            self.trs, self.dip, self.din = self.trs + tr, self.dip + pos, self.din + neg
+            if self.count < self.window:
+                return None
+        else:
+            w = self.window
+            self.trs = self.trs - self.trs / w + tr
+            self.dip = self.dip - self.dip / w + pos
+            self.din = self.din - self.din / w + neg
+
+        di_pos = 100 * self.dip / self.trs if self.trs != 0 else 0.0
+        di_neg = 100 * self.din / self.trs if self.trs != 0 else 0.0
+        dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0.0
+        if self.count > self.window:
+            self.di_pos, self.di_neg = di_pos, di_neg
+
+        if self.adx is None:
+            self.dx_seed.append(dx)
+            if len(self.dx_seed) == self.window:
+                self.adx = sum(self.dx_seed) / self.window
+                self.dx_seed = []
+        else:
+            self.adx = (self.adx * (self.window - 1) + dx) / self.window
+        return self.adx
+
+
+class StochState(StreamState):
+    """
+    Oscylator stochastyczny - minimum i maksimum kroczące w kolejkach monotonicznych.
+    """
+
+    def __init__(self, window: int, smooth_window: int):
+        self.window = window
+        self.index = -1
+        self.highs = deque()
+        self.lows = deque()
+        self.k_values = deque(maxlen=smooth_window)
+
+    def update(self, high: float, low: float, close: float) -> float | None:
+        self.index += 1
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((self.index, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((self.index, low))
+        while self.highs[0][0] <= self.index - self.window:
+            self.highs.popleft()
+        while self.lows[0][0] <= self.index - self.window:
+            self.lows.popleft()
+
+        if self.index < self.window - 1:
+            return None
+
+        smin, smax = self.lows[0][1], self.highs[0][1]
+        k = 100 * (close - smin) / (smax - smin) if smax != smin else float('nan')
+        self.k_values.append(k)
+        return k
+
+    @property
+    def k(self) -> float | None:
+        return self.k_values[-1] if self.k_values else None
+
+    @property
+    def signal(self) -> float | None:
+        if len(self.k_values) < self.k_values.maxlen or any(pd.isna(k) for k in self.k_values):
+            return None
+        return sum(self.k_values) / len(self.k_values)
+
+
+class IndicatorState(StreamState):
+    """
+    Stan wszystkich wskaźników używanych przy ocenie spółki. Aktualizacja ostatniej świecy (ta sama data) zastępuje ją
+    zamiast dopisywać nową.
+    """
+
+    def __init__(self, config: dict):
+        self.ema_short = EMAState(config['ema_short'])
+        self.ema_long = EMAState(config['ema_long'])
+        self.macd = MACDState(config['macd_slow'], config['macd_fast'], config['macd_sign'])
+        self.rsi = RSIState(config['rsi_window'])
+        self.atr = ATRState(config['atr_window'])
+        self.adx = ADXState(config['adx_window'])
+        self.stoch = StochState(config['so_window'], config['so_smooth_window'])
+        self.timestamp = None
+        self.close = None
+        self.impulse = None
+        self.previous_impulse = None
+        # (czas w ns, cena zamknięcia) z ostatnich RSI_PERIOD
+        self.close_history = deque()
+        # stan sprzed ostatniej świecy - pozwala ją zastąpić, None - ostatniej świecy nie można zastąpić
+        self.snapshot = None
+
+    @classmethod
+    def seed(cls, data: pd.DataFrame, config: dict) -> 'IndicatorState':
+        """
+        Metoda buduje stan na podstawie historii. Tylko ostatnia świeca (mogła jeszcze się nie zamknąć) może zostać
+        później zastąpiona.
+        :param data: DataFrame - dane z yfinance
+        :param config: dict - ustawienia wskaźników
+        :return: IndicatorState
+        """
+        state = cls(config)
+        state.extend(data)
+        return state
+
+    def extend(self, data: pd.DataFrame) -> None:
+        """
+        Metoda dodaje kolejne świece - ostatnią można później zastąpić.
+        :param data: DataFrame - dane z yfinance
+        :return: None
+        """
+        last = len(data) - 1
+        for i, (timestamp, high, low, close) in enumerate(zip(data.index, data['High'], data['Low'], data['Close'])):
+            self.update(high, low, close, timestamp, replaceable=i == last)
+
+    def advance(self, data: pd.DataFrame) -> bool:
+        """
+        Metoda dodaje świece od ostatniej świecy stanu (ta jest zastępowana - mogła się zmienić) do końca danych.
+        :param data: DataFrame - dane z yfinance obejmujące ostatnią świecę stanu
+        :return: bool - False, jeżeli dane nie zawierają ostatniej świecy stanu lub nie można jej zastąpić; stan
+                 należy wtedy zbudować od nowa (seed)
+        """
+        if self.timestamp is None or self.snapshot is None:
+            return False
+        last = pd.Timestamp(self.timestamp)
+        if last not in data.index:
+            return False
+        self.extend(data.loc[last:])
+        return True
+
+    def update(self, high: float, low: float, close: float, timestamp: pd.Timestamp | None = None,
+               replaceable: bool = True) -> None:
+        """
+        Metoda dodaje świecę (lub zastępuje ostatnią, jeżeli ma tę samą datę).
+        :param high: float - cena maksymalna
+        :param low: float - cena minimalna
+        :param close: float - cena zamknięcia
+        :param timestamp: Timestamp - data świecy
+        :param replaceable: bool - czy świeca może zostać zastąpiona kolejną aktualizacją; tylko wtedy zapisywany
+                            jest stan sprzed niej
+        :return: None
+        """
+        timestamp = None if timestamp is None else pd.Timestamp(timestamp)
+        if timestamp is not None and timestamp.isoformat() == self.timestamp:
+            if self.snapshot is None:
+                raise ValueError(f'Świeca {self.timestamp} nie może zostać zastąpiona')
+            self.__dict__.update(vars(self.snapshot))
+
+        self.snapshot = None
+        if replaceable:
+            self.snapshot = StreamState.from_dict(self.to_dict())
+
+        prev_ema, prev_hist = self.ema_short.current, self.macd.hist
+        ema, hist = self.ema_short.update(close), self.macd.update(close)
+        self.ema_long.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.adx.update(high, low, close)
+        self.stoch.update(high, low, close)
+        self.timestamp = None if timestamp is None else timestamp.isoformat()
+        self.close = close
+
+        if timestamp is not None:
+            self.close_history.append((timestamp.value, close))
+            while self.close_history[0][0] < timestamp.value - RSI_PERIOD.value:
+                self.close_history.popleft()
+
+        if None in (prev_ema, prev_hist, ema, hist):
+            return
+        self.impulse = (ema - prev_ema, hist - prev_hist)
+        if self.impulse[0] * self.impulse[1] >= 0:
+            self.previous_impulse = self.impulse
+
+    def impulse_signal(self) -> int | None:
+        """
+        Metoda określa sygnał impulse (jak stock_rate.impulse_signal).
+        :return: ilość punktów
+        """
+        if self.impulse is None or self.previous_impulse is None:
+            return None
+        return impulse_points(self.impulse, self.previous_impulse)
+
+    def value_zone(self) -> int | None:
+        """
+        Metoda sprawdza jak cena ma się do strefy wartości (jak stock_rate.value_zone).
+        :return: ilość punktów
+        """
+        if self.ema_short.current is None or self.ema_long.current is None:
+            return None
+        return value_zone_points(self.close, self.ema_short.current, self.ema_long.current)
+
+    def adx_level(self) -> int | None:
+        """
+        Metoda sprawdza siłę trendu (jak stock_rate.adx_level).
+        :return: ilość punktów
+        """
+        if self.adx.adx is None or self.adx.di_pos is None:
+            return None
+        return adx_points(self.adx.adx, self.adx.di_pos, self.adx.di_neg)
+
+    def adx_cross(self) -> bool | None:
+        """
+        Metoda sprawdza, czy ADX przeciął linię +DI lub -DI na ostatniej świecy.
+        :return: bool
+        """
+        previous = self.adx.previous
+        current = (self.adx.adx, self.adx.di_pos, self.adx.di_neg)
+        if None in previous or None in current:
+            return None
+        return any((previous[0] > previous[i]) != (current[0] > current[i]) for i in (1, 2))
+
+    def rsi_level(self) -> int | None:
+        """
+        Metoda sprawdza poziom RSI względem średniej i odchylenia z ostatnich RSI_PERIOD (jak stock_rate.rsi_level).
+        RSI jest liczony od nowa na cenach z tego okresu (około 130 świec dziennych), tak jak w ocenie spółki.
+        :return: ilość punktów
+        """
+        if not self.close_history:
+            return None
+        close = np.array([value for _, value in self.close_history], dtype=np.float64)
+        rsi = kernels.rsi(close, self.rsi.up.window)
+        rsi = rsi[~np.isnan(rsi)]
+        if len(rsi) < 2:
+            return None
+        avg_rsi, std_rsi, current_rsi = rsi.mean(), rsi.std(ddof=1), rsi[-1]
+
+        if current_rsi < avg_rsi - std_rsi:
+            return 2
+        elif avg_rsi + std_rsi > current_rsi > avg_rsi - std_rsi:
+            return 1
+        else:
+            return 0
+
+
+def config_key(config: dict) -> str:
+    """
+    Funkcja zwraca klucz ustawień wskaźników - chaty z tymi samymi ustawieniami korzystają z jednego stanu.
+    :param config: dict - ustawienia chatu
+    :return: str
+    """
+    return json.dumps({key: config[key] for key in STATE_KEYS}, sort_keys=True)
+
+
+def rating(state_d: IndicatorState, state_w: IndicatorState) -> dict[str, int | None]:
+    """
+    Funkcja wyznacza warunki oceny spółki ze stanów wskaźników (jak stock_rate.rating).
+    :param state_d: IndicatorState - stan danych dziennych
+    :param state_w: IndicatorState - stan danych tygodniowych
+    :return: dict warunek -> ilość punktów
+    """
+    return {
+        'impulse_w': state_w.impulse_signal(),
+        'impulse_d': state_d.impulse_signal(),
+        'value_zone': state_d.value_zone(),
+        'rsi': state_d.rsi_level(),
+        'adx': state_d.adx_level(),
+    }
@@ -0,0 +1,161 @@
+import os
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from ta import trend, momentum, volatility, volume
+
+import indicator_kernels as kernels
+import resample
+
+# 'ta' - implementacje z biblioteki ta, 'numpy' - kernele z indicator_kernels
+INDICATOR_BACKEND = os.environ.get('INDICATOR_BACKEND', 'ta')
+
+
+class IndicatorFrame:
+    """
+    Klasa udostępnia wskaźniki dla danych i ustawień. Każdy wskaźnik jest liczony raz - przy pierwszym użyciu - i
+    współdzielony przez wykresy oraz ocenę spółki.
+    """
+
+    def __init__(self, data: pd.DataFrame, config: dict, backend: str = INDICATOR_BACKEND):
+        """
+        :param data: DataFrame - dane do analizy z yfinance
+        :param config: dict - ustawienia wskaźników
+        :param backend: str - 'ta' lub 'numpy'; kernele NumPy wymagają danych bez braków, więc dla danych z NaN
+                        używana jest biblioteka ta
+        """
+        self.data = data
+        self.config = config
+        self.backend = backend
+        if backend == 'numpy' and data[['High', 'Low', 'Close', 'Volume']].isna().any(axis=None):
+            self.backend = 'ta'
+        self._windows = {}
+
+    def last(self, period: str) -> 'IndicatorFrame':
+        """
+        Metoda zwraca wskaźniki liczone tylko na ostatnim okresie danych.
+        :param period: str - okres, np. '182d'
+        :return: IndicatorFrame
+        """
+        if period not in self._windows:
+            data = self.data.loc[self.data.index[-1] - pd.Timedelta(period):]
+            self._windows[period] = IndicatorFrame(data, self.config, self.backend)
+        return self._windows[period]
+
+    def resampled(self, interval: str) -> 'IndicatorFrame':
+        """
+        Metoda zwraca wskaźniki liczone na świecach wyznaczonych z danych, np. tygodniowych z dziennych.
+        :param interval: str - jednostka czasu z resample.RULES
+        :return: IndicatorFrame
+        """
+        key = ('resampled', interval)
+        if key not in self._windows:
+            self._windows[key] = IndicatorFrame(resample.resample_ohlcv(self.data, interval), self.config, self.backend)
+        return self._windows[key]
+
+    def _column(self, name: str) -> np.ndarray:
+        return self.data[name].to_numpy(dtype=float)
+
+    def _series(self, values: np.ndarray) -> pd.Series:
+        return pd.Series(values, index=self.data.index)
+
+    def _ema(self, window: int) -> pd.Series:
+        if self.backend == 'numpy':
+            return self._series(kernels.ema_indicator(self._column('Close'), window))
+        return trend.ema_indicator(close=self.data['Close'], window=window)
+
+    @cached_property
+    def ema_short(self) -> pd.Series:
+        return self._ema(self.config['ema_short'])
+
+    @cached_property
+    def ema_long(self) -> pd.Series:
+        return self._ema(self.config['ema_long'])
+
+    @cached_property
+    def atr_ema(self) -> pd.Series:
+        return self._ema(self.config['atr_ema_window'])
+
+    @cached_property
+    def atr(self) -> pd.Series:
+        if self.backend == 'numpy':
+            return self._series(kernels.average_true_range(self._column('High'), self._column('Low'),
+                                                           self._column('Close'), self.config['atr_window']))
+        return volatility.average_true_range(high=self.data['High'], low=self.data['Low'], close=self.data['Close'],
+                                             window=self.config['atr_window'])
+
+    @cached_property
+    def a_d(self) -> pd.Series:
+        if self.backend == 'numpy':
+            return self._series(kernels.acc_dist_index(self._column('High'), self._column('Low'),
+                                                       self._column('Close'), self._column('Volume')))
+        return volume.acc_dist_index(high=self.data['High'], low=self.data['Low'], close=self.data['Close'],
+                                     volume=self.data['Volume'])
+
+    @cached_property
+    def rsi(self) -> pd.Series:
+        if self.backend == 'numpy':
+            return self._series(kernels.rsi(self._column('Close'), self.config['rsi_window']))
+        return momentum.rsi(close=self.data['Close'], window=self.config['rsi_window'])
+
+    @cached_property
+    def _stoch(self) -> tuple[pd.Series, pd.Series]:
+        if self.backend == 'numpy':
+            so, so_signal = kernels.stoch(self._column('High'), self._column('Low'), self._column('Close'),
+                                          self.config['so_window'], self.config['so_smooth_window'])
+            return self._series(so), self._series(so_signal)
+        indicator = momentum.StochasticOscillator(high=self.data['High'], low=self.data['Low'],
+                                                  close=self.data['Close'], window=self.config['so_window'],
+                                                  smooth_window=self.config['so_smooth_window'])
+        return indicator.stoch(), indicator.stoch_signal()
+
+    @property
+    def so(self) -> pd.Series:
+        return self._stoch[0]
+
+    @property
+    def so_signal(self) -> pd.Series:
+        return self._stoch[1]
+
+    @cached_property
+    def _adx(self) -> tuple[pd.Series, pd.Series, pd.Series]:
+        if self.backend == 'numpy':
+            return tuple(self._series(values) for values in kernels.adx(
+                self._column('High'), self._column('Low'), self._column('Close'), self.config['adx_window']))
+        indicator = trend.ADXIndicator(high=self.data['High'], low=self.data['Low'], close=self.data['Close'],
+                                       window=self.config['adx_window'])
+        return indicator.adx(), indicator.adx_pos(), indicator.adx_neg()
+
+    @property
+    def adx(self) -> pd.Series:
+        return self._adx[0]
+
+    @property
+    def adx_pos(self) -> pd.Series:
+        return self._adx[1]
+
+    @property
+    def adx_neg(self) -> pd.Series:
+        return self._adx[2]
+
+    @cached_property
+    def _macd(self) -> tuple[pd.Series, pd.Series, pd.Series]:
+        if self.backend == 'numpy':
+            return tuple(self._series(values) for values in kernels.macd(
+                self._column('Close'), self.config['macd_slow'], self.config['macd_fast'], self.config['macd_sign']))
+        indicator = trend.MACD(close=self.data['Close'], window_slow=self.config['macd_slow'],
+                               window_fast=self.config['macd_fast'], window_sign=self.config['macd_sign'])
+        return indicator.macd(), indicator.macd_signal(), indicator.macd_diff()
+
+    @property
+    def macd(self) -> pd.Series:
+        return self._macd[0]
+
+    @property
+    def macd_signal(self) -> pd.Series:
+        return self._macd[1]
+
+    @property
+    def macd_diff(self) -> pd.Series:
+        return self._macd[2]
@@ -0,0 +1,124 @@
+"""
+Godziny sesji giełd - dane pobrane po zamknięciu sesji pozostają aktualne aż do otwarcia kolejnej (nowe świece nie
+powstają). Giełda jest rozpoznawana po sufiksie symbolu, jak w Yahoo (np. CDR.WA); symbole bez sufiksu to giełdy
+amerykańskie. Dla nieznanych sufiksów, kryptowalut i walut godziny sesji nie są znane.
+"""
+import re
+import time
+from datetime import date, datetime, time as day_time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMartinLutherKingJr,
+                                    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday,
+                                    sunday_to_monday)
+
+# czas po zamknięciu sesji, po którym dane ostatniej świecy są ostateczne
+SETTLE = timedelta(minutes=15)
+
+# kryptowaluty (BTC-USD) i waluty (EURUSD=X) są notowane bez przerw
+_ALWAYS_OPEN = re.compile(r'=|-[A-Z]{3}$')
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Dni wolne NYSE i Nasdaq (bez jednorazowych zamknięć).
+    """
+    rules = [
+        # Nowy Rok w sobotę nie jest odbierany w piątek
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class Session(NamedTuple):
+    tz: str
+    open: day_time
+    close: day_time
+    # dni wolne poza weekendami, None - nieznane
+    holidays: type[AbstractHolidayCalendar] | None = None
+
+
+# sufiks symbolu -> sesja (zamknięcie wraz z fazą dogrywki)
+SESSIONS = {
+    '': Session('America/New_York', day_time(9, 30), day_time(16, 0), NYSEHolidayCalendar),
+    'WA': Session('Europe/Warsaw', day_time(9, 0), day_time(17, 5)),
+    'L': Session('Europe/London', day_time(8, 0), day_time(16, 35)),
+    'DE': Session('Europe/Berlin', day_time(9, 0), day_time(17, 35)),
+    'PA': Session('Europe/Paris', day_time(9, 0), day_time(17, 35)),
+    'AS': Session('Europe/Amsterdam', day_time(9, 0), day_time(17, 35)),
+}
+
+
+def session(symbol: str) -> Session | None:
+    """
+    Funkcja zwraca sesję giełdy, na której notowany jest symbol.
+    :param symbol: str - symbol giełdowy
+    :return: Session lub None, jeżeli godziny sesji nie są znane
+    """
+    symbol = symbol.upper()
+    if _ALWAYS_OPEN.search(symbol):
+        return None
+    suffix = symbol.rsplit('.', 1)[1] if '.' in symbol else ''
+    return SESSIONS.get(suffix)
+
+
+@lru_cache
+def _holidays(calendar: type[AbstractHolidayCalendar]) -> frozenset[date]:
+    return frozenset(day.date() for day in calendar().holidays(start='2000-01-01', end='2100-12-31'))
+
+
+def _is_session_day(day: date, market: Session) -> bool:
+    return day.weekday() < 5 and (market.holidays is None or day not in _holidays(market.holidays))
+
+
+def is_trading_day(symbol: str = '', timestamp: float | None = None) -> bool:
+    """
+    Funkcja sprawdza, czy w dniu podanej chwili (w strefie czasowej giełdy) odbywa się sesja.
+    :param symbol: str - symbol giełdowy, domyślnie giełdy amerykańskie
+    :param timestamp: float - chwila (s od epoki), domyślnie teraz
+    :return: bool - True również dla giełd o nieznanych godzinach sesji
+    """
+    market = session(symbol)
+    if market is None:
+        return True
+    moment = pd.Timestamp(time.time() if timestamp is None else timestamp, unit='s', tz='UTC')
+    return _is_session_day(moment.tz_convert(market.tz).date(), market)
+
+
+def final_until(fetched_at: float, symbol: str) -> float | None:
+    """
+    Funkcja zwraca chwilę, do której dane pobrane poza sesją pozostają aktualne - otwarcie kolejnej sesji.
+    :param fetched_at: float - czas pobrania danych (s od epoki)
+    :param symbol: str - symbol giełdowy
+    :return: float (s od epoki) lub None, jeżeli dane pobrano w trakcie sesji lub godziny sesji nie są znane
+    """
+    market = session(symbol)
+    if market is None:
+        return None
+
+    fetched = pd.Timestamp(fetched_at, unit='s', tz='UTC').tz_convert(market.tz)
+    day = fetched.date()
+
+    def at(moment: day_time) -> pd.Timestamp:
+        return pd.Timestamp(datetime.combine(day, moment)).tz_localize(market.tz)
+
+    if _is_session_day(day, market):
+        if at(market.open) <= fetched < at(market.close) + SETTLE:
+            return None
+        if fetched < at(market.open):
+            return at(market.open).timestamp()
+
+    day += timedelta(days=1)
+    while not _is_session_day(day, market):
+        day += timedelta(days=1)
+    return at(market.open).timestamp()
@@ -1,6 +1,8 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 import yaml
 
+import image_encoding
+
 main_markup = InlineKeyboardMarkup([
     [
         InlineKeyboardButton(text="Ustawienia", callback_data="settings")
@@ -28,9 +30,29 @@ settings_markup = InlineKeyboardMarkup([
     ],
     [
         InlineKeyboardButton(text='Motyw >', callback_data='cb_mode')
+    ],
+    [
+        InlineKeyboardButton(text='Format obrazów >', callback_data='cb_image')
+    ],
+    [
+        InlineKeyboardButton(text='Album wykresów wł./wył.', callback_data='album')
     ]
 ])
 
+image_format_names = {
+    image_encoding.DEFAULT: 'Domyślny',
+    'png': 'PNG',
+    'png8': 'PNG - paleta 256 kolorów (mniejszy plik)',
+    'jpeg': 'JPEG',
+    'webp': 'WebP',
+}
+
+image_markup = InlineKeyboardMarkup(
+    [[InlineKeyboardButton(text=name, callback_data=f'image_{image_format}')]
+     for image_format, name in image_format_names.items()]
+    + [[InlineKeyboardButton(text='< Powrót', callback_data='set_return')]]
+)
+
 atr_markup = InlineKeyboardMarkup([
     [
         InlineKeyboardButton(text='Zmień okres średniej >', callback_data='atr_ema_window')
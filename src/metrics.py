@@ -0,0 +1,227 @@
+"""
+Pomiary czasu etapów obsługi komend (pobieranie danych, wskaźniki, rysowanie, kodowanie PNG, wysyłka). Czasy są
+zbierane w histogramach z etykietami komendy, interwału i wykresu, udostępnianych w formacie tekstowym Prometheusa
+(/metrics) oraz opcjonalnie zapisywanych w logach jako JSON. W procesach rysujących pomiary są zbierane lokalnie
+(collect) i przekazywane do procesu bota razem z wykresem (record).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# port endpointu /metrics, 0 - wyłączony
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+# zapis każdego pomiaru w logach
+METRICS_LOG = os.environ.get('METRICS_LOG', '0') == '1'
+
+METRIC_NAME = 'stockbot_stage_seconds'
+LABELS = ('command', 'interval', 'chart')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger(__name__)
+
+# etykiety bieżącego zapytania (komenda, interwał, wykres) dodawane do każdego pomiaru
+_labels: ContextVar[dict] = ContextVar('metrics_labels', default={})
+# w procesie rysującym - lista pomiarów do przekazania do procesu bota
+_collector: list | None = None
+
+
+class Histogram:
+    """
+    Histogram o stałych przedziałach.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Klasa przechowuje histogramy etapów - po jednym na każdy zestaw etykiet.
+    """
+
+    def __init__(self):
+        self._histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, labels: dict) -> None:
+        """
+        Metoda dodaje pomiar.
+        :param stage: str - etap
+        :param seconds: float - czas trwania
+        :param labels: dict - etykiety
+        :return: None
+        """
+        key = (stage, *(str(labels.get(label, '')) for label in LABELS))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """
+        Metoda zwraca histogramy w formacie tekstowym Prometheusa.
+        :return: str
+        """
+        lines = [f'# HELP {METRIC_NAME} Czas etapów obsługi komend.', f'# TYPE {METRIC_NAME} histogram']
+        with self._lock:
+            for key, histogram in sorted(self._histograms.items()):
+                labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(('stage', *LABELS), key))
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{METRIC_NAME}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def observe(stage: str, seconds: float, **labels) -> None:
+    """
+    Funkcja zapisuje pomiar etapu (wraz z etykietami bieżącego zapytania).
+    :param stage: str - etap
+    :param seconds: float - czas trwania
+    :param labels: etykiety pomiaru
+    :return: None
+    """
+    labels = {**_labels.get(), **labels}
+    if _collector is not None:
+        _collector.append((stage, seconds, labels))
+        return
+
+    registry.observe(stage, seconds, labels)
+    if METRICS_LOG:
+        logger.info(json.dumps({'stage': stage, 'seconds': round(seconds, 6), **labels}))
+
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    """
+    Funkcja mierzy czas bloku kodu.
+    :param stage: str - etap
+    :param labels: etykiety pomiaru
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def context(**labels) -> Iterator[None]:
+    """
+    Funkcja ustawia etykiety dla wszystkich pomiarów w bloku (również w zadaniach asyncio z niego uruchomionych).
+    :param labels: etykiety
+    """
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def timed(command: str) -> Callable:
+    """
+    Dekorator mierzy całkowity czas obsługi komendy.
+    :param command: str - nazwa komendy (etykieta dla wszystkich pomiarów w trakcie jej obsługi)
+    :return: Callable
+    """
+    def decorator(handler: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            with context(command=command), span('command'):
+                return await handler(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Stopwatch:
+    """
+    Klasa mierzy kolejne etapy funkcji - każdy etap trwa od poprzedniego wywołania lap (lub utworzenia obiektu).
+    """
+
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        observe(stage, now - self.last)
+        self.last = now
+
+
+@contextmanager
+def collect() -> Iterator[list]:
+    """
+    Funkcja zbiera pomiary z bloku do listy zamiast zapisywać je w histogramach - w procesach rysujących.
+    :return: lista (etap, czas, etykiety)
+    """
+    global _collector
+    previous, _collector = _collector, []
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def record(spans: list[tuple[str, float, dict]]) -> None:
+    """
+    Funkcja zapisuje pomiary zebrane w innym procesie.
+    :param spans: lista (etap, czas, etykiety)
+    :return: None
+    """
+    for stage, seconds, labels in spans:
+        observe(stage, seconds, **labels)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def serve(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """
+    Funkcja uruchamia endpoint /metrics w osobnym wątku.
+    :param port: int - port
+    :param host: str - adres
+    :return: ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import market_hours
+import yahoo
+
+CACHE_DIR = os.environ.get('OHLCV_CACHE_DIR', 'cache')
+
+# po jakim czasie (w sekundach) dane z cache wymagają uzupełnienia o nowe świece
+CACHE_TTL = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 900, '60m': 900, '1d': 900, '1wk': 900, '1mo': 900}
+
+
+class CacheEntry(NamedTuple):
+    data: pd.DataFrame
+    fetched_at: float
+    start: pd.Timestamp | None  # początek pobranego zakresu, None - pełna historia
+
+
+def cache_path(symbol: str, interval: str, directory: str | None = None) -> str:
+    """
+    Funkcja zwraca ścieżkę pliku cache dla symbolu i interwału.
+    :param symbol: str - symbol giełdowy
+    :param interval: str - jednostka czasu
+    :param directory: str - katalog cache, domyślnie CACHE_DIR
+    :return: str
+    """
+    safe_symbol = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in symbol.upper())
+    return os.path.join(directory or CACHE_DIR, f'{safe_symbol}_{interval}.npz')
+
+
+def load(symbol: str, interval: str, directory: str | None = None) -> CacheEntry | None:
+    """
+    Funkcja wczytuje dane z cache.
+    :param symbol: str - symbol giełdowy
+    :param interval: str - jednostka czasu
+    :param directory: str - katalog cache, domyślnie CACHE_DIR
+    :return: CacheEntry lub None, jeżeli brak danych w cache
+    """
+    try:
+        with np.load(cache_path(symbol, interval, directory), allow_pickle=False) as file:
+            columns = [str(c) for c in file['columns']]
+            index = pd.to_datetime(file['index'], unit='ns')
+            tz = str(file['tz'])
+            if tz:
+                index = index.tz_localize('UTC').tz_convert(tz)
+            data = pd.DataFrame({c: file[f'col_{i}'] for i, c in enumerate(columns)}, index=index)
+            fetched_at = float(file['fetched_at'])
+            start = pd.Timestamp(int(file['start'])) if int(file['start']) >= 0 else None
+    except (OSError, KeyError, ValueError):
+        return None
+
+    data.index.name = 'Date'
+    # pliki zapisane wcześniej przez Ticker.history mogą mieć świece dzienne w strefie czasowej giełdy
+    return CacheEntry(yahoo.normalize(data, interval), fetched_at, start)
+
+
+def save(symbol: str, interval: str, data: pd.DataFrame, start: pd.Timestamp | None = None,
+         directory: str | None = None) -> None:
+    """
+    Funkcja zapisuje dane do cache (jeden plik kolumnowy na symbol i interwał).
+    :param symbol: str - symbol giełdowy
+    :param interval: str - jednostka czasu
+    :param data: DataFrame - dane z yfinance
+    :param start: Timestamp - początek pobranego zakresu, None - pełna historia
+    :param directory: str - katalog cache, domyślnie CACHE_DIR
+    :return: None
+    """
+    os.makedirs(directory or CACHE_DIR, exist_ok=True)
+    path = cache_path(symbol, interval, directory)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    index = data.index
+    tz = str(index.tz) if index.tz is not None else ''
+    if tz:
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    arrays = {f'col_{i}': data[c].to_numpy() for i, c in enumerate(data.columns)}
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, index=index.asi8, tz=np.array(tz), columns=np.array([str(c) for c in data.columns]),
+                 fetched_at=np.array(time.time()), start=np.array(-1 if start is None else start.value), **arrays)
+    os.replace(tmp_path, path)
+
+
+def covers(entry: CacheEntry, start: pd.Timestamp | None) -> bool:
+    """
+    Funkcja sprawdza, czy dane w cache obejmują zakres od podanej daty.
+    :param entry: CacheEntry - dane z cache
+    :param start: Timestamp - początek wymaganego zakresu, None - pełna historia
+    :return: bool
+    """
+    return entry.start is None or (start is not None and entry.start <= start)
+
+
+def since(data: pd.DataFrame, start: pd.Timestamp | None) -> pd.DataFrame:
+    """
+    Funkcja zwraca dane od podanej daty (niezależnie od strefy czasowej indeksu).
+    :param data: DataFrame - dane z yfinance
+    :param start: Timestamp - data początkowa, None - pełna historia
+    :return: DataFrame
+    """
+    if start is None:
+        return data
+    if data.index.tz is not None:
+        start = start.tz_localize('UTC')
+    return data.loc[start:]
+
+
+def data_start(data: pd.DataFrame) -> pd.Timestamp:
+    """
+    Funkcja zwraca datę pierwszej świecy jako czas UTC bez strefy (jak początek zakresu w cache).
+    :param data: DataFrame - dane z yfinance
+    :return: Timestamp
+    """
+    first = data.index[0]
+    if first.tz is not None:
+        first = first.tz_convert('UTC').tz_localize(None)
+    return first
+
+
+def is_fresh(fetched_at: float, interval: str, symbol: str | None = None) -> bool:
+    """
+    Funkcja sprawdza, czy dane w cache nie wymagają jeszcze uzupełnienia. Dane pobrane po zamknięciu sesji są aktualne
+    aż do otwarcia kolejnej - pierwsze zapytanie dnia nie pobiera ich ponownie.
+    :param fetched_at: float - czas pobrania danych
+    :param interval: str - jednostka czasu
+    :param symbol: str - symbol giełdowy (wyznacza godziny sesji), None - tylko CACHE_TTL
+    :return: bool
+    """
+    now = time.time()
+    if now - fetched_at < CACHE_TTL.get(interval, 0):
+        return True
+    until = market_hours.final_until(fetched_at, symbol) if symbol is not None else None
+    return until is not None and now < until
+
+
+def merge(cached: pd.DataFrame, update: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    Funkcja dokleja nowe świece do danych z cache. Pierwsza świeca aktualizacji musi pokrywać się z przedostatnią
+    świecą z cache - jeżeli ceny się różnią (np. po korekcie o dywidendę lub split), zwracane jest None i dane
+    należy pobrać w całości.
+    :param cached: DataFrame - dane z cache
+    :param update: DataFrame - nowe dane, pobrane od przedostatniej świecy z cache
+    :return: DataFrame lub None
+    """
+    if update.empty or len(cached) < 2 or update.index[0] != cached.index[-2]:
+        return None
+
+    if set(update.columns) != set(cached.columns):
+        return None
+
+    if not np.isclose(update['Close'].iloc[0], cached['Close'].iloc[-2], rtol=1e-6):
+        return None
+
+    return pd.concat([cached.iloc[:-2], update[cached.columns]])
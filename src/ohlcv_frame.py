@@ -0,0 +1,133 @@
+"""
+Zwarta reprezentacja danych OHLCV - tylko kolumny potrzebne do analizy, ceny jako float32, czas jako int64 (ns od
+epoki, UTC) - w jednym ciągłym buforze. Bufor może zostać opublikowany jako plik mapowany w pamięci (domyślnie
+w /dev/shm), do którego procesy rysujące wykresy dołączają bez serializacji i kopiowania danych - wszystkie procesy
+korzystają z tych samych stron pamięci.
+"""
+import contextlib
+import os
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+COLUMNS = (*PRICE_COLUMNS, 'Volume')
+
+# katalog publikowanych danych - /dev/shm jest w pamięci, więc pliki nie trafiają na dysk
+SHARED_OHLCV_DIR = os.environ.get('SHARED_OHLCV_DIR',
+                                  '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+
+
+class SharedOhlcv(NamedTuple):
+    """
+    Uchwyt opublikowanych danych - przekazywany do procesów roboczych zamiast danych.
+    """
+    path: str
+    rows: int
+    tz: str
+
+
+class OhlcvFrame:
+    """
+    Klasa przechowuje dane OHLCV w jednym ciągłym buforze: czas (int64), wolumen (float64, może zawierać braki)
+    i ceny (float32, kolumna po kolumnie). Kolumny są widokami bufora.
+    """
+
+    def __init__(self, buffer: np.ndarray, rows: int, tz: str = ''):
+        """
+        :param buffer: ndarray - bufor bajtów (uint8) o rozmiarze nbytes(rows)
+        :param rows: int - liczba świec
+        :param tz: str - strefa czasowa indeksu, '' - indeks bez strefy
+        """
+        self.buffer = buffer
+        self.rows = rows
+        self.tz = tz
+        self.index = np.frombuffer(buffer, dtype=np.int64, count=rows)
+        self.volume = np.frombuffer(buffer, dtype=np.float64, count=rows, offset=8 * rows)
+        self.prices = np.frombuffer(buffer, dtype=np.float32, count=4 * rows, offset=16 * rows).reshape(4, rows)
+
+    @staticmethod
+    def nbytes(rows: int) -> int:
+        """
+        Metoda zwraca rozmiar bufora dla podanej liczby świec.
+        :param rows: int - liczba świec
+        :return: int
+        """
+        return rows * (8 + 8 + 4 * 4)
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'OhlcvFrame':
+        """
+        Metoda tworzy zwartą reprezentację danych - pozostałe kolumny (np. Adj Close) są pomijane.
+        :param data: DataFrame - dane z kolumnami Open, High, Low, Close i Volume
+        :return: OhlcvFrame
+        """
+        index = data.index
+        tz = str(index.tz) if index.tz is not None else ''
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        rows = len(data)
+        frame = cls(np.empty(cls.nbytes(rows), dtype=np.uint8), rows, tz)
+        frame.index[:] = index.asi8
+        frame.volume[:] = data['Volume'].to_numpy(dtype=np.float64)
+        for i, column in enumerate(PRICE_COLUMNS):
+            frame.prices[i] = data[column].to_numpy(dtype=np.float32)
+        return frame
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Metoda zwraca dane jako DataFrame - kolumny są widokami bufora, bez kopiowania.
+        :return: DataFrame
+        """
+        index = pd.DatetimeIndex(self.index.view('datetime64[ns]'), name='Date')
+        if self.tz:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        columns = {column: self.prices[i] for i, column in enumerate(PRICE_COLUMNS)}
+        return pd.DataFrame({**columns, 'Volume': self.volume}, index=index, copy=False)
+
+    def publish(self) -> SharedOhlcv:
+        """
+        Metoda zapisuje bufor jako plik mapowany w pamięci. Plik należy usunąć funkcją release.
+        :return: SharedOhlcv - uchwyt danych
+        """
+        fd, path = tempfile.mkstemp(prefix='ohlcv-', suffix='.bin', dir=SHARED_OHLCV_DIR)
+        with os.fdopen(fd, 'wb') as file:
+            file.write(self.buffer.data)
+        return SharedOhlcv(path, self.rows, self.tz)
+
+    @classmethod
+    def attach(cls, handle: SharedOhlcv) -> 'OhlcvFrame':
+        """
+        Metoda dołącza do opublikowanych danych. Strony pliku są współdzielone przez procesy; zapis do kolumn
+        (kopia przy zapisie) nie zmienia danych innych procesów.
+        :param handle: SharedOhlcv - uchwyt danych
+        :return: OhlcvFrame
+        """
+        if handle.rows == 0:
+            return cls(np.empty(0, dtype=np.uint8), 0, handle.tz)
+        buffer = np.memmap(handle.path, dtype=np.uint8, mode='c', shape=(cls.nbytes(handle.rows),))
+        return cls(buffer, handle.rows, handle.tz)
+
+
+def compact(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Funkcja zostawia tylko kolumny OHLCV i zapisuje ceny jako float32 - dane bez zmian, jeżeli są już zwarte.
+    :param data: DataFrame - dane z yfinance
+    :return: DataFrame
+    """
+    if list(data.columns) == list(COLUMNS) and all(data[c].dtype == np.float32 for c in PRICE_COLUMNS):
+        return data
+    return data[list(COLUMNS)].astype({column: np.float32 for column in PRICE_COLUMNS})
+
+
+def release(handle: SharedOhlcv) -> None:
+    """
+    Funkcja usuwa opublikowane dane. Procesy, które już do nich dołączyły, mogą z nich dalej korzystać.
+    :param handle: SharedOhlcv - uchwyt danych
+    :return: None
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(handle.path)
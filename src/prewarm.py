@@ -0,0 +1,81 @@
+"""
+Wstępne pobieranie danych i rysowanie wykresów dla najczęściej sprawdzanych symboli. Bot zlicza zapytania o symbol,
+interwał i okres, a zadania JobQueue odświeżają w tle dane (oraz wykresy /review i ocenę spółki dla ustawień
+domyślnych) najpopularniejszych z nich - po zamknięciu sesji oraz, dla każdego interwału śróddziennego, co czas
+ważności jego danych w cache. Dane pobrane po zamknięciu sesji są aktualne do otwarcia kolejnej (market_hours), więc
+pierwsze zapytanie dnia korzysta z cache.
+"""
+import os
+from collections import Counter
+from datetime import time, timezone
+
+from ohlcv_cache import CACHE_TTL
+
+# liczba odświeżanych zapytań
+PREWARM_TOP = int(os.environ.get('PREWARM_TOP', 20))
+# godzina (UTC) odświeżania po zamknięciu sesji
+PREWARM_TIME = time.fromisoformat(os.environ.get('PREWARM_TIME', '21:30')).replace(tzinfo=timezone.utc)
+# minimalny odstęp (s) między odświeżeniami interwału śróddziennego (domyślnie co CACHE_TTL interwału), 0 - wyłączone
+PREWARM_INTERVAL = int(os.environ.get('PREWARM_INTERVAL', 60))
+# motywy, w których rysowane są wykresy /review; bez zmiennej - motyw domyślny, pusta - tylko dane
+PREWARM_MODES = None if 'PREWARM_MODES' not in os.environ else \
+    [m for m in os.environ['PREWARM_MODES'].split(',') if m]
+# mnożnik liczników przy każdym odświeżeniu po sesji - starsze zapytania tracą znaczenie
+PREWARM_DECAY = 0.5
+
+INTRADAY_INTERVALS = ('1m', '2m', '5m', '15m', '30m', '60m')
+
+# komendy, których dane są odświeżane
+REVIEW = 'review'
+RATE = 'rate'
+
+
+class Popularity:
+    """
+    Klasa zlicza zapytania o symbol, interwał i okres.
+    """
+
+    def __init__(self, decay: float = PREWARM_DECAY):
+        self.decay = decay
+        self._counts: Counter[tuple[str, str, str, str]] = Counter()
+
+    def record(self, command: str, symbol: str, interval: str, period: str) -> None:
+        """
+        Metoda zlicza zapytanie.
+        :param command: str - REVIEW lub RATE
+        :param symbol: str - symbol giełdowy
+        :param interval: str - jednostka czasu
+        :param period: str - okres analizy
+        :return: None
+        """
+        self._counts[command, symbol.upper(), interval, period] += 1
+
+    def top(self, n: int = PREWARM_TOP, intervals: tuple[str, ...] | None = None) -> list[tuple[str, str, str, str]]:
+        """
+        Metoda zwraca najczęstsze zapytania.
+        :param n: int - liczba zapytań
+        :param intervals: tuple - tylko zapytania o podane interwały, None - wszystkie
+        :return: lista (komenda, symbol, interwał, okres)
+        """
+        return [key for key, _ in self._counts.most_common() if intervals is None or key[2] in intervals][:n]
+
+    def age(self) -> None:
+        """
+        Metoda zmniejsza liczniki i usuwa zapytania, które przestały być sprawdzane.
+        :return: None
+        """
+        self._counts = Counter({key: count * self.decay for key, count in self._counts.items()
+                                if count * self.decay >= 0.5})
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+def intraday_schedule() -> dict[str, int]:
+    """
+    Funkcja zwraca odstępy odświeżania interwałów śróddziennych - zgodne z czasem ważności ich danych w cache.
+    :return: dict interwał -> odstęp (s); pusty, jeżeli odświeżanie jest wyłączone
+    """
+    if not PREWARM_INTERVAL:
+        return {}
+    return {interval: max(CACHE_TTL[interval], PREWARM_INTERVAL) for interval in INTRADAY_INTERVALS}
@@ -0,0 +1,37 @@
+"""
+Świece tygodniowe i miesięczne wyznaczane lokalnie ze świec dziennych - bez osobnego pobierania z Yahoo. Tydzień
+zaczyna się w poniedziałek, a miesiąc pierwszego dnia (w strefie czasowej giełdy, jak w danych z Yahoo); świeca jest
+oznaczona datą początku okresu.
+"""
+import pandas as pd
+
+# reguły pandas dla interwałów wyznaczanych z danych dziennych
+RULES = {'1wk': 'W-MON', '1mo': 'MS'}
+
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+
+
+def period_start(interval: str, timestamp: pd.Timestamp) -> pd.Timestamp:
+    """
+    Funkcja zwraca początek tygodnia lub miesiąca, w którym leży podana data.
+    :param interval: str - '1wk' lub '1mo'
+    :param timestamp: Timestamp - data
+    :return: Timestamp
+    """
+    timestamp = timestamp.normalize()
+    if interval == '1wk':
+        return timestamp - pd.Timedelta(days=timestamp.dayofweek)
+    return timestamp.replace(day=1)
+
+
+def resample_ohlcv(data: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Funkcja składa świece dzienne w świece tygodniowe lub miesięczne (otwarcie - pierwsze, maksimum, minimum,
+    zamknięcie - ostatnie, wolumen - suma). Okresy bez notowań są pomijane.
+    :param data: DataFrame - dane dzienne
+    :param interval: str - '1wk' lub '1mo'
+    :return: DataFrame
+    """
+    aggregations = {column: how for column, how in AGGREGATIONS.items() if column in data.columns}
+    resampled = data.resample(RULES[interval], closed='left', label='left').agg(aggregations)
+    return resampled.dropna(subset=['Close'])[list(data.columns)]
@@ -0,0 +1,127 @@
+"""
+Kolejka zapytań wymagających pobrania danych, liczenia wskaźników i rysowania (/review, /rate, /scan, /alert).
+Ogranicza liczbę zapytań obsługiwanych równocześnie - łącznie i w jednym chacie. Pozostałe czekają w ograniczonej kolejce, z której
+chaty są obsługiwane po kolei (round-robin), więc jeden chat nie blokuje innych. Gdy kolejka jest pełna, zapytanie
+jest odrzucane (Busy) - przy nagłym wzroście ruchu rośnie czas oczekiwania, a nie zużycie pamięci.
+"""
+import asyncio
+import os
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+
+import metrics
+
+# liczba zapytań obsługiwanych równocześnie
+MAX_REQUESTS = int(os.environ.get('MAX_REQUESTS', 8))
+MAX_REQUESTS_PER_CHAT = int(os.environ.get('MAX_REQUESTS_PER_CHAT', 1))
+# liczba zapytań czekających w kolejce
+REQUEST_QUEUE = int(os.environ.get('REQUEST_QUEUE', 64))
+REQUEST_QUEUE_PER_CHAT = int(os.environ.get('REQUEST_QUEUE_PER_CHAT', 4))
+
+
+class Busy(Exception):
+    """
+    Kolejka zapytań jest pełna.
+    """
+
+
+class Scheduler:
+    """
+    Klasa przydziela miejsca do obsługi zapytań - w kolejności zgłoszeń w obrębie chatu i po kolei między chatami.
+    """
+
+    def __init__(self, limit: int = MAX_REQUESTS, per_chat: int = MAX_REQUESTS_PER_CHAT,
+                 queue_size: int = REQUEST_QUEUE, queue_per_chat: int = REQUEST_QUEUE_PER_CHAT):
+        self.limit = limit
+        self.per_chat = per_chat
+        self.queue_size = queue_size
+        self.queue_per_chat = queue_per_chat
+        self.running = 0
+        self.queued = 0
+        self._active: Counter[Hashable] = Counter()
+        # chaty w kolejności obsługi - chat, któremu przydzielono miejsce, trafia na koniec
+        self._waiting: OrderedDict[Hashable, deque[asyncio.Future]] = OrderedDict()
+
+    @asynccontextmanager
+    async def slot(self, chat: Hashable) -> AsyncIterator[None]:
+        """
+        Metoda czeka na miejsce do obsługi zapytania i zwalnia je po wyjściu z bloku.
+        :param chat: ID chatu
+        :raises Busy: kolejka (łączna lub chatu) jest pełna
+        """
+        with metrics.span('queue'):
+            await self.acquire(chat)
+        try:
+            yield
+        finally:
+            self.release(chat)
+
+    async def acquire(self, chat: Hashable) -> None:
+        """
+        Metoda czeka na miejsce do obsługi zapytania.
+        :param chat: ID chatu
+        :return: None
+        """
+        if chat not in self._waiting and self._can_run(chat):
+            self._start(chat)
+            return
+
+        waiting = self._waiting.get(chat, ())
+        if self.queued >= self.queue_size or len(waiting) >= self.queue_per_chat:
+            raise Busy
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(chat, deque()).append(future)
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # miejsce zostało przydzielone tuż przed anulowaniem
+                self.release(chat)
+            else:
+                self._remove(chat, future)
+            raise
+
+    def release(self, chat: Hashable) -> None:
+        """
+        Metoda zwalnia miejsce i przydziela je kolejnym czekającym zapytaniom.
+        :param chat: ID chatu
+        :return: None
+        """
+        self.running -= 1
+        self._active[chat] -= 1
+        if not self._active[chat]:
+            del self._active[chat]
+        self._dispatch()
+
+    def _can_run(self, chat: Hashable) -> bool:
+        return self.running < self.limit and self._active[chat] < self.per_chat
+
+    def _start(self, chat: Hashable) -> None:
+        self.running += 1
+        self._active[chat] += 1
+
+    def _remove(self, chat: Hashable, future: asyncio.Future) -> None:
+        waiting = self._waiting[chat]
+        waiting.remove(future)
+        self.queued -= 1
+        if not waiting:
+            del self._waiting[chat]
+
+    def _dispatch(self) -> None:
+        while self.running < self.limit:
+            chat = next((chat for chat in self._waiting if self._can_run(chat)), None)
+            if chat is None:
+                return
+
+            waiting = self._waiting[chat]
+            future = waiting.popleft()
+            self.queued -= 1
+            if waiting:
+                self._waiting.move_to_end(chat)
+            else:
+                del self._waiting[chat]
+            self._start(chat)
+            future.set_result(None)
@@ -0,0 +1,199 @@
+"""
+Skaner - ocena wielu spółek naraz. Dane są pobierane paczkami symboli (jedno zapytanie do Yahoo na paczkę),
+a każda paczka jest oceniana i zwalniana przed pobraniem kolejnej, więc zużycie pamięci zależy od rozmiaru paczki,
+a nie od długości listy.
+"""
+import os
+import time
+from typing import NamedTuple
+
+import pandas as pd
+import yaml
+
+import data_provider
+import fetch_window
+import ohlcv_cache
+import ohlcv_frame
+import resample
+from indicators import IndicatorFrame
+from stock_rate import rating
+
+SCAN_BATCH_SIZE = int(os.environ.get('SCAN_BATCH_SIZE', 50))
+# czas, po którym kolejne paczki nie są już pobierane (s)
+SCAN_TIMEOUT = float(os.environ.get('SCAN_TIMEOUT', 300))
+SCAN_MAX_SYMBOLS = 500
+# okres danych potrzebny do oceny (jak w /rate)
+SCAN_PERIOD = '1y'
+
+WATCHLISTS_FILE = 'watchlists.yml'
+
+# skróty warunków oceny w tabeli
+CONDITION_LABELS = {'impulse_w': 'IT', 'impulse_d': 'ID', 'value_zone': 'SW', 'rsi': 'RSI', 'adx': 'ADX'}
+
+# limit długości wiadomości w Telegramie
+MESSAGE_LIMIT = 4096
+
+
+class ScanResult(NamedTuple):
+    table: pd.DataFrame
+    missing: list[str]
+    skipped: list[str]
+
+
+def load_watchlists(path: str = WATCHLISTS_FILE) -> dict[str, list[str]]:
+    """
+    Funkcja wczytuje zdefiniowane listy symboli.
+    :param path: str - ścieżka do pliku yml
+    :return: dict nazwa listy -> symbole
+    """
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+def resolve_symbols(args: list[str], watchlists: dict[str, list[str]]) -> list[str]:
+    """
+    Funkcja zamienia argumenty komendy na listę symboli - nazwy list są rozwijane, powtórzenia usuwane.
+    :param args: list - nazwy list lub symbole
+    :param watchlists: dict - listy symboli
+    :return: list
+    """
+    symbols = []
+    for arg in args:
+        symbols += watchlists.get(arg.lower(), [arg])
+    return list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+
+def load_batch(symbols: list[str], interval: str, start: pd.Timestamp) -> dict[str, pd.DataFrame]:
+    """
+    Funkcja zwraca dane paczki symboli - aktualne dane z cache, pozostałe jednym zapytaniem do Yahoo.
+    :param symbols: list - symbole giełdowe
+    :param interval: str - jednostka czasu
+    :param start: Timestamp - początek wymaganego zakresu
+    :return: dict symbol -> DataFrame
+    """
+    result = {}
+    stale = {}
+
+    for symbol in symbols:
+        cached = ohlcv_cache.load(symbol, interval)
+        if cached is not None and ohlcv_cache.covers(cached, start):
+            if ohlcv_cache.is_fresh(cached.fetched_at, interval, symbol):
+                result[symbol] = ohlcv_cache.since(cached.data, start)
+                continue
+            stale[symbol] = cached
+        result[symbol] = None
+
+    missing = [symbol for symbol, data in result.items() if data is None]
+    if not missing:
+        return result
+
+    downloaded = data_provider.provider.download_many(missing, start=start, interval=interval)
+    for symbol in missing:
+        data = downloaded.get(symbol)
+        if data is None:
+            del result[symbol]
+            continue
+
+        data = result[symbol] = ohlcv_frame.compact(data)
+        # dłuższa historia z cache jest uzupełniana, a nie zastępowana krótszym zakresem skanera
+        cached = stale.get(symbol)
+        merged = None
+        if cached is not None and len(cached.data) > 1:
+            merged = ohlcv_cache.merge(cached.data, data.loc[cached.data.index[-2]:])
+        if merged is not None:
+            ohlcv_cache.save(symbol, interval, merged, cached.start)
+        else:
+            ohlcv_cache.save(symbol, interval, data, start)
+    return result
+
+
+def rate_symbol(data_d: pd.DataFrame, data_w: pd.DataFrame, config: dict) -> dict[str, int] | None:
+    """
+    Funkcja ocenia jedną spółkę.
+    :param data_d: DataFrame - dane dzienne
+    :param data_w: DataFrame - dane tygodniowe
+    :param config: dict - ustawienia wskaźników
+    :return: dict warunek -> ilość punktów (wraz z sumą 'rating') lub None przy zbyt małej ilości danych
+    """
+    try:
+        conditions = rating(IndicatorFrame(data_d, config), IndicatorFrame(data_w, config))
+    except (ValueError, IndexError):
+        return None
+
+    # sygnał impulse bez punktu odniesienia (brak zmian na świecy) nie daje punktów
+    conditions = {name: points or 0 for name, points in conditions.items()}
+    return {'rating': sum(conditions.values()), **conditions}
+
+
+def scan(symbols: list[str], config: dict, batch_size: int = SCAN_BATCH_SIZE, timeout: float = SCAN_TIMEOUT) \
+        -> ScanResult:
+    """
+    Funkcja ocenia listę spółek i zwraca ranking.
+    :param symbols: list - symbole giełdowe
+    :param config: dict - ustawienia wskaźników
+    :param batch_size: int - liczba symboli w jednym zapytaniu do Yahoo
+    :param timeout: float - czas (s), po którym pozostałe paczki są pomijane
+    :return: ScanResult - ranking, symbole bez danych, symbole pominięte z powodu limitu czasu
+    """
+    deadline = time.monotonic() + timeout
+    # świece tygodniowe są wyznaczane z dziennych - dane dzienne obejmują rozgrzewkę wskaźników tygodniowych
+    start = resample.period_start('1wk', fetch_window.fetch_start('1wk', SCAN_PERIOD, config))
+    rows, missing, skipped = [], [], []
+
+    for i in range(0, len(symbols), batch_size):
+        if time.monotonic() > deadline:
+            skipped = symbols[i:]
+            break
+
+        batch = symbols[i:i + batch_size]
+        data = load_batch(batch, '1d', start)
+
+        for symbol in batch:
+            row = None
+            if symbol in data:
+                row = rate_symbol(data[symbol], resample.resample_ohlcv(data[symbol], '1wk'), config)
+            if row is None:
+                missing.append(symbol)
+            else:
+                rows.append({'symbol': symbol, **row})
+
+    table = pd.DataFrame(rows, columns=['symbol', 'rating', *CONDITION_LABELS])
+    table = table.sort_values(['rating', 'symbol'], ascending=[False, True], ignore_index=True)
+    return ScanResult(table, missing, skipped)
+
+
+def format_result(result: ScanResult, limit: int = MESSAGE_LIMIT) -> str:
+    """
+    Funkcja formatuje ranking jako wiadomość (Markdown) - wiersze, które nie mieszczą się w limicie, są pomijane.
+    :param result: ScanResult - wynik skanu
+    :param limit: int - maksymalna długość wiadomości
+    :return: str
+    """
+    header = f'*Ranking spółek* ({len(result.table)})\n'
+    legend = 'IT/ID - impulse tygodniowy/dzienny, SW - strefa wartości\n'
+    columns = f'{"#":>3} {"Symbol":<10} {"Ocena":>5} ' + ' '.join(f'{label:>3}' for label in CONDITION_LABELS.values())
+
+    footer = ''
+    if result.missing:
+        footer += f'\nBrak danych: `{", ".join(result.missing)}`'
+    if result.skipped:
+        footer += f'\nPominięte (limit czasu): `{", ".join(result.skipped)}`'
+    if len(footer) > limit // 4:
+        footer = (f'\nBrak danych: {len(result.missing)}' if result.missing else '') + \
+                 (f'\nPominięte (limit czasu): {len(result.skipped)}' if result.skipped else '')
+
+    # zapas na informację o pominiętych wierszach
+    budget = limit - len(header) - len(legend) - len(footer) - 64
+    lines = [columns]
+    used = len(columns) + 8
+    for position, row in enumerate(result.table.itertuples(index=False), start=1):
+        line = f'{position:>3} {row.symbol:<10} {row.rating:>5} ' + ' '.join(
+            f'{getattr(row, name):>3}' for name in CONDITION_LABELS)
+        if used + len(line) + 1 > budget:
+            lines.append(f'... i {len(result.table) - position + 1} więcej')
+            break
+        lines.append(line)
+        used += len(line) + 1
+
+    table = '\n'.join(lines)
+    return f'{header}{legend}```\n{table}\n```{footer}'
@@ -0,0 +1,99 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+SETTINGS_DB = os.environ.get('SETTINGS_DB', 'settings.db')
+# odstęp (s) między zapisami zmienionych ustawień do bazy
+SETTINGS_FLUSH_INTERVAL = float(os.environ.get('SETTINGS_FLUSH_INTERVAL', 5))
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsStore:
+    """
+    Klasa przechowuje ustawienia każdego chatu w pamięci. Zmiany są zapisywane do SQLite w tle, paczkami - obsługa
+    komend nie czeka na zapis. W bazie przechowywane są tylko wartości różne od domyślnych (config.yml).
+    """
+
+    def __init__(self, defaults: dict, path: str = SETTINGS_DB):
+        """
+        :param defaults: dict - ustawienia domyślne
+        :param path: str - ścieżka do bazy SQLite
+        """
+        self.defaults = defaults
+        self.path = path
+        self._settings: dict[int, dict] = {}
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute('CREATE TABLE IF NOT EXISTS settings (chat_id INTEGER PRIMARY KEY, data TEXT NOT NULL)')
+        return connection
+
+    def _load(self) -> None:
+        with contextlib.closing(self._connect()) as connection:
+            rows = connection.execute('SELECT chat_id, data FROM settings').fetchall()
+
+        for chat, data in rows:
+            overrides = {k: v for k, v in json.loads(data).items() if k in self.defaults}
+            self._settings[chat] = {**self.defaults, **overrides}
+
+    def get(self, chat: int) -> dict:
+        """
+        Metoda zwraca ustawienia chatu. Zwracany słownik nie jest modyfikowany - każda zmiana tworzy nowy, więc trwające
+        zapytania korzystają ze spójnych ustawień.
+        :param chat: int - ID chatu
+        :return: dict
+        """
+        return self._settings.get(chat, self.defaults)
+
+    def set(self, chat: int, key: str, value) -> dict:
+        """
+        Metoda zmienia ustawienie chatu i oznacza je do zapisu.
+        :param chat: int - ID chatu
+        :param key: str - nazwa ustawienia
+        :param value: nowa wartość
+        :return: dict - nowe ustawienia chatu
+        """
+        with self._lock:
+            settings = {**self.get(chat), key: value}
+            self._settings[chat] = settings
+            self._dirty.add(chat)
+        return settings
+
+    def flush(self) -> None:
+        """
+        Metoda zapisuje zmienione ustawienia do bazy (jedną transakcją).
+        :return: None
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = [(chat, json.dumps({k: v for k, v in self._settings[chat].items() if self.defaults.get(k) != v}))
+                    for chat in dirty]
+        if not rows:
+            return
+
+        try:
+            # połączenie jest zamykane również po błędzie zapisu
+            with contextlib.closing(self._connect()) as connection, connection:
+                connection.executemany('INSERT OR REPLACE INTO settings (chat_id, data) VALUES (?, ?)', rows)
+        except sqlite3.Error:
+            logger.exception('Nie udało się zapisać ustawień')
+            with self._lock:
+                self._dirty |= dirty
+
+    async def run(self, interval: float = SETTINGS_FLUSH_INTERVAL) -> None:
+        """
+        Metoda cyklicznie zapisuje zmiany w wątku poza pętlą zdarzeń.
+        :param interval: float - odstęp między zapisami (s)
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.flush)
@@ -0,0 +1,32 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Klasa łączy równoczesne wywołania o tym samym kluczu - dopóki zadanie jest w toku, kolejne wywołania czekają na
+    jego wynik zamiast uruchamiać je ponownie.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Metoda wykonuje zadanie lub dołącza do zadania o tym samym kluczu, które jest już w toku.
+        :param key: klucz zadania
+        :param func: funkcja zwracająca korutynę lub Future z wynikiem
+        :return: wynik zadania
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # anulowanie jednego z oczekujących nie przerywa zadania pozostałym
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
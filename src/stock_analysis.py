@@ -1,11 +1,29 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from ta import trend, momentum, volatility, volume
+from matplotlib import dates as mdates, rcParams
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 from io import BytesIO
 import mplfinance as mpf
 
+import downsample
+import image_encoding
+import metrics
+from indicators import IndicatorFrame
+
+# szerokość wykresu z mplfinance (figratio=(10, 8), figscale=1.5) w pikselach
+PRICE_CHART_WIDTH = 1078
+# liczba ostylowanych figur (wykres x motyw) przechowywanych w procesie rysującym
+FIGURE_CACHE_SIZE = 16
+
+_figures: OrderedDict[tuple, tuple[Figure, list]] = OrderedDict()
 
-def set_chart_style(fig: plt.Figure, axes: list, mode: dict) -> tuple:
+
+def set_chart_style(fig: Figure, axes: list, mode: dict) -> tuple:
     """
     Funkcja ustawia motyw na wykresie.
     :param fig: matplotlib Figure
@@ -29,97 +47,239 @@ def set_chart_style(fig: plt.Figure, axes: list, mode: dict) -> tuple:
     return fig, axes
 
 
-def save_plot_to_buffer() -> BytesIO:
+def reset_figure(fig: Figure, axes: list) -> None:
+    """
+    Funkcja usuwa z figury wszystko, co narysował poprzedni wykres - zostaje sam motyw (kolory, osie, siatka).
+    :param fig: matplotlib Figure
+    :param axes: lista Ax figury
+    :return: None
+    """
+    for ax in axes:
+        for artist in [*ax.lines, *ax.collections, *ax.patches, *ax.texts, *ax.images]:
+            artist.remove()
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+        # jednostki osi x (np. strefa czasowa dat) są ustalane od nowa przez kolejne dane
+        ax.xaxis.set_units(None)
+        ax.relim()
+        ax.set_autoscale_on(True)
+    # tight_layout zaczyna od domyślnego układu, tak jak w nowej figurze
+    fig.subplots_adjust(**{param: rcParams[f'figure.subplot.{param}']
+                           for param in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+
+
+def chart_figure(chart: str, mode: dict, panels: int = 1, reuse: bool = True) -> tuple[Figure, list]:
+    """
+    Funkcja zwraca ostylowaną figurę z panelami jeden pod drugim (ze wspólną osią x). Figury są przechowywane dla
+    każdego wykresu i motywu, a przy kolejnym użyciu tylko czyszczone - bez tworzenia osi i ustawiania motywu od nowa.
+    :param chart: str - nazwa wykresu (kolejne użycia figury mają te same ustawienia osi)
+    :param mode: dict - motyw wykresów
+    :param panels: int - liczba paneli
+    :param reuse: bool - False, gdy wykres zmienia układ figury (np. pasek kolorów) i figura nie może być użyta ponownie
+    :return: (Figure, lista Ax)
+    """
+    key = (chart, panels, tuple(sorted(mode.items())))
+    if reuse and key in _figures:
+        _figures.move_to_end(key)
+        fig, axes = _figures[key]
+        reset_figure(fig, axes)
+        return fig, axes
+
+    fig = Figure(figsize=(10, 8))
+    axes = list(fig.subplots(panels, 1, sharex=True)) if panels > 1 else [fig.subplots()]
+    fig, axes = set_chart_style(fig, axes, mode)
+    if reuse:
+        _figures[key] = fig, axes
+        if len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig, axes
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def mpf_style(theme: tuple) -> dict:
+    """
+    Funkcja tworzy styl mplfinance dla motywu (raz na motyw w procesie).
+    :param theme: tuple - pary (klucz, wartość) motywu wykresów
+    :return: dict - styl mplfinance
+    """
+    mode = dict(theme)
+    mc = mpf.make_marketcolors(up=mode['mc_up'], down=mode['mc_down'], edge=mode['mc_edge'], volume=mode['mc_volume'],
+                               wick=mode['mc_wick'], ohlc=mode['mc_ohlc'])
+
+    return mpf.make_mpf_style(
+        marketcolors=mc,
+        facecolor=mode['face'],
+        edgecolor=mode['edge'],
+        figcolor=mode['fig'],
+        gridcolor=mode['grid'],
+        gridstyle='--',
+        rc={'axes.labelcolor': mode['axes_label'], 'xtick.color': mode['xticks'],
+            'ytick.color': mode['yticks']}
+    )
+
+
+def draw_histogram(ax, values: pd.Series, width: pd.Timedelta, mode: dict) -> PolyCollection:
+    """
+    Funkcja rysuje histogram jako jedną kolekcję prostokątów - liczba obiektów matplotlib nie zależy od liczby słupków.
+    :param ax: matplotlib Ax
+    :param values: Series - wysokości słupków z indeksem dat
+    :param width: Timedelta - szerokość słupka
+    :param mode: dict - motyw wykresów
+    :return: PolyCollection
     """
-    Funkcja zapisuje wykres do bufora.
+    x = mdates.date2num(values.index)
+    y = values.to_numpy(dtype=float)
+    half = width / pd.Timedelta(days=1) / 2
+    left, right, zero = x - half, x + half, np.zeros_like(y)
+
+    # wierzchołki prostokątów: (liczba słupków, 4, 2)
+    vertices = np.stack([np.column_stack(corner) for corner in ((left, zero), (left, y), (right, y), (right, zero))],
+                        axis=1)
+    bars = PolyCollection(vertices, facecolors=np.where(y >= 0, mode['mc_up'], mode['mc_down']), linewidths=0)
+    ax.add_collection(bars)
+    ax.update_datalim(np.column_stack([np.concatenate([left, right]), np.concatenate([y, zero])]))
+    ax.autoscale_view()
+    return bars
+
+
+def save_plot_to_buffer(fig: Figure, **kwargs) -> BytesIO:
+    """
+    Funkcja zapisuje wykres do bufora (w formacie ustawionym przez image_encoding.use).
+    :param fig: matplotlib Figure
+    :param kwargs: dodatkowe argumenty savefig
     :return: BytesIO
     """
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
+    with metrics.span('encode'):
+        image_encoding.save(fig, buffer, **kwargs)
     buffer.seek(0)
-    plt.clf()
-    plt.close()
     return buffer
 
 
-def year_cycle_graph(data: pd.DataFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
+def year_cycle_matrix(close: pd.Series) -> pd.DataFrame:
+    """
+    Funkcja układa ceny w macierz lata x dni roku, znormalizowaną do maksimum każdego roku. Dni bez notowań są
+    uzupełniane interpolacją, ale tylko pomiędzy notowaniami danego roku.
+    :param close: Series - ceny zamknięcia
+    :return: DataFrame - wiersze to lata, kolumny to dni roku
+    """
+    matrix = close.groupby([close.index.year, close.index.dayofyear]).last().unstack()
+    matrix = matrix.interpolate(axis=1, limit_area='inside')
+    return matrix.div(matrix.max(axis=1), axis=0)
+
+
+# statystyki sezonowe, które można nałożyć na wykres cykli rocznych
+YEAR_CYCLE_STATS = {
+    'median': ('Mediana', lambda matrix: matrix.median()),
+    'mean': ('Średnia', lambda matrix: matrix.mean()),
+}
+
+
+def year_cycle_graph(ind: IndicatorFrame, mode: dict, start: pd.Timestamp, stats: tuple[str, ...] = ('median',)) \
+        -> BytesIO:
     """
     Funkcja tworzy wykres możliwych cykli rocznych.
-    :param data: DataFrame - dane do analizy z yfinance
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
+    :param stats: tuple - statystyki sezonowe z YEAR_CYCLE_STATS nakładane na wykres (przy co najmniej dwóch latach)
     :return: BytesIO
     """
-    fig, ax = plt.subplots(figsize=(10, 8))
-
-    fig, axes = set_chart_style(fig, [ax], mode)
-    ax = axes[0]
+    data = ind.data
+    stopwatch = metrics.Stopwatch()
 
     p_start = pd.Timestamp(year=int(start.year), month=1, day=1)
-    data = data.loc[p_start:]
-
-    for year in data.index.year.unique():
-        data_year = data[data.index.year == year]["Close"]
-        data_year = data_year / data_year.max()
-        data_year.index = data_year.index.strftime('%m-%d')
-        data_year.plot(ax=ax, label=str(year))
+    matrix = year_cycle_matrix(data.loc[p_start:, 'Close'])
+    stopwatch.lap('indicators')
+
+    colors = rcParams['axes.prop_cycle'].by_key()['color']
+    # pasek kolorów (przy wielu latach) zmienia układ figury, więc taka figura nie jest używana ponownie
+    fig, (ax,) = chart_figure('year_cycle_graph', mode, reuse=len(matrix) <= len(colors))
+
+    # wszystkie lata jako jedna kolekcja linii - luki (NaN) na początku i końcu roku nie są rysowane
+    days = matrix.columns.to_numpy(dtype=float)
+    values = matrix.to_numpy(dtype=float)
+    lines = LineCollection(np.stack([np.broadcast_to(days, values.shape), values], axis=-1))
+    ax.add_collection(lines)
+    low = np.nanmin(values)
+    ax.set_xlim(days[0], days[-1])
+    ax.set_ylim(low - (1 - low) * 0.05, 1 + (1 - low) * 0.05)
+
+    if len(matrix) <= len(colors):
+        # każdy rok w innym kolorze i w legendzie
+        lines.set_colors(colors[:len(matrix)])
+        handles = [Line2D([], [], color=color, label=str(year)) for year, color in zip(matrix.index, colors)]
+    else:
+        # przy wielu latach kolory by się powtarzały - kolor zależy od roku, a lata opisuje pasek kolorów
+        lines.set_array(matrix.index.to_numpy())
+        lines.set_cmap('viridis')
+        colorbar = fig.colorbar(lines, ax=ax)
+        colorbar.ax.tick_params(colors=mode['axes_label'])
+        colorbar.outline.set_edgecolor(mode['edge'])
+        handles = []
+
+    if len(matrix) > 1:
+        # statystyki tylko dla dni z notowaniami w co najmniej połowie lat (np. bez 366. dnia roku)
+        covered = matrix.count() * 2 >= len(matrix)
+        for stat in stats:
+            label, func = YEAR_CYCLE_STATS[stat]
+            handles += ax.plot(days, func(matrix).where(covered).to_numpy(), color=mode['text'], linewidth=2.5,
+                               label=label)
 
     ax.set_xlabel('')
     ax.set_ylabel('')
     ax.set_xticklabels([])
     ax.set_yticklabels([])
 
-    leg = ax.legend()
-    for text in leg.get_texts():
-        text.set_color(mode['text'])
+    if handles:
+        leg = ax.legend(handles=handles)
+        for text in leg.get_texts():
+            text.set_color(mode['text'])
 
-    plt.tight_layout()
-    return save_plot_to_buffer()
+    fig.tight_layout()
+    stopwatch.lap('render')
+    return save_plot_to_buffer(fig)
 
 
-def rsi_so_price(data: pd.DataFrame, mode: dict, start: pd.Timestamp, rsi_window: int, so_window: int,
-                 so_smooth_window: int) -> BytesIO:
+def rsi_so_price(ind: IndicatorFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
     """
     Funkcja tworzy wykres ceny do RSI oraz Osc. stochastycznego.
-    :param data: DataFrame - dane do analizy z yfinance
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
-    :param rsi_window: int - okres RSI
-    :param so_window: int - okres osc. stochastycznego
-    :param so_smooth_window: int - okres linii sygnału w osc. stochastycznym
     :return: BytesIO
     """
+    data = ind.data
+    stopwatch = metrics.Stopwatch()
+
     # RSI
-    rsi = momentum.rsi(close=data["Close"], window=rsi_window).dropna()
+    rsi = ind.rsi.dropna()
     rsi = rsi.loc[start:]
 
     avg_rsi = rsi.mean()
     std_rsi = rsi.std()
 
     # Stochastics Oscilator
-    so = momentum.stoch(high=data['High'], low=data['Low'], close=data['Close'], window=so_window,
-                        smooth_window=so_smooth_window).dropna()
-    so_signal = momentum.stoch_signal(high=data['High'], low=data['Low'], close=data['Close'], window=so_window,
-                                      smooth_window=so_smooth_window).dropna()
+    so = ind.so.dropna()
+    so_signal = ind.so_signal.dropna()
     so = so.loc[start:]
     so_signal = so_signal.loc[start:]
 
     avg_so = so.mean()
     std_so = so.std()
+    stopwatch.lap('indicators')
 
     # chart
-    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 8), sharex=True)
-    fig, axes = set_chart_style(fig, [ax1, ax2, ax3], mode)
-
-    ax1, ax2, ax3 = axes
+    fig, (ax1, ax2, ax3) = chart_figure('rsi_so_price', mode, 3)
+    points = downsample.max_points(fig)
 
-    ax1.plot(data['Close'].loc[rsi.index[0]:rsi.index[-1]], color=mode['price'], label='Cena')
+    ax1.plot(downsample.lttb(data['Close'].loc[rsi.index[0]:rsi.index[-1]], points), color=mode['price'], label='Cena')
     ax1.set_ylabel('Cena')
     leg = ax1.legend()
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
-    ax2.plot(rsi, color=mode['rsi'], label="RSI")
+    ax2.plot(downsample.lttb(rsi, points), color=mode['rsi'], label="RSI")
     ax2.axhline(y=avg_rsi + std_rsi, color=mode['rsi_up'])
     ax2.axhline(y=avg_rsi - std_rsi, color=mode['rsi_down'])
     ax2.axhline(y=avg_rsi, color=mode['rsi_avg'], linestyle='--')
@@ -128,8 +288,8 @@ def rsi_so_price(data: pd.DataFrame, mode: dict, start: pd.Timestamp, rsi_window
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
-    ax3.plot(so, color=mode['so'], label="Linia oscylatora")
-    ax3.plot(so_signal, color=mode['so_signal'], label="Linia sygnału")
+    ax3.plot(downsample.lttb(so, points), color=mode['so'], label="Linia oscylatora")
+    ax3.plot(downsample.lttb(so_signal, points), color=mode['so_signal'], label="Linia sygnału")
     ax3.axhline(y=avg_so + std_so, color=mode['so_up'])
     ax3.axhline(y=avg_so - std_so, color=mode['so_down'])
     ax3.axhline(y=avg_so, color=mode['so_avg'], linestyle="--")
@@ -138,183 +298,177 @@ def rsi_so_price(data: pd.DataFrame, mode: dict, start: pd.Timestamp, rsi_window
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
-    plt.tight_layout()
-    return save_plot_to_buffer()
+    fig.tight_layout()
+    stopwatch.lap('render')
+    return save_plot_to_buffer(fig)
 
 
-def adx(data: pd.DataFrame, mode: dict, start: pd.Timestamp, adx_window: int) -> BytesIO:
+def adx(ind: IndicatorFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
     """
     Funkcja tworzy wykres ADX - wskaźnik trendu.
-    :param data: DataFrame - dane do analizy z yfinance
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
-    :param adx_window: int - okres ADX
     :return: BytesIO
     """
-    c_adx = trend.adx(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window)
-    dipos = trend.adx_pos(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window)
-    dineg = trend.adx_neg(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window)
-    c_adx = c_adx.loc[start:]
-    dipos = dipos.loc[start:]
-    dineg = dineg.loc[start:]
+    stopwatch = metrics.Stopwatch()
+    c_adx = ind.adx.loc[start:]
+    dipos = ind.adx_pos.loc[start:]
+    dineg = ind.adx_neg.loc[start:]
+    stopwatch.lap('indicators')
 
     # chart
-    fig, ax = plt.subplots(figsize=(10, 8))
-    fig, axes = set_chart_style(fig, [ax], mode)
-    ax = axes[0]
+    fig, (ax,) = chart_figure('adx', mode)
 
-    c_adx.plot(ax=ax, label="ADX", color=mode['adx'])
-    dipos.plot(ax=ax, label='+DI', color=mode['posdi'])
-    dineg.plot(ax=ax, label='-DI', color=mode['negdi'])
+    points = downsample.max_points(fig)
+    ax.plot(downsample.lttb(c_adx, points), label="ADX", color=mode['adx'])
+    ax.plot(downsample.lttb(dipos, points), label='+DI', color=mode['posdi'])
+    ax.plot(downsample.lttb(dineg, points), label='-DI', color=mode['negdi'])
 
     leg = ax.legend()
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
-    plt.tight_layout()
-    return save_plot_to_buffer()
+    fig.tight_layout()
+    stopwatch.lap('render')
+    return save_plot_to_buffer(fig)
 
 
-def macd(data: pd.DataFrame, mode: dict, start: pd.Timestamp, macd_slow: int, macd_fast: int,
-         macd_sign: int) -> BytesIO:
+def macd(ind: IndicatorFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
     """
     Funkcja tworzy wykres MACD.
-    :param data: DataFrame - dane do analizy z yfinance
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
-    :param macd_slow: int - długi okres MACD
-    :param macd_fast: int - krótki okres MACD
-    :param macd_sign: int - okres sygnału MACD
     :return: BytesIO
     """
-    macd_line = trend.macd(data['Close'], window_slow=macd_slow, window_fast=macd_fast)
-    macd_signal = trend.macd_signal(data['Close'], window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
-    macd_diff = trend.macd_diff(data['Close'], window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
+    data = ind.data
+    stopwatch = metrics.Stopwatch()
 
-    macd_line = macd_line.loc[start:]
-    macd_signal = macd_signal.loc[start:]
-    macd_diff = macd_diff.loc[start:]
+    macd_line = ind.macd.loc[start:]
+    macd_signal = ind.macd_signal.loc[start:]
+    macd_diff = ind.macd_diff.loc[start:]
+    stopwatch.lap('indicators')
 
     # chart
-    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 8), sharex=True)
-    fig, axes = set_chart_style(fig, [ax1, ax2, ax3], mode)
+    fig, (ax1, ax2, ax3) = chart_figure('macd', mode, 3)
+    points = downsample.max_points(fig)
 
-    ax1, ax2, ax3 = axes
-
-    ax1.plot(data['Close'].loc[macd_line.index[0]:macd_line.index[-1]], color=mode['price'], label='Cena')
+    ax1.plot(downsample.lttb(data['Close'].loc[macd_line.index[0]:macd_line.index[-1]], points), color=mode['price'],
+             label='Cena')
     ax1.set_ylabel('Cena')
     leg = ax1.legend()
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
-    ax2.plot(macd_line, label='Linia MACD', color=mode['macd'])
-    ax2.plot(macd_signal, label='Linia sygnału', color=mode['macd_signal'])
+    ax2.plot(downsample.lttb(macd_line, points), label='Linia MACD', color=mode['macd'])
+    ax2.plot(downsample.lttb(macd_signal, points), label='Linia sygnału', color=mode['macd_signal'])
     ax2.set_ylabel("MACD")
     leg = ax2.legend()
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
+    # najwyżej jeden słupek na piksel - słupki z połączonych przedziałów są odpowiednio szersze
     bar_width = (macd_diff.index[1] - macd_diff.index[0]) * 0.7
-    colors = [mode['mc_up'] if val >= 0 else mode['mc_down'] for val in macd_diff]
-    ax3.bar(macd_diff.index, macd_diff, color=colors, width=bar_width)
+    bars = downsample.extremes(macd_diff, downsample.max_points(fig, 1))
+    bar_width *= len(macd_diff) / len(bars)
+    draw_histogram(ax3, bars, bar_width, mode)
     ax3.set_ylabel("Histogram MACD")
 
-    plt.tight_layout()
-    return save_plot_to_buffer()
+    fig.tight_layout()
+    stopwatch.lap('render')
+    return save_plot_to_buffer(fig)
 
 
-def price_atr_ad(data: pd.DataFrame, mode: dict, start: pd.Timestamp, atr_ema_window: int, atr_window: int) -> BytesIO:
+def price_atr_ad(ind: IndicatorFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
     """
     Funkcja tworzy wykres ceny z kanałami ATR.
-    :param data: DataFrame - dane do analizy z yfinance
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
-    :param atr_ema_window: int - okres średniej
-    :param atr_window: int - okres ATR
     :return: BytesIO
     """
-    ema = trend.ema_indicator(close=data['Close'], window=atr_ema_window).dropna()
-    atr = volatility.average_true_range(high=data['High'], low=data['Low'], close=data['Close'], window=atr_window)
-    a_d = volume.acc_dist_index(high=data['High'], low=data['Low'], close=data['Close'], volume=data['Volume'])
+    data = ind.data
+    stopwatch = metrics.Stopwatch()
+
+    ema = ind.atr_ema.dropna()
+    atr = ind.atr
+    a_d = ind.a_d
 
     ema = ema.loc[start:]
     atr = atr.loc[start:]
     data = data.loc[start:]
     a_d = a_d.loc[start:]
+    ylim = (data['Low'].min() - atr.max(), data['High'].max() + atr.max())
 
-    # chart
-    mc = mpf.make_marketcolors(up=mode['mc_up'], down=mode['mc_down'], edge=mode['mc_edge'], volume=mode['mc_volume'],
-                               wick=mode['mc_wick'], ohlc=mode['mc_ohlc'])
-
-    s = mpf.make_mpf_style(
-        marketcolors=mc,
-        facecolor=mode['face'],
-        edgecolor=mode['edge'],
-        figcolor=mode['fig'],
-        gridcolor=mode['grid'],
-        gridstyle='--',
-        rc={'axes.labelcolor': mode['axes_label'], 'xtick.color': mode['xticks'],
-            'ytick.color': mode['yticks']}
-    )
+    # świece i linie łączone w przedziały - najwyżej jedna świeca na piksel szerokości wykresu
+    candles = data.loc[ema.index[0]:ema.index[-1]]
+    lines = [ema, ema + atr, ema + 2 * atr, ema + 3 * atr, ema - atr, ema - 2 * atr, ema - 3 * atr, a_d]
+    candles, (ema, *bands, a_d) = downsample.ohlc(candles, PRICE_CHART_WIDTH,
+                                                  *(line.reindex(candles.index) for line in lines))
+    stopwatch.lap('indicators')
 
-    buffer = BytesIO()
+    # chart
+    s = mpf_style(tuple(sorted(mode.items())))
 
-    mpf.plot(data.loc[ema.index[0]:ema.index[-1]], type='ohlc', volume=True, style=s, show_nontrading=False,
-             ylabel='Cena', ylabel_lower='Wolumen', figratio=(10, 8), figscale=1.5, tight_layout=True,
-             ylim=(data['Low'].min() - atr.max(), data['High'].max() + atr.max()), savefig=buffer,
-             addplot=[mpf.make_addplot(ema, color=mode['ema'], alpha=mode['alpha']),
-                      mpf.make_addplot(ema + atr, color=mode['atr1'], alpha=mode['alpha'], linestyle='--'),
-                      mpf.make_addplot(ema + 2 * atr, color=mode['atr2'], alpha=mode['alpha'], linestyle='dashdot'),
-                      mpf.make_addplot(ema + 3 * atr, color=mode['atr3'], alpha=mode['alpha']),
-                      mpf.make_addplot(ema - atr, color=mode['atr1'], alpha=mode['alpha'], linestyle='--'),
-                      mpf.make_addplot(ema - 2 * atr, color=mode['atr2'], alpha=mode['alpha'], linestyle='dashdot'),
-                      mpf.make_addplot(ema - 3 * atr, color=mode['atr3'], alpha=mode['alpha']),
-                      mpf.make_addplot(a_d, panel='lower', color=mode['a_d'], secondary_y=True)])
+    fig, axes = mpf.plot(candles, type='ohlc', volume=True, style=s,
+                         show_nontrading=False, ylabel='Cena', ylabel_lower='Wolumen', figratio=(10, 8), figscale=1.5,
+                         tight_layout=True, ylim=ylim,
+                         returnfig=True, closefig=True,
+                         addplot=[mpf.make_addplot(a_d, panel='lower', color=mode['a_d'], secondary_y=True)])
 
-    buffer.seek(0)
-    plt.clf()
-    plt.close()
+    # średnia i kanały ATR jako jedna kolekcja linii - mplfinance rysuje świece w kolejnych pozycjach x
+    x = np.arange(len(candles))
+    styles = [('ema', '-'), ('atr1', '--'), ('atr2', 'dashdot'), ('atr3', '-'), ('atr1', '--'), ('atr2', 'dashdot'),
+              ('atr3', '-')]
+    axes[0].add_collection(LineCollection([np.column_stack([x, line.to_numpy()]) for line in (ema, *bands)],
+                                          colors=[mode[color] for color, _ in styles],
+                                          linestyles=[linestyle for _, linestyle in styles], alpha=mode['alpha']))
+    stopwatch.lap('render')
 
-    return buffer
+    # mplfinance z tight_layout zapisuje wykres z bbox_inches='tight'
+    return save_plot_to_buffer(fig, bbox_inches='tight')
 
 
-def moving_averages(data: pd.DataFrame, mode: dict, start: pd.Timestamp, short_window: int, long_window: int) \
-        -> BytesIO:
+def moving_averages(ind: IndicatorFrame, mode: dict, start: pd.Timestamp) -> BytesIO:
     """
-    Funkcja tworzy wykres ADX - wskaźnik trendu.
-    :param data: DataFrame - dane do analizy z yfinance
+    Funkcja tworzy wykres średnich kroczących.
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :param mode: dict - motyw wykresów
     :param start: Timestamp - data rozpoczęcia wykresu
-    :param short_window: int - okres krótkiej średniej
-    :param long_window: int - okres długiej średniej
     :return: BytesIO
     """
-    ema_short = trend.ema_indicator(data['Close'], window=short_window).dropna()
-    ema_long = trend.ema_indicator(data['Close'], window=long_window).dropna()
+    data = ind.data
+    stopwatch = metrics.Stopwatch()
+
+    ema_short = ind.ema_short.dropna()
+    ema_long = ind.ema_long.dropna()
 
     ema_short = ema_short.loc[start:]
     ema_long = ema_long.loc[start:]
 
     ema_diff = ema_short - ema_long
+    stopwatch.lap('indicators')
 
     # chart
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
-    fig, axes = set_chart_style(fig, [ax1, ax2], mode)
-
-    ax1, ax2 = axes
-
-    ax1.plot(data['Close'].loc[ema_long.index[0]:ema_long.index[-1]], color=mode['price'], label='Cena')
-    ax1.plot(ema_short.loc[ema_long.index[0]:ema_long.index[-1]], color=mode['ema_short'], alpha=mode['alpha'],
-             label='Krótsza średnia')
-    ax1.plot(ema_long, color=mode['ema_long'], alpha=mode['alpha'], label='Dłuższa średnia')
+    fig, (ax1, ax2) = chart_figure('moving_averages', mode, 2)
+    points = downsample.max_points(fig)
+
+    ax1.plot(downsample.lttb(data['Close'].loc[ema_long.index[0]:ema_long.index[-1]], points), color=mode['price'],
+             label='Cena')
+    ax1.plot(downsample.lttb(ema_short.loc[ema_long.index[0]:ema_long.index[-1]], points), color=mode['ema_short'],
+             alpha=mode['alpha'], label='Krótsza średnia')
+    ax1.plot(downsample.lttb(ema_long, points), color=mode['ema_long'], alpha=mode['alpha'], label='Dłuższa średnia')
     leg = ax1.legend()
     for text in leg.get_texts():
         text.set_color(mode['text'])
 
     bar_width = (ema_diff.index[1] - ema_diff.index[0]) * 0.7
-    colors = [mode['mc_up'] if val >= 0 else mode['mc_down'] for val in ema_diff]
-    ax2.bar(ema_diff.index, ema_diff, color=colors, width=bar_width)
+    bars = downsample.extremes(ema_diff, downsample.max_points(fig, 1))
+    bar_width *= len(ema_diff) / len(bars)
+    draw_histogram(ax2, bars, bar_width, mode)
 
-    plt.tight_layout()
+    fig.tight_layout()
+    stopwatch.lap('render')
 
-    return save_plot_to_buffer()
+    return save_plot_to_buffer(fig)
@@ -1,70 +1,78 @@
-from ta import trend, momentum
-import pandas as pd
+from indicators import IndicatorFrame
 
 
-def impulse_signal(data: pd.DataFrame, ema_short: int, macd_slow: int, macd_fast: int, macd_sign: int) -> int:
+def impulse_points(impulse: tuple[float, float], previous: tuple[float, float]) -> int:
     """
-    Funkcja określa sygnał impulse.
-    :param data: DataFrame - dane do analizy z yfinance
-    :param ema_short: int - okres średniej
-    :param macd_slow: int - długi okres MACD
-    :param macd_fast: int - krótki okres MACD
-    :param macd_sign: int - okres sygnału MACD
+    Funkcja przyznaje punkty za sygnał impulse.
+    :param impulse: (zmiana EMA, zmiana histogramu MACD) na ostatniej świecy
+    :param previous: zmiany z ostatniej świecy, na której nie miały one przeciwnych znaków
     :return: ilość punktów
     """
-    ema = trend.ema_indicator(close=data['Close'], window=ema_short)
-    macd_hist = trend.macd_diff(data['Close'], window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
-
-    impulse_ema = ema.iloc[-1] - ema.iloc[-2]
-    impulse_macd = macd_hist.iloc[-1] - macd_hist.iloc[-2]
-
+    impulse_ema, impulse_macd = impulse
     if impulse_ema > 0 and impulse_macd > 0:
         return 1
     elif impulse_ema < 0 and impulse_macd < 0:
         return 0
 
-    pointer = -2
-    while impulse_ema * impulse_macd < 0:
-        impulse_ema = ema.iloc[pointer] - ema.iloc[pointer-1]
-        impulse_macd = macd_hist.iloc[pointer] - macd_hist.iloc[pointer-1]
-        pointer -= 1
-
+    impulse_ema, impulse_macd = previous
     if impulse_ema > 0 and impulse_macd > 0:
         return 0
     elif impulse_ema < 0 and impulse_macd < 0:
         return 2
 
 
-def value_zone(data: pd.DataFrame, ema_short: int, ema_long: int) -> int:
+def impulse_signal(ind: IndicatorFrame) -> int:
     """
-    Funkcja sprawdza jak cena ma się do strefy wartości.
-    :param data: DataFrame - dane do analizy z yfinance
-    :param ema_short: int - okres krótkiej średniej
-    :param ema_long: int - okres długiej średniej
+    Funkcja określa sygnał impulse.
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :return: ilość punktów
     """
-    ema_sh = trend.ema_indicator(close=data['Close'], window=ema_short).iloc[-1]
-    ema_l = trend.ema_indicator(close=data['Close'], window=ema_long).iloc[-1]
-    price = data['Close'].iloc[-1]
+    ema = ind.ema_short
+    macd_hist = ind.macd_diff
+
+    impulse = (ema.iloc[-1] - ema.iloc[-2], macd_hist.iloc[-1] - macd_hist.iloc[-2])
 
+    previous = impulse
+    pointer = -2
+    while previous[0] * previous[1] < 0:
+        previous = (ema.iloc[pointer] - ema.iloc[pointer-1], macd_hist.iloc[pointer] - macd_hist.iloc[pointer-1])
+        pointer -= 1
+
+    return impulse_points(impulse, previous)
+
+
+def value_zone_points(price: float, ema_sh: float, ema_l: float) -> int:
+    """
+    Funkcja przyznaje punkty za położenie ceny względem strefy wartości.
+    :param price: float - cena
+    :param ema_sh: float - krótka średnia
+    :param ema_l: float - długa średnia
+    :return: ilość punktów
+    """
     if price < ema_sh and price < ema_l:
         return 2
-    elif ema_sh > price > ema_l or ema_long > price > ema_sh:
+    elif ema_sh > price > ema_l or ema_l > price > ema_sh:
         return 1
     else:
         return 0
 
 
-def rsi_level(data: pd.DataFrame, rsi_window: int) -> int:
+def value_zone(ind: IndicatorFrame) -> int:
     """
-    Funkcja sprawdza poziom wartości przy pomocy wskaźnika RSI.
-    :param data: DataFrame - dane do analizy z yfinance
-    :param rsi_window: int - okres RSI
+    Funkcja sprawdza jak cena ma się do strefy wartości.
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :return: ilość punktów
     """
-    data = data.loc[data.index[-1] - pd.Timedelta('182d'):]
+    return value_zone_points(ind.data['Close'].iloc[-1], ind.ema_short.iloc[-1], ind.ema_long.iloc[-1])
+
 
-    rsi = momentum.rsi(close=data["Close"], window=rsi_window).dropna()
+def rsi_level(ind: IndicatorFrame) -> int:
+    """
+    Funkcja sprawdza poziom wartości przy pomocy wskaźnika RSI.
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
+    :return: ilość punktów
+    """
+    rsi = ind.last('182d').rsi.dropna()
     avg_rsi = rsi.mean()
     std_rsi = rsi.std()
     current_rsi = rsi.iloc[-1]
@@ -77,18 +85,13 @@ def rsi_level(data: pd.DataFrame, rsi_window: int) -> int:
         return 0
 
 
-def so_level(data: pd.DataFrame, so_window: int, so_smooth_window: int) -> int:
+def so_level(ind: IndicatorFrame) -> int:
     """
     Funkcja sprawdza poziom wartości przy pomocy Oscylatora Stochastycznego.
-    :param data: DataFrame - dane do analizy z yfinance
-    :param so_window: int - okres osc. stochastycznego
-    :param so_smooth_window: int - okres linii sygnału w osc. stochastycznym
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :return: ilość punktów
     """
-    data = data.loc[data.index[-1] - pd.Timedelta('182d'):]
-
-    so = momentum.stoch(high=data['High'], low=data['Low'], close=data['Close'], window=so_window,
-                        smooth_window=so_smooth_window).dropna()
+    so = ind.last('182d').so.dropna()
     avg_so = so.mean()
     std_so = so.std()
     current_so = so.iloc[-1]
@@ -101,20 +104,42 @@ def so_level(data: pd.DataFrame, so_window: int, so_smooth_window: int) -> int:
         return 0
 
 
-def adx_level(data: pd.DataFrame, adx_window: int) -> int:
+def adx_level(ind: IndicatorFrame) -> int:
     """
-    Funkcja sprawdza poziom wartości przy pomocy Oscylatora Stochastycznego.
-    :param data: DataFrame - dane do analizy z yfinance
-    :param adx_window: okres ADX
+    Funkcja sprawdza siłę trendu przy pomocy wskaźnika ADX.
+    :param ind: IndicatorFrame - dane do analizy z yfinance wraz ze wskaźnikami
     :return: ilość punktów
     """
-    c_adx = trend.adx(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window).iloc[-1]
-    dipos = trend.adx_pos(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window).iloc[-1]
-    dineg = trend.adx_neg(high=data['High'], low=data['Low'], close=data['Close'], window=adx_window).iloc[-1]
+    return adx_points(ind.adx.iloc[-1], ind.adx_pos.iloc[-1], ind.adx_neg.iloc[-1])
 
+
+def adx_points(c_adx: float, dipos: float, dineg: float) -> int:
+    """
+    Funkcja przyznaje punkty za położenie linii ADX względem linii kierunkowych.
+    :param c_adx: float - ADX
+    :param dipos: float - +DI
+    :param dineg: float - -DI
+    :return: ilość punktów
+    """
     if dipos > c_adx > dineg:
         return 2
     elif c_adx < dipos and c_adx < dineg:
         return 1
     else:
         return 0
+
+
+def rating(ind_d: IndicatorFrame, ind_w: IndicatorFrame) -> dict[str, int]:
+    """
+    Funkcja wyznacza wszystkie warunki oceny spółki.
+    :param ind_d: IndicatorFrame - dane dzienne wraz ze wskaźnikami
+    :param ind_w: IndicatorFrame - dane tygodniowe wraz ze wskaźnikami
+    :return: dict warunek -> ilość punktów
+    """
+    return {
+        'impulse_w': impulse_signal(ind_w),
+        'impulse_d': impulse_signal(ind_d),
+        'value_zone': value_zone(ind_d),
+        'rsi': rsi_level(ind_d),
+        'adx': adx_level(ind_d),
+    }
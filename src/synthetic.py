@@ -0,0 +1,62 @@
+"""
+Syntetyczne dane OHLCV o układzie takim jak dane z yfinance - do benchmarków i testów bez dostępu do sieci.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+# sesja giełdowa (NYSE) dla interwałów śróddziennych
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+SESSION_TZ = 'America/New_York'
+
+# dzienna zmienność ceny
+DAILY_VOLATILITY = 0.02
+
+
+def synthetic_index(interval: str, bars: int, end: pd.Timestamp | None = None) -> pd.DatetimeIndex:
+    """
+    Funkcja tworzy daty świec - dni robocze dla danych dziennych, świece w godzinach sesji dla śróddziennych.
+    :param interval: str - jednostka czasu, np. '1d' lub '2m'
+    :param bars: int - liczba świec
+    :param end: Timestamp - ostatni dzień danych, domyślnie dzisiaj
+    :return: DatetimeIndex
+    """
+    end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end).normalize()
+    if interval == '1d':
+        return pd.bdate_range(end=end, periods=bars, name='Date')
+
+    minutes = int(interval[:-1]) * (60 if interval.endswith('h') else 1)
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(0, SESSION_MINUTES, minutes), unit='min')
+    days = pd.bdate_range(end=end, periods=math.ceil(bars / len(offsets)))
+    index = (days.values[:, None] + offsets.values[None, :]).ravel()[-bars:]
+    return pd.DatetimeIndex(index, name='Datetime').tz_localize(SESSION_TZ)
+
+
+def synthetic_ohlcv(interval: str, bars: int, end: pd.Timestamp | None = None, seed: int = 0,
+                    price: float = 100.0) -> pd.DataFrame:
+    """
+    Funkcja generuje świece z błądzenia losowego ceny (geometrycznego).
+    :param interval: str - jednostka czasu, np. '1d' lub '2m'
+    :param bars: int - liczba świec
+    :param end: Timestamp - ostatni dzień danych, domyślnie dzisiaj
+    :param seed: int - ziarno generatora
+    :param price: float - cena początkowa
+    :return: DataFrame z kolumnami Close, High, Low, Open, Volume
+    """
+    rng = np.random.default_rng(seed)
+    index = synthetic_index(interval, bars, end)
+
+    share = 1.0 if interval == '1d' else int(interval[:-1]) / SESSION_MINUTES
+    sigma = DAILY_VOLATILITY * math.sqrt(share)
+    close = price * np.exp(np.cumsum(rng.normal(0, sigma, bars)))
+    open_ = np.empty(bars)
+    open_[0] = price
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, sigma / 4, bars - 1))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, sigma / 2, bars)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, sigma / 2, bars)))
+    volume = rng.integers(10 ** 5, 10 ** 6, bars) * share
+
+    return pd.DataFrame({'Close': close, 'High': high, 'Low': low, 'Open': open_, 'Volume': volume.round()},
+                        index=index)
@@ -0,0 +1,91 @@
+import logging
+import threading
+
+import pandas as pd
+
+# yf.download przechowuje wyniki w globalnym stanie modułu (shared._DFS), więc jego wywołania z wielu wątków nie mogą
+# się przeplatać - blokada obejmuje tylko pobieranie paczek symboli (skaner, alerty)
+yahoo_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# oba sposoby pobierania (Ticker.history i yf.download) zwracają dane w tej samej postaci, bo trafiają do tego samego
+# pliku cache: ceny nieskorygowane (wraz z Adj Close), jak w yf.download w yfinance < 0.2.51
+AUTO_ADJUST = False
+
+
+def is_intraday(interval: str) -> bool:
+    """
+    Funkcja sprawdza, czy interwał jest śróddzienny.
+    :param interval: str - jednostka czasu
+    :return: bool
+    """
+    return interval[-1] in 'mh'
+
+
+def normalize(data: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Funkcja ujednolica strefę czasową danych: świece dzienne i dłuższe są bez strefy (data sesji giełdy), a świece
+    śróddzienne w strefie czasowej giełdy - jak w yf.download.
+    :param data: DataFrame - dane z yfinance
+    :param interval: str - jednostka czasu
+    :return: DataFrame
+    """
+    if not is_intraday(interval) and isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        data = data.tz_localize(None)
+    return data
+
+
+def download(symbol: str, **kwargs) -> pd.DataFrame:
+    """
+    Funkcja pobiera dane jednego symbolu z Yahoo Finance. Ticker.history nie korzysta ze wspólnego stanu yf.download,
+    więc zapytania różnych użytkowników (i paczki skanera) pobierane są równolegle.
+    :param symbol: str - symbol giełdowy
+    :param kwargs: argumenty przekazywane do Ticker.history (start, period, interval)
+    :return: DataFrame, pusty przy braku danych
+    """
+    import yfinance as yf  # import trwa długo - odkładany do pierwszego użycia lub wstępnego ładowania (preload)
+    try:
+        data = yf.Ticker(symbol).history(auto_adjust=AUTO_ADJUST, **kwargs)
+    except Exception as e:
+        # jak yf.download - błąd pobierania oznacza brak danych
+        logger.warning('Nie udało się pobrać %s: %s', symbol, e)
+        return pd.DataFrame()
+    return normalize(data, kwargs.get('interval', '1d'))
+
+
+def download_many(symbols: list[str], **kwargs) -> dict[str, pd.DataFrame]:
+    """
+    Funkcja pobiera dane wielu symboli jednym zapytaniem (yfinance pobiera je równolegle).
+    :param symbols: list - symbole giełdowe
+    :param kwargs: argumenty przekazywane do yf.download
+    :return: dict symbol -> DataFrame; symbole bez danych są pomijane
+    """
+    with yahoo_lock:
+        import yfinance as yf
+        data = yf.download(symbols, group_by='ticker', threads=True, progress=False, auto_adjust=AUTO_ADJUST, **kwargs)
+    data = normalize(data, kwargs.get('interval', '1d'))
+
+    if data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data.dropna(how='all')} if len(symbols) == 1 else {}
+
+    result = {}
+    tickers = set(data.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in tickers:
+            continue
+        frame = data[symbol].dropna(how='all')
+        if not frame.empty:
+            frame.columns.name = None
+            result[symbol] = frame
+    return result
+
+
+def preload() -> None:
+    """
+    Funkcja importuje yfinance z wyprzedzeniem - w tle, po starcie bota.
+    :return: None
+    """
+    import yfinance
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# moduły bota leżą w src/ i importują się nawzajem bez pakietu
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
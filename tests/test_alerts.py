@@ -0,0 +1,120 @@
+"""
+Przebiegi alertów - stany wskaźników są dokładane nowymi świecami zamiast liczenia od nowa i zapisywane w bazie
+razem z alertami.
+"""
+import os
+
+import pytest
+import yaml
+
+import alerts
+import fetch_window
+import indicator_stream
+import resample
+import screener
+import stock_rate
+from indicator_stream import IndicatorState
+from indicators import IndicatorFrame
+from synthetic import synthetic_ohlcv
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'src', 'config.yml'), 'r') as file:
+    CONFIG = yaml.safe_load(file)
+
+DATA = synthetic_ohlcv('1d', 600, end='2024-06-28', seed=5)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return alerts.AlertStore(str(tmp_path / 'alerts.db'))
+
+
+@pytest.fixture
+def seeds(monkeypatch):
+    # liczba stanów zbudowanych od nowa
+    calls = []
+    seed = IndicatorState.seed.__func__
+
+    def counting_seed(cls, data, config):
+        calls.append(len(data))
+        return seed(cls, data, config)
+
+    monkeypatch.setattr(IndicatorState, 'seed', classmethod(counting_seed))
+    return calls
+
+
+def serve(monkeypatch, end: int) -> None:
+    monkeypatch.setattr(screener, 'load_batch', lambda symbols, interval, start: {s: DATA.iloc[:end] for s in symbols})
+
+
+def test_pass_advances_persisted_state(monkeypatch, store, seeds):
+    store.add(1, 'aapl', '1d', 'rsi')
+    store.add(2, 'aapl', '1d', 'impulse')
+    store.add(2, 'aapl', '1d', 'rating', 5)
+
+    serve(monkeypatch, 580)
+    result = alerts.run_pass(store, lambda chat: CONFIG)
+    # stany dzienny i tygodniowy wspólne dla wszystkich chatów
+    assert sorted(key[1] for key in result.indicator_states) == ['1d', '1wk']
+    assert len(seeds) == 2
+
+    # po ponownym uruchomieniu stan jest wczytywany z bazy i tylko uzupełniany
+    reloaded = alerts.AlertStore(store.path)
+    assert reloaded.indicator_states.keys() == result.indicator_states.keys()
+    serve(monkeypatch, 600)
+    result = alerts.run_pass(reloaded, lambda chat: CONFIG)
+    assert len(seeds) == 2
+    assert result.changed == set(result.indicator_states)
+
+    for (symbol, interval, config), state in result.indicator_states.items():
+        assert state.to_dict() == IndicatorState.seed(alerts.bars(DATA, interval), CONFIG).to_dict()
+
+
+def test_unused_states_are_removed(monkeypatch, store):
+    alert = store.add(1, 'aapl', '1d', 'rsi')
+    serve(monkeypatch, 600)
+    alerts.run_pass(store, lambda chat: CONFIG)
+    assert len(alerts.AlertStore(store.path).indicator_states) == 1
+
+    store.remove(1, alert.id)
+    alerts.run_pass(store, lambda chat: CONFIG)
+    assert not alerts.AlertStore(store.path).indicator_states
+
+
+def test_reseed_when_last_bar_is_missing(monkeypatch, store, seeds):
+    store.add(1, 'aapl', '1d', 'adx')
+    serve(monkeypatch, 300)
+    alerts.run_pass(store, lambda chat: CONFIG)
+
+    # dane nie zawierają ostatniej świecy stanu
+    monkeypatch.setattr(screener, 'load_batch', lambda symbols, interval, start: {s: DATA.iloc[320:] for s in symbols})
+    result = alerts.run_pass(store, lambda chat: CONFIG)
+    assert len(seeds) == 2
+    state, = result.indicator_states.values()
+    assert state.to_dict() == IndicatorState.seed(DATA.iloc[320:], CONFIG).to_dict()
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_rating_matches_rate(monkeypatch, store, seed):
+    history = synthetic_ohlcv('1d', 800, seed=seed)
+    starts = []
+
+    def load_batch(symbols, interval, start):
+        starts.append(start)
+        return {symbol: history.loc[start:] for symbol in symbols}
+
+    monkeypatch.setattr(screener, 'load_batch', load_batch)
+    # zakres danych i ocena jak w /rate - rozgrzewka liczona w tygodniach
+    start = resample.period_start('1wk', fetch_window.fetch_start('1wk', '1y', CONFIG))
+    ind = IndicatorFrame(history.loc[start:], CONFIG)
+    expected = stock_rate.rating(ind, ind.resampled('1wk'))
+    total = sum(points or 0 for points in expected.values())
+
+    reached = store.add(1, 'aapl', '1d', 'rating', total)
+    above = store.add(1, 'aapl', '1d', 'rating', total + 1)
+    result = alerts.run_pass(store, lambda chat: CONFIG)
+
+    assert starts == [start]
+    key = indicator_stream.config_key(CONFIG)
+    states = result.indicator_states
+    assert indicator_stream.rating(states[('AAPL', '1d', key)], states[('AAPL', '1wk', key)]) == expected
+    assert result.states == {reached.id: True, above.id: False}
@@ -0,0 +1,50 @@
+"""
+Okno pobierania - wskaźniki na wykresie liczone z okresu analizy wydłużonego o rozgrzewkę są takie same jak liczone
+na pełnej historii; A/D (suma skumulowana) różni się jedynie stałym przesunięciem.
+"""
+import os
+
+import numpy as np
+import pytest
+import yaml
+
+import fetch_window
+from indicators import IndicatorFrame
+from synthetic import synthetic_ohlcv
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'src', 'config.yml'), 'r') as file:
+    CONFIG = yaml.safe_load(file)
+
+INDICATORS = ['ema_short', 'ema_long', 'atr_ema', 'atr', 'rsi', 'so', 'so_signal', 'adx', 'adx_pos', 'adx_neg', 'macd',
+              'macd_signal', 'macd_diff']
+
+
+def frames(seed: int) -> tuple[IndicatorFrame, IndicatorFrame, int]:
+    data = synthetic_ohlcv('1d', 3000, end='2024-06-28', seed=seed)
+    # wykres obejmuje ostatni rok, a pobierane jest okno z rozgrzewką wskaźników
+    chart = len(data) - 252
+    window = data.iloc[chart - fetch_window.warmup_bars(CONFIG):]
+    return IndicatorFrame(data, CONFIG), IndicatorFrame(window, CONFIG), chart
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_indicators_match_full_history(seed):
+    full, window, chart = frames(seed)
+    start = full.data.index[chart]
+    for name in INDICATORS:
+        expected = getattr(full, name).loc[start:].to_numpy()
+        actual = getattr(window, name).loc[start:].to_numpy()
+        np.testing.assert_allclose(actual, expected, rtol=1e-6, atol=1e-6, err_msg=name)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_accumulation_distribution_matches_up_to_offset(seed):
+    full, window, chart = frames(seed)
+    start = full.data.index[chart]
+    expected = full.a_d.loc[start:].to_numpy()
+    actual = window.a_d.loc[start:].to_numpy()
+
+    # przebieg jest taki sam - różni się tylko poziom odniesienia (suma sprzed okna pobierania)
+    offset = expected[0] - actual[0]
+    scale = np.abs(expected).max()
+    np.testing.assert_allclose(actual + offset, expected, rtol=0, atol=1e-6 * scale)
@@ -0,0 +1,112 @@
+"""
+Zgodność kerneli NumPy z biblioteką ta na stałych danych syntetycznych - wartości i położenie NaN.
+"""
+import math
+
+import numpy as np
+import pytest
+from ta import momentum, trend, volatility, volume
+
+import indicator_kernels as kernels
+from synthetic import synthetic_ohlcv
+
+# okresy jak w config.yml
+EMA_WINDOW = 13
+MACD_WINDOWS = (26, 12, 9)
+RSI_WINDOW = 14
+SO_WINDOWS = (14, 3)
+ATR_WINDOW = 22
+ADX_WINDOW = 14
+
+
+def block_length(alpha: float) -> int:
+    return int(kernels._MAX_EXPONENT / -math.log1p(-alpha))
+
+
+# krótkie serie (także krótsze od okresu wskaźnika) i długości na granicach bloków ewm_from
+LENGTHS = sorted({1, 2, 5, 13, 14, 30, 300, *(
+    n for alpha in (2 / (EMA_WINDOW + 1), 1 / RSI_WINDOW, 1 / ATR_WINDOW)
+    for n in (block_length(alpha) - 1, block_length(alpha), block_length(alpha) + 1, 2 * block_length(alpha) + 1))})
+
+
+@pytest.fixture(params=LENGTHS, ids=lambda n: f'n={n}')
+def data(request):
+    return synthetic_ohlcv('1d', request.param, end='2024-06-28', seed=request.param)
+
+
+def columns(data):
+    return (data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float),
+            data['Close'].to_numpy(dtype=float))
+
+
+def assert_matches(actual, expected):
+    np.testing.assert_allclose(actual, expected.to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
+
+
+def assert_both_fail(kernel, indicator):
+    """
+    Dla zbyt krótkich serii ta zgłasza błąd - kernel też (oba są obsługiwane przez ocenę spółki).
+    """
+    with pytest.raises((ValueError, IndexError)):
+        indicator()
+    with pytest.raises((ValueError, IndexError)):
+        kernel()
+
+
+def test_ema(data):
+    _, _, close = columns(data)
+    assert_matches(kernels.ema_indicator(close, EMA_WINDOW), trend.ema_indicator(data['Close'], EMA_WINDOW))
+
+
+def test_macd(data):
+    _, _, close = columns(data)
+    slow, fast, sign = MACD_WINDOWS
+    indicator = trend.MACD(data['Close'], window_slow=slow, window_fast=fast, window_sign=sign)
+    line, signal, diff = kernels.macd(close, slow, fast, sign)
+    assert_matches(line, indicator.macd())
+    assert_matches(signal, indicator.macd_signal())
+    assert_matches(diff, indicator.macd_diff())
+
+
+def test_rsi(data):
+    _, _, close = columns(data)
+    assert_matches(kernels.rsi(close, RSI_WINDOW), momentum.rsi(data['Close'], RSI_WINDOW))
+
+
+def test_stoch(data):
+    high, low, close = columns(data)
+    window, smooth = SO_WINDOWS
+    indicator = momentum.StochasticOscillator(data['High'], data['Low'], data['Close'], window=window,
+                                              smooth_window=smooth)
+    so, signal = kernels.stoch(high, low, close, window, smooth)
+    assert_matches(so, indicator.stoch())
+    assert_matches(signal, indicator.stoch_signal())
+
+
+def test_average_true_range(data):
+    high, low, close = columns(data)
+    kernel = lambda: kernels.average_true_range(high, low, close, ATR_WINDOW)
+    indicator = lambda: volatility.average_true_range(data['High'], data['Low'], data['Close'], window=ATR_WINDOW)
+    if len(data) < ATR_WINDOW:
+        assert_both_fail(kernel, indicator)
+    else:
+        assert_matches(kernel(), indicator())
+
+
+def test_acc_dist_index(data):
+    high, low, close = columns(data)
+    expected = volume.acc_dist_index(data['High'], data['Low'], data['Close'], data['Volume'])
+    assert_matches(kernels.acc_dist_index(high, low, close, data['Volume'].to_numpy(dtype=float)), expected)
+
+
+def test_adx(data):
+    high, low, close = columns(data)
+    if len(data) < 2 * ADX_WINDOW:
+        assert_both_fail(lambda: kernels.adx(high, low, close, ADX_WINDOW),
+                         lambda: trend.ADXIndicator(data['High'], data['Low'], data['Close'], window=ADX_WINDOW).adx())
+        return
+    indicator = trend.ADXIndicator(data['High'], data['Low'], data['Close'], window=ADX_WINDOW)
+    adx, adx_pos, adx_neg = kernels.adx(high, low, close, ADX_WINDOW)
+    assert_matches(adx, indicator.adx())
+    assert_matches(adx_pos, indicator.adx_pos())
+    assert_matches(adx_neg, indicator.adx_neg())
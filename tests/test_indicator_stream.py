@@ -0,0 +1,79 @@
+"""
+Stan strumieniowy wskaźników - zgodność z oceną spółki liczoną na całej historii, dokładanie świec, zastępowanie
+ostatniej świecy i zapis stanu.
+"""
+import json
+import os
+
+import pytest
+import yaml
+
+import stock_rate
+from indicator_stream import IndicatorState
+from indicators import IndicatorFrame
+from synthetic import synthetic_ohlcv
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'src', 'config.yml'), 'r') as file:
+    CONFIG = yaml.safe_load(file)
+
+
+def points(state: IndicatorState) -> tuple:
+    return state.impulse_signal(), state.value_zone(), state.adx_level(), state.rsi_level()
+
+
+def expected_points(data) -> tuple:
+    ind = IndicatorFrame(data, CONFIG)
+    return (stock_rate.impulse_signal(ind), stock_rate.value_zone(ind), stock_rate.adx_level(ind),
+            stock_rate.rsi_level(ind))
+
+
+@pytest.mark.parametrize('interval, bars', [('1d', 300), ('1d', 1500), ('60m', 700), ('5m', 2000)])
+@pytest.mark.parametrize('seed', range(5))
+def test_seed_matches_rating(interval, bars, seed):
+    data = synthetic_ohlcv(interval, bars, end='2024-06-28', seed=seed)
+    assert points(IndicatorState.seed(data, CONFIG)) == expected_points(data)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_advance_matches_seed(seed):
+    data = synthetic_ohlcv('1d', 500, end='2024-06-28', seed=seed)
+    state = IndicatorState.seed(data.iloc[:400], CONFIG)
+
+    for end in range(420, 501, 20):
+        assert state.advance(data.iloc[:end])
+        assert points(state) == expected_points(data.iloc[:end])
+    assert state.to_dict() == IndicatorState.seed(data, CONFIG).to_dict()
+
+
+def test_last_bar_is_replaced():
+    data = synthetic_ohlcv('1d', 400, end='2024-06-28', seed=1)
+    # ostatnia świeca w trakcie sesji - później zastąpiona ostateczną
+    live = data.copy()
+    live.iloc[-1, live.columns.get_indexer(['High', 'Low', 'Close'])] *= [1.05, 0.9, 0.92]
+
+    state = IndicatorState.seed(live, CONFIG)
+    assert state.advance(data)
+    assert state.to_dict() == IndicatorState.seed(data, CONFIG).to_dict()
+
+
+def test_dict_round_trip():
+    data = synthetic_ohlcv('1d', 450, end='2024-06-28', seed=2)
+    state = IndicatorState.seed(data.iloc[:400], CONFIG)
+
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored.advance(data)
+    assert points(restored) == expected_points(data)
+
+
+def test_only_last_bar_keeps_snapshot():
+    data = synthetic_ohlcv('1d', 300, end='2024-06-28', seed=3)
+    state = IndicatorState.seed(data, CONFIG)
+    assert state.snapshot is not None
+    # stan sprzed ostatniej świecy nie zawiera kolejnych zrzutów
+    assert state.snapshot.snapshot is None
+
+
+def test_advance_requires_last_bar():
+    data = synthetic_ohlcv('1d', 400, end='2024-06-28', seed=4)
+    state = IndicatorState.seed(data.iloc[:300], CONFIG)
+    assert not state.advance(data.iloc[320:])
@@ -0,0 +1,145 @@
+"""
+Cache OHLCV - dane zapisane przy pobieraniu jednego symbolu (Ticker.history) i paczki symboli (yf.download) są
+uzupełniane nawzajem, bez pobierania pełnej historii od nowa; zakres danych śróddziennych jest liczony w UTC.
+"""
+import importlib
+import os
+import time
+
+import pandas as pd
+import pytest
+import yfinance
+
+import data_provider
+import fetch_window
+import ohlcv_cache
+import screener
+from synthetic import synthetic_ohlcv
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+# pełna historia symbolu - kolejne pobrania widzą ją do świecy FakeYahoo.end
+HISTORY = synthetic_ohlcv('1d', 300, end='2024-06-28', seed=7)
+# korekta cen o dywidendy (auto_adjust=True)
+ADJUSTMENT = 0.98
+
+
+class FakeYahoo:
+    """
+    Atrapa yfinance - dane w postaci zwracanej przez Yahoo: Ticker.history ze strefą czasową giełdy, yf.download
+    bez strefy dla świec dziennych; domyślnie ceny skorygowane.
+    """
+
+    def __init__(self):
+        self.end = 290
+        self.calls = []
+        # daty początkowe zapytań Ticker.history kończących się błędem
+        self.failing = set()
+
+    def frame(self, start, auto_adjust: bool | None) -> pd.DataFrame:
+        data = HISTORY.iloc[:self.end].copy()
+        data.insert(4, 'Adj Close', data['Close'] * ADJUSTMENT)
+        if auto_adjust is not False:
+            data[['Open', 'High', 'Low', 'Close']] *= ADJUSTMENT
+            data = data.drop(columns='Adj Close')
+        return data if start is None else data.loc[pd.Timestamp(start):]
+
+    def history(self, symbol: str, start=None, period=None, interval='1d', auto_adjust=True, **kwargs):
+        self.calls.append(('history', start))
+        if start in self.failing:
+            raise ConnectionError('Yahoo nie odpowiada')
+        data = self.frame(None if start is None else pd.Timestamp(start).tz_localize(None), auto_adjust)
+        data[['Dividends', 'Stock Splits']] = 0.0
+        return data.tz_localize('America/New_York')
+
+    def download(self, symbols, start=None, interval='1d', auto_adjust=None, **kwargs):
+        self.calls.append(('download', start))
+        data = self.frame(start, auto_adjust)
+        return pd.concat({symbol: data for symbol in symbols}, axis=1)
+
+
+@pytest.fixture
+def yahoo(monkeypatch, tmp_path):
+    fake = FakeYahoo()
+    monkeypatch.setattr(yfinance, 'Ticker', lambda symbol: type('Ticker', (), {
+        'history': lambda self, **kwargs: fake.history(symbol, **kwargs)})())
+    monkeypatch.setattr(yfinance, 'download', fake.download)
+    monkeypatch.setattr(data_provider, 'provider', data_provider.YahooProvider())
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_DIR', str(tmp_path))
+    return fake
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    # bot wczytuje pliki yml ze ścieżek względnych
+    monkeypatch.chdir(SRC)
+    return importlib.import_module('bot')
+
+
+def expire(monkeypatch) -> None:
+    monkeypatch.setattr(ohlcv_cache, 'is_fresh', lambda *args, **kwargs: False)
+
+
+def test_batch_tops_up_single_symbol_cache(monkeypatch, yahoo, bot):
+    bot.load_data('AAPL', '1d', None, None)
+    expire(monkeypatch)
+    yahoo.end = 300
+
+    start = HISTORY.index[250]
+    data = screener.load_batch(['AAPL'], '1d', start)['AAPL']
+    assert data.index[0] == start and data.index.tz is None
+
+    # pełna historia z cache została uzupełniona o nowe świece
+    cached = ohlcv_cache.load('AAPL', '1d')
+    assert cached.start is None
+    assert cached.data.index.equals(HISTORY.index)
+    assert cached.data['Close'].to_numpy() == pytest.approx(HISTORY['Close'].to_numpy(), rel=1e-6)
+
+
+def test_single_symbol_tops_up_batch_cache(monkeypatch, yahoo, bot):
+    start = HISTORY.index[200]
+    screener.load_batch(['AAPL'], '1d', start)
+    expire(monkeypatch)
+    yahoo.end = 300
+
+    data = bot.load_data('AAPL', '1d', start, None)
+    # pobierane są tylko nowe świece (od przedostatniej z cache), a nie cały zakres
+    assert yahoo.calls[-1] == ('history', HISTORY.index[288])
+    assert data.index.equals(HISTORY.index[200:])
+    assert data['Close'].to_numpy() == pytest.approx(HISTORY['Close'].iloc[200:].to_numpy(), rel=1e-6)
+
+
+def test_failed_top_up_downloads_requested_range(monkeypatch, yahoo, bot):
+    start = HISTORY.index[200]
+    bot.load_data('AAPL', '1d', start, None)
+    expire(monkeypatch)
+
+    # błąd Yahoo przy uzupełnianiu - yahoo.download zwraca pustą ramkę, a dane są pobierane w całym zakresie
+    yahoo.failing.add(HISTORY.index[288])
+    yahoo.end = 300
+
+    data = bot.load_data('AAPL', '1d', start, None)
+    assert yahoo.calls[1:] == [('history', HISTORY.index[288]), ('history', start)]
+    assert data.index.equals(HISTORY.index[200:])
+
+
+@pytest.fixture
+def local_time():
+    # host w strefie czasowej innej niż UTC
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'Asia/Tokyo'
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = previous
+    time.tzset()
+
+
+def test_intraday_window_uses_utc(monkeypatch, bot, local_time):
+    monkeypatch.setattr(bot, 'load_data', lambda symbol, interval, start, retention: start)
+    start = bot.download_data('AAPL', '5m')
+
+    expected = pd.Timestamp.utcnow().tz_localize(None) - pd.Timedelta(fetch_window.interval_limits['5m'])
+    assert abs(start - expected) < pd.Timedelta(minutes=1)
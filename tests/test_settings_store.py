@@ -0,0 +1,72 @@
+"""
+Zapis ustawień w tle - zapis i ponowne wczytanie z bazy SQLite.
+"""
+import json
+import sqlite3
+
+import pytest
+
+from settings_store import SettingsStore
+
+DEFAULTS = {'mode': 'darkblue', 'album': False, 'rsi_window': 14}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'settings.db')
+
+
+def stored(path: str) -> dict[int, dict]:
+    connection = sqlite3.connect(path)
+    rows = connection.execute('SELECT chat_id, data FROM settings').fetchall()
+    connection.close()
+    return {chat: json.loads(data) for chat, data in rows}
+
+
+def test_flush_and_reload(path):
+    store = SettingsStore(DEFAULTS, path)
+    store.set(1, 'mode', 'light')
+    store.set(1, 'album', True)
+    store.set(2, 'rsi_window', 21)
+    store.set(2, 'rsi_window', 14)
+    store.flush()
+
+    # zapisywane są tylko wartości różne od domyślnych
+    assert stored(path) == {1: {'mode': 'light', 'album': True}, 2: {}}
+
+    reloaded = SettingsStore(DEFAULTS, path)
+    assert reloaded.get(1) == {**DEFAULTS, 'mode': 'light', 'album': True}
+    assert reloaded.get(2) == DEFAULTS
+    assert reloaded.get(3) is reloaded.defaults
+
+
+def test_reload_ignores_removed_settings(path):
+    store = SettingsStore({**DEFAULTS, 'legacy': 1}, path)
+    store.set(1, 'legacy', 2)
+    store.flush()
+
+    assert SettingsStore(DEFAULTS, path).get(1) == DEFAULTS
+
+
+def test_failed_flush_keeps_changes(path, monkeypatch):
+    store = SettingsStore(DEFAULTS, path)
+    store.set(1, 'mode', 'light')
+
+    connections = []
+    connect = store._connect
+
+    def failing_connect():
+        connection = connect()
+        connection.execute('DROP TABLE settings')
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(store, '_connect', failing_connect)
+    store.flush()
+    # połączenie jest zamknięte mimo błędu, a zmiany czekają na kolejny zapis
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+    monkeypatch.undo()
+    store.flush()
+    assert stored(path) == {1: {'mode': 'light'}}